@@ -0,0 +1,485 @@
+"""
+Guide: Caching Decorators (LRU / LFU / TTL, size limits, single-flight)
+metaprogramming.py uses a decorator (debug_log) to add logging around a
+function. The same wrapping pattern is the usual way to add caching.
+functools.lru_cache covers the simplest case and stops there:
+
+- no TTL: cached values never go stale,
+- no single-flight: ten threads missing the same key compute it ten times,
+- no byte limit: maxsize=128 is 128 entries, whether they are ints or 50 MB frames,
+- unhashable arguments (lists, dicts) raise TypeError,
+- async def functions cache the coroutine object, which can only be awaited once.
+
+@cached handles all of these:
+
+    @cached(maxsize=1000, policy="lfu", ttl=60, max_bytes=50_000_000)
+    def load_report(customer_id, filters: dict): ...
+
+    load_report.cache_info()   # hits, misses, coalesced, evictions, currsize, bytes
+    load_report.cache_clear()
+
+Policies: "lru" (least recently used), "lfu" (least frequently used, ties go
+to the least recent), and "fifo". ttl works with each of them. max_bytes
+measures values with deep_sizeof (or a sizeof= function you pass).
+"""
+
+import asyncio
+import dataclasses
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from typing import Callable, Optional
+
+from deep_sizeof import deep_sizeof
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "coalesced", "evictions", "expirations",
+                                     "rejected", "currsize", "maxsize", "bytes", "max_bytes"])
+
+_MISSING = object()
+_KWD_MARK = object()  # separates positional args from keyword args in a key
+_FAST_TYPES = frozenset({int, str})
+
+
+# ==============================================================================
+# 1. CANONICAL KEYS FOR UNHASHABLE ARGUMENTS
+# ==============================================================================
+
+def canonical(value):
+    """
+    A hashable stand-in for value, equal for equal values: a list becomes a tagged
+    tuple, and dict/set contents are sorted, so {"a": 1, "b": 2} and
+    {"b": 2, "a": 1} give the same key. The container type is part of the key,
+    so [1, 2] and (1, 2) stay distinct.
+    """
+    tp = type(value)
+    if tp is list or tp is tuple:
+        return (tp, tuple(map(canonical, value)))
+    if tp is dict:
+        return (dict, _sorted(tuple((canonical(k), canonical(v)) for k, v in value.items())))
+    if tp is set or tp is frozenset:
+        return (tp, _sorted(tuple(map(canonical, value))))
+    if tp is bytearray:
+        return (bytearray, bytes(value))
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return (tp, tuple(canonical(getattr(value, f.name)) for f in dataclasses.fields(value)))
+    try:
+        hash(value)
+    except TypeError:
+        if hasattr(value, "tobytes") and hasattr(value, "shape"):  # NumPy arrays
+            return (tp, value.shape, str(value.dtype), value.tobytes())
+        raise TypeError(f"cannot build a cache key from {tp.__name__}") from None
+    return value
+
+
+def _sorted(items):
+    try:
+        return tuple(sorted(items))
+    except TypeError:  # mixed, unorderable types
+        return tuple(sorted(items, key=repr))
+
+
+def make_key(args, kwargs, typed=False):
+    """Cache key for a call; keyword order does not matter. Hashable args are used as-is."""
+    if not kwargs and len(args) == 1 and type(args[0]) in _FAST_TYPES and not typed:
+        return args[0]
+    key = args
+    if kwargs:
+        key += (_KWD_MARK,) + tuple(sorted(kwargs.items()))
+    if typed:
+        key += tuple(type(v) for v in args) + tuple(type(v) for v in kwargs.values())
+    try:
+        hash(key)
+        return key
+    except TypeError:
+        return canonical(key)
+
+
+# ==============================================================================
+# 2. EVICTION POLICIES
+# ==============================================================================
+# A policy only tracks key order; the Cache owns the values. Each method is O(1).
+
+class LRUPolicy:
+    def __init__(self):
+        self._order = OrderedDict()
+
+    def add(self, key):
+        self._order[key] = None
+
+    def touch(self, key):
+        self._order.move_to_end(key)
+
+    def remove(self, key):
+        del self._order[key]
+
+    def victim(self):
+        return next(iter(self._order))
+
+    def clear(self):
+        self._order.clear()
+
+
+class FIFOPolicy(LRUPolicy):
+    def touch(self, key):
+        pass
+
+
+class LFUPolicy:
+    """Frequency buckets (freq -> keys in recency order) plus the current minimum."""
+
+    def __init__(self):
+        self._freq = {}
+        self._buckets = {}
+        self._min = 0
+
+    def add(self, key):
+        self._freq[key] = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min = 1
+
+    def touch(self, key):
+        freq = self._freq[key]
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+            if self._min == freq:
+                self._min = freq + 1
+        self._freq[key] = freq + 1
+        self._buckets.setdefault(freq + 1, OrderedDict())[key] = None
+
+    def remove(self, key):
+        freq = self._freq.pop(key)
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+            if self._min == freq:
+                self._min = min(self._buckets, default=0)
+
+    def victim(self):
+        return next(iter(self._buckets[self._min]))
+
+    def clear(self):
+        self._freq.clear()
+        self._buckets.clear()
+        self._min = 0
+
+
+POLICIES = {"lru": LRUPolicy, "lfu": LFUPolicy, "fifo": FIFOPolicy}
+
+
+# ==============================================================================
+# 3. THE CACHE
+# ==============================================================================
+
+class Cache:
+    """
+    Thread-safe key -> value store with an eviction policy, optional TTL and
+    optional byte budget. Usable on its own, or through @cached.
+    """
+
+    def __init__(self, maxsize: Optional[int] = 128, policy="lru", ttl: Optional[float] = None,
+                 max_bytes: Optional[int] = None, sizeof: Callable = deep_sizeof, clock=time.monotonic):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {', '.join(POLICIES)}")
+        self.maxsize = maxsize
+        self.policy_name = policy
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.clock = clock
+        self._policy = POLICIES[policy]()
+        self._data = {}          # key -> [value, nbytes, expires_at]
+        self._expiry = deque()   # (expires_at, key) in insertion order, checked lazily
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.coalesced = 0
+        self.evictions = self.expirations = self.rejected = 0
+
+    def get(self, key, default=None):
+        """The cached value, or default. Counts a hit or a miss."""
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def _lookup(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        if entry[2] is not None and entry[2] <= self.clock():
+            self._drop(key)
+            self.expirations += 1
+            return _MISSING
+        self._policy.touch(key)
+        return entry[0]
+
+    def set(self, key, value):
+        nbytes = self.sizeof(value) if self.max_bytes is not None else 0  # measured outside the lock
+        with self._lock:
+            if self.maxsize == 0 or (self.max_bytes is not None and nbytes > self.max_bytes):
+                self.rejected += 1
+                return False
+            if key in self._data:
+                self._drop(key)
+            self._expire()
+            # make room before inserting, or LFU would evict the new key (it has the lowest count)
+            while self._data and ((self.maxsize is not None and len(self._data) >= self.maxsize)
+                                  or (self.max_bytes is not None and self._bytes + nbytes > self.max_bytes)):
+                self._drop(self._policy.victim())
+                self.evictions += 1
+            expires = None if self.ttl is None else self.clock() + self.ttl
+            self._data[key] = [value, nbytes, expires]
+            self._policy.add(key)
+            self._bytes += nbytes
+            if expires is not None:
+                self._expiry.append((expires, key))
+            return True
+
+    def _expire(self):
+        if not self._expiry:
+            return
+        now = self.clock()
+        while self._expiry and self._expiry[0][0] <= now:
+            expires, key = self._expiry.popleft()
+            entry = self._data.get(key)
+            if entry is not None and entry[2] == expires:  # not re-set since
+                self._drop(key)
+                self.expirations += 1
+        if len(self._expiry) > 2 * len(self._data) + 64:  # stale markers from re-set keys
+            self._expiry = deque(item for item in self._expiry
+                                 if self._data.get(item[1], (0, 0, None))[2] == item[0])
+
+    def _drop(self, key):
+        entry = self._data.pop(key)
+        self._policy.remove(key)
+        self._bytes -= entry[1]
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            value = self._data[key][0]
+            self._drop(key)
+            return value
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and (entry[2] is None or entry[2] > self.clock())
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._policy.clear()
+            self._expiry.clear()
+            self._bytes = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.coalesced, self.evictions, self.expirations,
+                             self.rejected, len(self._data), self.maxsize, self._bytes, self.max_bytes)
+
+    def __repr__(self):
+        return f"Cache({self.policy_name}, {len(self._data)}/{self.maxsize}, hits={self.hits}, misses={self.misses})"
+
+
+# ==============================================================================
+# 4. THE DECORATOR, WITH SINGLE-FLIGHT
+# ==============================================================================
+
+class _Flight:
+    """One in-progress computation that other threads wait on."""
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = self.error = None
+
+    def wait(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+def cached(func=None, *, maxsize: Optional[int] = 128, policy="lru", ttl: Optional[float] = None,
+           max_bytes: Optional[int] = None, sizeof: Callable = deep_sizeof, typed=False,
+           key: Optional[Callable] = None, single_flight=True):
+    """
+    Cache func's results. Works on plain and async def functions.
+
+    key(*args, **kwargs) overrides key building (default make_key, which accepts
+    lists, dicts, sets and dataclasses). With single_flight, concurrent misses on
+    one key run func once: the other callers wait and share the result, or the
+    exception (exceptions are never cached). They count as `coalesced`, not misses.
+    """
+    if func is None:
+        return functools.partial(cached, maxsize=maxsize, policy=policy, ttl=ttl, max_bytes=max_bytes,
+                                 sizeof=sizeof, typed=typed, key=key, single_flight=single_flight)
+    cache = Cache(maxsize, policy, ttl, max_bytes, sizeof)
+    build_key = key or (lambda *args, **kwargs: make_key(args, kwargs, typed))
+    lock = cache._lock
+    in_flight = {}
+
+    if inspect.iscoroutinefunction(func):
+        async def compute(k, args, kwargs):
+            try:
+                value = await func(*args, **kwargs)
+                cache.set(k, value)
+                return value
+            finally:
+                with lock:
+                    in_flight.pop(k, None)
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            k = build_key(*args, **kwargs)
+            with lock:
+                value = cache._lookup(k)
+                if value is not _MISSING:
+                    cache.hits += 1
+                    return value
+                task = in_flight.get(k) if single_flight else None
+                if task is None:
+                    cache.misses += 1
+                    task = asyncio.ensure_future(compute(k, args, kwargs))
+                    if single_flight:
+                        in_flight[k] = task
+                else:
+                    cache.coalesced += 1
+            # shield: a cancelled caller must not cancel the computation others wait on
+            return await asyncio.shield(task)
+        wrapper = async_wrapper
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            k = build_key(*args, **kwargs)
+            with lock:
+                value = cache._lookup(k)
+                if value is not _MISSING:
+                    cache.hits += 1
+                    return value
+                flight = in_flight.get(k) if single_flight else None
+                if flight is not None:
+                    cache.coalesced += 1
+                else:
+                    cache.misses += 1
+                    if single_flight:
+                        in_flight[k] = leader = _Flight()
+            if flight is not None:
+                return flight.wait()
+            if not single_flight:
+                value = func(*args, **kwargs)
+                cache.set(k, value)
+                return value
+            try:
+                leader.value = value = func(*args, **kwargs)
+                cache.set(k, value)
+                return value
+            except BaseException as e:
+                leader.error = e
+                raise
+            finally:
+                with lock:
+                    del in_flight[k]
+                leader.done.set()
+
+    def cache_invalidate(*args, **kwargs):
+        """Drop the entry for these arguments; True if there was one."""
+        return cache.pop(build_key(*args, **kwargs), _MISSING) is not _MISSING
+
+    wrapper.cache = cache
+    wrapper.cache_info = cache.info
+    wrapper.cache_clear = cache.clear
+    wrapper.cache_invalidate = cache_invalidate
+    return wrapper
+
+
+def lru_cache(maxsize=128, **options):
+    return cached(maxsize=maxsize, policy="lru", **options)
+
+
+def lfu_cache(maxsize=128, **options):
+    return cached(maxsize=maxsize, policy="lfu", **options)
+
+
+def ttl_cache(ttl, maxsize=128, **options):
+    return cached(maxsize=maxsize, ttl=ttl, **options)
+
+
+if __name__ == "__main__":
+    import random
+    from concurrent.futures import ThreadPoolExecutor
+
+    print("--- 1. Unhashable arguments ---")
+
+    @cached
+    def total(prices: list, discounts: dict):
+        return sum(prices) - sum(discounts.values())
+
+    print(total([10, 20], {"a": 1, "b": 2}), total([10, 20], {"b": 2, "a": 1}))  # same key
+    print(total.cache_info())
+
+    print("\n--- 2. Single-flight: 16 threads miss the same key at once ---")
+    calls = []
+
+    @cached(ttl=30)
+    def fetch_rates(currency):
+        calls.append(currency)
+        time.sleep(0.2)  # a slow upstream API
+        return {"currency": currency, "rate": 1.08}
+
+    with ThreadPoolExecutor(16) as ex:
+        results = list(ex.map(fetch_rates, ["EUR"] * 16))
+    print(f"upstream calls: {len(calls)}, same object for everyone: {all(r is results[0] for r in results)}")
+    print(fetch_rates.cache_info())
+
+    print("\n--- 3. LRU vs LFU on a skewed workload with a scan ---")
+    rng = random.Random(7)
+    hot = [int(rng.paretovariate(0.8)) for _ in range(40_000)]  # a few keys are very popular
+    workload = hot[:20_000] + list(range(10**6, 10**6 + 500)) + hot[20_000:]  # plus a one-off scan
+    for policy in ("lru", "lfu"):
+        f = cached(maxsize=100, policy=policy)(lambda x: x * x)
+        for x in workload:
+            f(x)
+        info = f.cache_info()
+        print(f"{policy}: hit rate {info.hits / (info.hits + info.misses):.1%}, evictions {info.evictions:,}")
+
+    print("\n--- 4. Byte budget instead of entry count ---")
+
+    @cached(maxsize=None, max_bytes=2_000_000)
+    def rows(n):
+        return [f"row {i}" for i in range(n)]
+
+    for n in (1_000, 5_000, 10_000, 20_000, 1_000, 100_000):
+        rows(n)
+    info = rows.cache_info()
+    print(f"{info.currsize} entries, {info.bytes / 1e6:.2f} MB of {info.max_bytes / 1e6:.0f} MB, "
+          f"evictions {info.evictions}, rejected (too big) {info.rejected}")
+
+    print("\n--- 5. async def, with single-flight across tasks ---")
+
+    @cached(ttl=0.1)
+    async def lookup(user_id):
+        await asyncio.sleep(0.05)
+        return {"id": user_id}
+
+    async def main():
+        first = await asyncio.gather(*(lookup(1) for _ in range(10)))
+        again = await lookup(1)
+        await asyncio.sleep(0.15)  # let the entry expire
+        await lookup(1)
+        return first, again
+
+    first, again = asyncio.run(main())
+    print(f"same result object: {all(r is again for r in first)}, {lookup.cache_info()}")
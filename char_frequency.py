@@ -0,0 +1,211 @@
+"""
+Guide: One-Pass Character & N-gram Frequencies
+Both comprehension guides build frequency maps with
+    {c: text.count(c) for c in set(text)}
+which rescans the whole text once per distinct character: O(n * k). Here every
+count comes from a single pass:
+
+- str:   collections.Counter's C loop for characters, slices for n-grams.
+- bytes: NumPy bincount over a uint8 view (no Python object per byte), with
+         n-grams packed into integer codes (bigrams -> 65536 bins, up to 8-grams
+         -> uint64 + np.unique). Without NumPy, Counter is used instead.
+
+FrequencyCounter is streaming: feed it chunks of any size and it carries the
+last (max_n - 1) characters over, so n-grams across chunk boundaries are
+counted exactly once. count_file() uses it to process files larger than RAM.
+The results are plain Counters.
+"""
+
+import codecs
+import collections
+from typing import Dict, Optional, Union
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; Counter-based paths are used instead
+    np = None
+
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+_BYTE = [bytes([i]) for i in range(256)]
+
+
+class FrequencyCounter:
+    """
+    Streaming counter for all n-grams of order 1..max_n.
+    mode="str" counts characters, mode="bytes" counts raw bytes.
+    """
+
+    def __init__(self, max_n=1, mode="str"):
+        if max_n < 1:
+            raise ValueError("max_n must be at least 1")
+        if mode not in ("str", "bytes"):
+            raise ValueError(f"mode must be 'str' or 'bytes', got {mode!r}")
+        self.max_n = max_n
+        self.mode = mode
+        self._tail = "" if mode == "str" else b""
+        # bytes mode keeps dense arrays for orders 1-2 and int codes above that
+        self._dense: Dict[int, object] = {}
+        self._counters: Dict[int, collections.Counter] = {
+            n: collections.Counter() for n in range(1, max_n + 1)
+        }
+
+    # --------------------------------------------------------------------------
+    # Feeding data
+    # --------------------------------------------------------------------------
+    def update(self, chunk: Union[str, bytes]):
+        """Count one chunk. Chunks are treated as a continuous stream."""
+        if self.mode == "str" and not isinstance(chunk, str):
+            raise TypeError("mode='str' expects str chunks")
+        if self.mode == "bytes" and not isinstance(chunk, (bytes, bytearray, memoryview)):
+            raise TypeError("mode='bytes' expects bytes-like chunks")
+        if not chunk:
+            return self
+        data = self._tail + (bytes(chunk) if self.mode == "bytes" else chunk)
+        offset = len(self._tail)
+        for n in range(1, self.max_n + 1):
+            # Only grams that end inside the new chunk: the others were
+            # already counted with the previous chunk
+            segment = data[max(0, offset - n + 1):]
+            if len(segment) >= n:
+                if self.mode == "bytes":
+                    self._count_bytes(segment, n)
+                else:
+                    self._count_str(segment, n)
+        if self.max_n > 1:
+            self._tail = data[-(self.max_n - 1):]
+        return self
+
+    def _count_str(self, segment, n):
+        counter = self._counters[n]
+        if n == 1:
+            counter.update(segment)
+        else:
+            counter.update(segment[i:i + n] for i in range(len(segment) - n + 1))
+
+    def _count_bytes(self, segment, n):
+        if np is None or n > 8:
+            counter = self._counters[n]
+            if n == 1:
+                counter.update(segment)  # int keys, converted in counts()
+            else:
+                counter.update(segment[i:i + n] for i in range(len(segment) - n + 1))
+            return
+
+        arr = np.frombuffer(segment, dtype=np.uint8)
+        if n <= 2:
+            codes = arr if n == 1 else (arr[:-1].astype(np.uint32) << 8) | arr[1:]
+            bins = np.bincount(codes, minlength=256 ** n)
+            if n in self._dense:
+                self._dense[n] += bins
+            else:
+                self._dense[n] = bins.astype(np.int64)
+            return
+
+        # Pack n bytes into one uint64 code per position
+        windows = len(arr) - n + 1
+        codes = np.zeros(windows, dtype=np.uint64)
+        for k in range(n):
+            codes = (codes << np.uint64(8)) | arr[k:k + windows].astype(np.uint64)
+        unique, counts = np.unique(codes, return_counts=True)
+        self._counters[n].update(dict(zip(unique.tolist(), counts.tolist())))
+
+    # --------------------------------------------------------------------------
+    # Results
+    # --------------------------------------------------------------------------
+    def counts(self, n=1) -> collections.Counter:
+        """Counter of n-grams of order n (str keys, or bytes keys in bytes mode)."""
+        if not 1 <= n <= self.max_n:
+            raise ValueError(f"n must be between 1 and {self.max_n}")
+        counter = self._counters[n]
+        if self.mode == "str":
+            return collections.Counter(counter)
+
+        result = collections.Counter()
+        if n in self._dense:
+            bins = self._dense[n]
+            for code in np.flatnonzero(bins).tolist():
+                result[code.to_bytes(n, "big")] = int(bins[code])
+        for key, value in counter.items():
+            if isinstance(key, int):
+                key = _BYTE[key] if n == 1 else key.to_bytes(n, "big")
+            result[key] += value
+        return result
+
+    def all_counts(self):
+        """{n: Counter} for every order 1..max_n."""
+        return {n: self.counts(n) for n in range(1, self.max_n + 1)}
+
+
+# ==============================================================================
+# PUBLIC HELPERS
+# ==============================================================================
+
+def char_counts(text: Union[str, bytes]) -> collections.Counter:
+    """
+    Drop-in for {c: text.count(c) for c in set(text)}, in one pass. As with
+    the comprehension, bytes input gives int keys (byte values).
+    """
+    if isinstance(text, str):
+        return FrequencyCounter(1, "str").update(text).counts(1)
+    counts = FrequencyCounter(1, "bytes").update(text).counts(1)
+    return collections.Counter({key[0]: count for key, count in counts.items()})
+
+
+def ngram_counts(text: Union[str, bytes], n: int) -> collections.Counter:
+    """Counter of all overlapping n-grams of `text`."""
+    mode = "str" if isinstance(text, str) else "bytes"
+    counter = FrequencyCounter(n, mode)
+    counter.update(text)
+    return counter.counts(n)
+
+
+def count_file(path, max_n=1, encoding: Optional[str] = None,
+               chunk_size=DEFAULT_CHUNK_SIZE) -> FrequencyCounter:
+    """
+    Stream a file through a FrequencyCounter with bounded memory.
+    encoding=None counts raw bytes; otherwise text is decoded incrementally,
+    so multi-byte characters split across chunks are handled.
+    """
+    counter = FrequencyCounter(max_n, "bytes" if encoding is None else "str")
+    decoder = codecs.getincrementaldecoder(encoding)() if encoding else None
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            counter.update(decoder.decode(chunk) if decoder else chunk)
+        if decoder:
+            counter.update(decoder.decode(b"", final=True))
+    return counter
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import time
+
+    print("--- 1. Same answer as the comprehension ---")
+    text = "banana"
+    print(f"Comprehension: {dict(sorted({c: text.count(c) for c in set(text)}.items()))}")
+    print(f"char_counts:   {dict(sorted(char_counts(text).items()))}")
+    print(f"Bigrams:       {dict(ngram_counts(text, 2))}")
+
+    print("\n--- 2. Large text: O(n*k) vs one pass ---")
+    big = "".join(chr(32 + (i * 7919) % 90) for i in range(200_000)) * 5
+    start = time.perf_counter()
+    slow = {c: big.count(c) for c in set(big)}
+    t_slow = time.perf_counter() - start
+    start = time.perf_counter()
+    fast = char_counts(big.encode("ascii"))
+    t_fast = time.perf_counter() - start
+    print(f"Equal: {slow == {chr(k): v for k, v in fast.items()}}")
+    print(f"text.count per char: {t_slow * 1e3:.1f} ms, one pass: {t_fast * 1e3:.1f} ms "
+          f"(NumPy: {'yes' if np else 'no'})")
+
+    print("\n--- 3. Streaming a file in tiny chunks (grams across boundaries) ---")
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", delete=False) as tmp:
+        tmp.write("naïve café " * 1000)
+    try:
+        streamed = count_file(tmp.name, max_n=3, encoding="utf-8", chunk_size=7)
+        direct = ngram_counts("naïve café " * 1000, 3)
+        print(f"Trigrams equal to the in-memory count: {streamed.counts(3) == direct}")
+        print(f"Top 3 characters: {streamed.counts(1).most_common(3)}")
+    finally:
+        os.remove(tmp.name)
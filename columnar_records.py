@@ -0,0 +1,293 @@
+"""
+Guide: Columnar Records (struct-of-arrays instead of one object per record)
+tuple_guide() and comprehensions.py use namedtuple('Point', ['x', 'y']). Each
+Point is a full Python object: ~64 bytes for the tuple plus two 24-byte floats,
+so 50M Points need over 5 GB. A columnar store keeps ONE typed array per field:
+
+    x: array('d', [1.0, 4.0, ...])      8 bytes per value
+    y: array('d', [2.0, 5.0, ...])      8 bytes per value
+
+Rows are only created on demand, as lightweight views (row.x reads column x at
+row i), and filters/aggregates work on whole columns at once - vectorized
+with NumPy when it is installed, otherwise with C-level loops over the arrays.
+
+    Points = RecordStore.from_namedtuple(Point, types={"x": "d", "y": "d"})
+    Points.append(1.5, 2.5)
+    far = Points.select(Points.mask("x", lambda x: x > 100))
+"""
+
+import array
+import dataclasses
+import itertools
+from collections import namedtuple
+from typing import Dict, Iterable, Mapping
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; aggregates use builtins instead
+    np = None
+
+# Python type -> array.array typecode. Anything else is kept in a plain list.
+_TYPECODES = {float: "d", int: "q", bool: "b"}
+
+
+class Row:
+    """A view of one record: attribute reads go straight to the columns."""
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    def __getattr__(self, name):
+        try:
+            column = self._store._columns[name]
+        except KeyError:
+            raise AttributeError(name) from None
+        return column[self._index]
+
+    def __getitem__(self, i):
+        return self._store._columns[self._store.fields[i]][self._index]
+
+    def __iter__(self):
+        return (self._store._columns[f][self._index] for f in self._store.fields)
+
+    def as_tuple(self):
+        """Materialize this row as the store's namedtuple."""
+        return self._store.record_type(*self)
+
+    def _asdict(self):
+        return dict(zip(self._store.fields, self))
+
+    def __eq__(self, other):
+        if isinstance(other, (Row, tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        values = ", ".join(f"{f}={v!r}" for f, v in zip(self._store.fields, self))
+        return f"{self._store.name}({values})"
+
+
+class RecordStore:
+    """Struct-of-arrays container for records with a fixed set of fields."""
+
+    def __init__(self, name, fields: Mapping[str, str]):
+        """`fields` maps field name -> array typecode ('d', 'q', 'i', ...) or None for objects."""
+        self.name = name
+        self.fields = tuple(fields)
+        self.typecodes = dict(fields)
+        self._columns: Dict[str, object] = {
+            f: array.array(tc) if tc else [] for f, tc in fields.items()
+        }
+        self.record_type = namedtuple(name, self.fields)
+
+    # --------------------------------------------------------------------------
+    # Constructors from existing record definitions
+    # --------------------------------------------------------------------------
+    @classmethod
+    def from_namedtuple(cls, nt_type, types: Mapping[str, str] = None):
+        """Use a namedtuple's fields; typecodes default to 'd' (float64)."""
+        types = types or {}
+        return cls(nt_type.__name__, {f: types.get(f, "d") for f in nt_type._fields})
+
+    @classmethod
+    def from_dataclass(cls, dc_type, types: Mapping[str, str] = None):
+        """Use a dataclass's fields, mapping int/float/bool annotations to typed arrays."""
+        types = types or {}
+        spec = {}
+        for f in dataclasses.fields(dc_type):
+            spec[f.name] = types.get(f.name, _TYPECODES.get(f.type))
+        return cls(dc_type.__name__, spec)
+
+    # --------------------------------------------------------------------------
+    # Appending (amortized O(1): array.array over-allocates like list)
+    # --------------------------------------------------------------------------
+    def append(self, *values, **named):
+        if named:
+            values = tuple(values) + tuple(named[f] for f in self.fields[len(values):])
+        if len(values) != len(self.fields):
+            raise TypeError(f"{self.name} expects {len(self.fields)} values, got {len(values)}")
+        appended = []
+        try:
+            for f, v in zip(self.fields, values):
+                self._columns[f].append(v)
+                appended.append(f)
+        except BaseException:
+            for f in appended:  # keep the columns the same length
+                self._columns[f].pop()
+            raise
+
+    def extend(self, rows: Iterable):
+        """Append many rows (tuples, namedtuples or Rows), column by column."""
+        columns = list(zip(*rows))
+        if not columns:
+            return
+        if len(columns) != len(self.fields):
+            raise TypeError(f"{self.name} rows must have {len(self.fields)} values")
+        self._extend_all(dict(zip(self.fields, columns)))
+
+    def extend_columns(self, **columns):
+        """Append whole columns at once (the fastest way in)."""
+        lengths = {len(v) for v in columns.values()}
+        if set(columns) != set(self.fields) or len(lengths) != 1:
+            raise ValueError("extend_columns() needs every field, all of the same length")
+        self._extend_all(columns)
+
+    def _extend_all(self, columns):
+        """
+        Convert every column first (a bad value raises before anything is
+        written), then extend; if a column still fails (BufferError from a live
+        column() view), the columns already extended are truncated back.
+        """
+        batches = {}
+        for f, values in columns.items():
+            tc = self.typecodes[f]
+            batches[f] = (values if isinstance(values, array.array) and values.typecode == tc
+                          else array.array(tc, values)) if tc else list(values)
+        start = len(self)
+        extended = []
+        try:
+            for f, values in batches.items():
+                self._columns[f].extend(values)
+                extended.append(f)
+        except BaseException:
+            for f in extended:
+                del self._columns[f][start:]
+            raise
+
+    # --------------------------------------------------------------------------
+    # Access
+    # --------------------------------------------------------------------------
+    def __len__(self):
+        return len(self._columns[self.fields[0]]) if self.fields else 0
+
+    def __getitem__(self, i):
+        n = len(self)
+        if isinstance(i, slice):
+            return self.take(range(*i.indices(n)))
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("RecordStore index out of range")
+        return Row(self, i)
+
+    def __iter__(self):
+        """Yields a Row view per record; see iter_tuples() for plain tuples."""
+        for i in range(len(self)):
+            yield Row(self, i)
+
+    def iter_tuples(self):
+        """Fast iteration as plain tuples (zip over the columns)."""
+        return zip(*(self._columns[f] for f in self.fields))
+
+    def column(self, name, copy=False):
+        """
+        The column as a NumPy array sharing the array.array's memory (no copy),
+        or the raw array/list without NumPy.
+
+        While such a view is alive the array cannot be resized: append() and
+        extend() raise BufferError ("cannot resize an array that is exporting
+        buffers") until the view is deleted. Pass copy=True for an independent
+        array that does not lock the store.
+        """
+        col = self._columns[name]
+        if np is not None and isinstance(col, array.array):
+            if not len(col):
+                return np.array([], dtype=col.typecode)
+            view = np.frombuffer(col, dtype=col.typecode)
+            return view.copy() if copy else view
+        return col[:] if copy else col
+
+    # --------------------------------------------------------------------------
+    # Column-wise filtering and aggregation
+    # --------------------------------------------------------------------------
+    def mask(self, name, predicate):
+        """
+        Boolean mask for a column. With NumPy, `predicate` receives the whole
+        column array (so lambda x: x > 5 is vectorized); without it, it is
+        applied value by value. The same lambda works in both cases.
+        """
+        col = self.column(name)
+        if np is not None and isinstance(col, np.ndarray):
+            return np.asarray(predicate(col), dtype=bool)
+        return [bool(predicate(v)) for v in col]
+
+    def select(self, mask):
+        """New store with only the rows where mask is true."""
+        result = RecordStore(self.name, self.typecodes)
+        for f in self.fields:
+            col = self._columns[f]
+            if np is not None and isinstance(mask, np.ndarray) and isinstance(col, array.array):
+                kept = self.column(f)[mask]
+                result._columns[f] = array.array(col.typecode, kept.tobytes())
+            elif isinstance(col, array.array):
+                result._columns[f] = array.array(col.typecode, itertools.compress(col, mask))
+            else:
+                result._columns[f] = list(itertools.compress(col, mask))
+        return result
+
+    def where(self, name, predicate):
+        """Shortcut for select(mask(name, predicate))."""
+        return self.select(self.mask(name, predicate))
+
+    def take(self, indices):
+        """New store with the rows at `indices`, in that order."""
+        result = RecordStore(self.name, self.typecodes)
+        for f in self.fields:
+            col = self._columns[f]
+            picked = [col[i] for i in indices]
+            result._columns[f] = array.array(col.typecode, picked) if isinstance(col, array.array) else picked
+        return result
+
+    def sum(self, name):
+        col = self.column(name)
+        return col.sum().item() if np is not None and isinstance(col, np.ndarray) else sum(col)
+
+    def mean(self, name):
+        n = len(self)
+        return self.sum(name) / n if n else float("nan")
+
+    def min(self, name):
+        col = self.column(name)
+        return col.min().item() if np is not None and isinstance(col, np.ndarray) else min(col)
+
+    def max(self, name):
+        col = self.column(name)
+        return col.max().item() if np is not None and isinstance(col, np.ndarray) else max(col)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the typed columns (object columns are not counted)."""
+        return sum(c.itemsize * len(c) for c in self._columns.values() if isinstance(c, array.array))
+
+    def __repr__(self):
+        return f"RecordStore({self.name}, fields={self.fields}, rows={len(self):,})"
+
+
+if __name__ == "__main__":
+    import sys
+
+    print("--- 1. Same Point as tuple_guide() ---")
+    Point = namedtuple('Point', ['x', 'y'])
+    points = RecordStore.from_namedtuple(Point)
+    points.append(15, 25)
+    points.extend([Point(1, 2), Point(3, 4)])
+    p = points[0]
+    print(f"Row view: {p}, x={p.x}, y={p.y}, as namedtuple: {p.as_tuple()}")
+
+    print("\n--- 2. Memory for 1,000,000 Points ---")
+    n = 1_000_000
+    tuples = [Point(float(i), float(-i)) for i in range(n)]
+    tuple_bytes = sys.getsizeof(tuples) + sum(sys.getsizeof(t) + 2 * 24 for t in tuples)
+    cols = RecordStore.from_namedtuple(Point)
+    cols.extend_columns(x=array.array("d", range(n)), y=array.array("d", range(0, -n, -1)))
+    print(f"namedtuples: {tuple_bytes / 1e6:.0f} MB, columns: {cols.nbytes / 1e6:.0f} MB")
+
+    print("\n--- 3. Column-wise filter and aggregates ---")
+    far = cols.where("x", lambda x: x >= 999_990)
+    print(f"{len(far)} rows with x >= 999,990; first: {far[0]}")
+    print(f"sum(x) = {cols.sum('x'):,.0f}, mean(y) = {cols.mean('y'):,.1f} "
+          f"(NumPy: {'yes' if np else 'no'})")
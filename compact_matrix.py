@@ -0,0 +1,312 @@
+"""
+Guide: Compact Matrices (one buffer instead of lists of lists)
+list_comprehensions.py transposes with [[row[i] for row in matrix] ...] and
+the other guides build identity/zero matrices as lists of lists. Every cell is
+then a separate Python object (~28-32 bytes for an int/float, plus an 8-byte
+pointer), and every transpose copies everything.
+
+Matrix keeps all cells in ONE array.array (8 bytes per float64 cell) and
+describes the layout with (offset, shape, strides) - the same model NumPy uses:
+
+    address of cell (i, j) = offset + i * row_stride + j * col_stride
+
+So transpose (swap the strides), row/column selection and submatrix slicing
+are O(1) views that share the buffer - writes through a view are visible in
+the parent. NumPy can wrap any view without copying via __array__(),
+and contiguous matrices also support memoryview() / the buffer protocol.
+"""
+
+import array
+import sys
+from typing import Iterable, Sequence
+
+_INT_TYPECODES = set("bBhHiIlLqQ")
+
+
+class Matrix:
+    """A dense 2D matrix (or view) over a single array.array buffer."""
+    __slots__ = ("_data", "_offset", "shape", "strides")
+
+    def __init__(self, rows, cols, typecode="d", fill=0, *, _data=None, _offset=0, _strides=None):
+        if rows < 0 or cols < 0:
+            raise ValueError("matrix dimensions must be non-negative")
+        if _data is None:
+            _data = array.array(typecode, [fill]) * (rows * cols)
+        self._data = _data
+        self._offset = _offset
+        self.shape = (rows, cols)
+        self.strides = _strides if _strides is not None else (cols, 1)  # in elements
+
+    # --------------------------------------------------------------------------
+    # Constructors (compare with the list-of-lists versions in the guides)
+    # --------------------------------------------------------------------------
+    @classmethod
+    def zeros(cls, rows, cols, typecode="d"):
+        """[[0] * cols for _ in range(rows)], in one buffer."""
+        return cls(rows, cols, typecode)
+
+    @classmethod
+    def identity(cls, n, typecode="d"):
+        """[[1 if i == j else 0 for j in range(n)] for i in range(n)], in one buffer."""
+        m = cls(n, n, typecode)
+        m._data[::n + 1] = array.array(typecode, [1]) * n  # the diagonal, in one slice
+        return m
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Iterable], typecode="d"):
+        """Build from a list of lists (or any sequence of row iterables)."""
+        data = array.array(typecode)
+        cols = None
+        for row in rows:
+            before = len(data)
+            data.extend(row)
+            width = len(data) - before
+            if cols is None:
+                cols = width
+            elif width != cols:
+                raise ValueError(f"ragged rows: expected {cols} columns, got {width}")
+        n_rows = len(rows)
+        return cls(n_rows, cols or 0, typecode, _data=data)
+
+    @classmethod
+    def from_buffer(cls, data: array.array, rows, cols):
+        """Wrap an existing array.array (row-major) without copying."""
+        if len(data) != rows * cols:
+            raise ValueError(f"buffer has {len(data)} items, expected {rows * cols}")
+        return cls(rows, cols, data.typecode, _data=data)
+
+    # --------------------------------------------------------------------------
+    # Basic properties
+    # --------------------------------------------------------------------------
+    @property
+    def rows(self):
+        return self.shape[0]
+
+    @property
+    def cols(self):
+        return self.shape[1]
+
+    @property
+    def typecode(self):
+        return self._data.typecode
+
+    @property
+    def base(self):
+        """The underlying array.array shared by this matrix and all its views."""
+        return self._data
+
+    @property
+    def nbytes(self):
+        """Bytes used by the cells this matrix/view covers."""
+        return self.rows * self.cols * self._data.itemsize
+
+    def is_contiguous(self):
+        """True if the cells are one row-major block of the buffer."""
+        rows, cols = self.shape
+        rs, cs = self.strides
+        return (cols <= 1 or cs == 1) and (rows <= 1 or rs == cols)
+
+    def __len__(self):
+        return self.rows
+
+    # --------------------------------------------------------------------------
+    # Indexing: scalars for (i, j), O(1) views for anything with a slice
+    # --------------------------------------------------------------------------
+    def _view(self, offset, shape, strides):
+        if not shape[0] or not shape[1]:
+            offset = 0  # empty views may point "before" the buffer; nothing is read
+        return Matrix(shape[0], shape[1], _data=self._data, _offset=offset, _strides=strides)
+
+    @staticmethod
+    def _normalize(index, size, axis):
+        index = index.__index__()
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError(f"index {index} out of range for axis {axis} with size {size}")
+        return index
+
+    def _split_key(self, key):
+        if not isinstance(key, tuple):
+            key = (key, slice(None))
+        if len(key) != 2:
+            raise IndexError("Matrix indices must be m[i, j], m[i] or slices")
+        return key
+
+    def __getitem__(self, key):
+        ri, ci = self._split_key(key)
+        if not isinstance(ri, slice) and not isinstance(ci, slice):
+            i = self._normalize(ri, self.rows, 0)
+            j = self._normalize(ci, self.cols, 1)
+            return self._data[self._offset + i * self.strides[0] + j * self.strides[1]]
+
+        offset = self._offset
+        shape, strides = [], []
+        for axis, idx in enumerate((ri, ci)):
+            size, stride = self.shape[axis], self.strides[axis]
+            if isinstance(idx, slice):
+                start, stop, step = idx.indices(size)
+                offset += start * stride
+                shape.append(len(range(start, stop, step)))
+                strides.append(stride * step)
+            else:  # an integer keeps the axis with length 1 (stays 2D)
+                offset += self._normalize(idx, size, axis) * stride
+                shape.append(1)
+                strides.append(stride)
+        return self._view(offset, tuple(shape), tuple(strides))
+
+    def __setitem__(self, key, value):
+        target = self[key]
+        if not isinstance(target, Matrix):
+            ri, ci = self._split_key(key)
+            i = self._normalize(ri, self.rows, 0)
+            j = self._normalize(ci, self.cols, 1)
+            self._data[self._offset + i * self.strides[0] + j * self.strides[1]] = value
+            return
+        if isinstance(value, (int, float)):
+            target.fill(value)
+            return
+        source = value if isinstance(value, Matrix) else Matrix.from_rows(value, self.typecode)
+        if source.shape != target.shape:
+            raise ValueError(f"shape mismatch: {source.shape} into {target.shape}")
+        for i in range(target.rows):
+            target._set_row(i, source._row_values(i))
+
+    def _row_slice(self, i):
+        """A Python slice of the buffer for row i (every view is a regular grid)."""
+        if not self.cols:
+            return slice(0, 0)
+        start = self._offset + i * self.strides[0]
+        step = self.strides[1] or 1
+        stop = start + self.cols * step
+        return slice(start, stop if stop >= 0 else None, step)
+
+    def _row_values(self, i):
+        return self._data[self._row_slice(i)]
+
+    def _set_row(self, i, values):
+        self._data[self._row_slice(i)] = array.array(self.typecode, values)
+
+    def row(self, i):
+        """O(1) view of row i, shape (1, cols)."""
+        return self[i, :]
+
+    def col(self, j):
+        """O(1) view of column j, shape (rows, 1)."""
+        return self[:, j]
+
+    @property
+    def T(self):
+        """O(1) transposed view: same buffer, swapped shape and strides."""
+        return self._view(self._offset, self.shape[::-1], self.strides[::-1])
+
+    def transpose(self):
+        return self.T
+
+    # --------------------------------------------------------------------------
+    # Bulk operations
+    # --------------------------------------------------------------------------
+    def fill(self, value):
+        for i in range(self.rows):
+            self._set_row(i, array.array(self.typecode, [value]) * self.cols)
+
+    def copy(self):
+        """A new, contiguous matrix with the same values (this one DOES copy)."""
+        data = array.array(self.typecode)
+        for i in range(self.rows):
+            data.extend(self._row_values(i))
+        return Matrix(self.rows, self.cols, _data=data)
+
+    def tolist(self):
+        return [self._row_values(i).tolist() for i in range(self.rows)]
+
+    def __iter__(self):
+        """Iterate rows as lists of values (like the list-of-lists version)."""
+        for i in range(self.rows):
+            yield self._row_values(i).tolist()
+
+    def __eq__(self, other):
+        if isinstance(other, Matrix):
+            return self.shape == other.shape and all(
+                self._row_values(i) == other._row_values(i) for i in range(self.rows))
+        if isinstance(other, list):
+            return self.tolist() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        if self.rows * self.cols <= 36:
+            return f"Matrix({self.tolist()}, typecode={self.typecode!r})"
+        return f"Matrix(shape={self.shape}, typecode={self.typecode!r})"
+
+    # --------------------------------------------------------------------------
+    # Zero-copy export
+    # --------------------------------------------------------------------------
+    def __array__(self, dtype=None, copy=None):
+        """
+        Lets numpy.asarray(m) wrap the buffer (and any view's strides) without
+        copying. The array is built on np.frombuffer(), which holds a buffer
+        export on the array.array: while it is alive, resizing the underlying
+        array raises BufferError instead of leaving NumPy with freed memory.
+        """
+        import numpy as np
+        itemsize = self._data.itemsize
+        if self.rows * self.cols == 0:
+            arr = np.empty(self.shape, dtype=_typestr(self._data))
+        else:
+            raw = np.frombuffer(self._data, dtype=_typestr(self._data))
+            arr = np.ndarray(self.shape, dtype=raw.dtype, buffer=raw, offset=self._offset * itemsize,
+                             strides=tuple(s * itemsize for s in self.strides))
+        if dtype is not None:
+            arr = arr.astype(dtype, copy=False)
+        return arr.copy() if copy else arr
+
+    def memoryview(self):
+        """A 2D memoryview of the cells (contiguous matrices only)."""
+        if not self.is_contiguous():
+            raise ValueError("only contiguous matrices can be exported as a memoryview; "
+                             "use copy() or numpy.asarray()")
+        start = self._offset
+        flat = memoryview(self._data)[start:start + self.rows * self.cols]
+        return flat.cast("B").cast(self._data.typecode, self.shape)
+
+    def __buffer__(self, flags):  # PEP 688 (Python 3.12+): memoryview(m), bytes(m)...
+        return self.memoryview()
+
+
+def _typestr(data):
+    kind = "i" if data.typecode in _INT_TYPECODES and data.typecode.islower() else \
+        "u" if data.typecode in _INT_TYPECODES else "f"
+    endian = "<" if sys.byteorder == "little" else ">"
+    return f"{endian}{kind}{data.itemsize}"
+
+
+if __name__ == "__main__":
+    print("--- 1. Same matrices as the guides ---")
+    m = Matrix.from_rows([[1, 2, 3], [4, 5, 6]], typecode="q")
+    print(f"Matrix: {m.tolist()}")
+    print(f"Transposed (a view, no copy): {m.T.tolist()}")
+    print(f"Identity: {Matrix.identity(3, 'q').tolist()}")
+
+    print("\n--- 2. Views share the buffer ---")
+    col = m.col(1)
+    col[:, :] = [[20], [50]]
+    print(f"After writing through a column view: {m.tolist()}")
+    print(f"m.T.base is m.base? {m.T.base is m.base}")
+    print(f"Every other column of row 0: {m[0, ::2].tolist()}")
+
+    print("\n--- 3. Memory: lists of lists vs one buffer ---")
+    n = 1000
+    lists = [[float(i * n + j) for j in range(n)] for i in range(n)]
+    list_bytes = sys.getsizeof(lists) + sum(sys.getsizeof(r) + sum(sys.getsizeof(x) for x in r) for r in lists)
+    compact = Matrix.from_rows(lists)
+    print(f"List of lists: {list_bytes / 1e6:.1f} MB, Matrix: {compact.nbytes / 1e6:.1f} MB")
+
+    try:
+        import numpy as np
+        arr = np.asarray(compact.T)
+        arr[0, 1] = -1.0  # writes through to the Matrix
+        print(f"NumPy view of m.T is zero-copy: {compact[1, 0] == -1.0}, strides {arr.strides}")
+    except ImportError:
+        print("NumPy not installed; skipping the zero-copy demo")
@@ -0,0 +1,969 @@
+"""
+Guide: Measuring the Comprehension & Generator Claims
+comprehensions.py and list_comprehensions.py say comprehensions are "usually
+faster" than loops and generators are "memory efficient". This script measures
+it: every example is run as a comprehension, a plain for-loop, map()/filter()
+and (when NumPy is installed) a vectorized NumPy version, across several input
+sizes. Before anything is timed, every variant's result is checked against the
+first one (the guide's own form), so a fast but wrong variant (e.g. NumPy int64
+overflow) fails the run instead of being reported. Each variant then gets
+warmup runs, repeated timed runs with statistics, and a separate tracemalloc
+run for peak memory. The report is JSON, so results from
+different Python versions can be diffed.
+
+Usage:
+    python3 comprehension_benchmarks.py --sizes 1000 100000 --output bench.json
+"""
+
+import argparse
+import collections
+import gc
+import itertools
+import json
+import math
+import operator
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; its variants are simply skipped
+    np = None
+
+# ==============================================================================
+# 1. CASE REGISTRY
+# ==============================================================================
+# A case is a function taking the input size n and returning
+# {variant_name: zero-argument callable}. Building inputs happens in the case
+# function, so only the work itself is timed.
+
+CASES = {}
+
+
+def case(name, source):
+    """Register a benchmark case under `name`; `source` points at the guide example."""
+    def register(func):
+        CASES[name] = {"source": source, "build": func}
+        return func
+    return register
+
+
+def _words(n):
+    base = ["  apple ", "", "Cherry", " python  ", "", "Great"]
+    return [base[i % len(base)] for i in range(n)]
+
+
+def _text(n):
+    return ("python programming is fun and powerful " * (n // 40 + 1))[:n]
+
+
+# ------------------------------------------------------------------------------
+# List comprehensions (comprehensions.py E1-E9, list_comprehensions.py A-C)
+# ------------------------------------------------------------------------------
+
+@case("list_squares", "comprehensions.py List E1")
+def _list_squares(n):
+    def loop():
+        out = []
+        for x in range(n):
+            out.append(x**2)
+        return out
+    variants = {
+        "comprehension": lambda: [x**2 for x in range(n)],
+        "loop": loop,
+        "map": lambda: list(map(lambda x: x**2, range(n))),
+    }
+    if np:
+        variants["numpy"] = lambda: np.arange(n, dtype=np.int64) ** 2
+    return variants
+
+
+@case("list_evens", "comprehensions.py List E2")
+def _list_evens(n):
+    def loop():
+        out = []
+        for x in range(n):
+            if x % 2 == 0:
+                out.append(x)
+        return out
+    variants = {
+        "comprehension": lambda: [x for x in range(n) if x % 2 == 0],
+        "loop": loop,
+        "filter": lambda: list(filter(lambda x: x % 2 == 0, range(n))),
+    }
+    if np:
+        def vectorized():
+            a = np.arange(n)
+            return a[a % 2 == 0]
+        variants["numpy"] = vectorized
+    return variants
+
+
+@case("list_upper", "comprehensions.py List E3")
+def _list_upper(n):
+    words = _words(n)
+
+    def loop():
+        out = []
+        for w in words:
+            out.append(w.upper())
+        return out
+    return {
+        "comprehension": lambda: [w.upper() for w in words],
+        "loop": loop,
+        "map": lambda: list(map(str.upper, words)),
+    }
+
+
+@case("list_if_else", "comprehensions.py List E4")
+def _list_if_else(n):
+    def loop():
+        out = []
+        for x in range(n):
+            out.append("Even" if x % 2 == 0 else "Odd")
+        return out
+    variants = {
+        "comprehension": lambda: ["Even" if x % 2 == 0 else "Odd" for x in range(n)],
+        "loop": loop,
+        "map": lambda: list(map(lambda x: "Even" if x % 2 == 0 else "Odd", range(n))),
+    }
+    if np:
+        variants["numpy"] = lambda: np.where(np.arange(n) % 2 == 0, "Even", "Odd")
+    return variants
+
+
+@case("list_flatten", "comprehensions.py List E5")
+def _list_flatten(n):
+    rows = [[i, i + 1] for i in range(0, n, 2)]
+
+    def loop():
+        out = []
+        for row in rows:
+            for x in row:
+                out.append(x)
+        return out
+    variants = {
+        "comprehension": lambda: [x for row in rows for x in row],
+        "loop": loop,
+        "chain": lambda: list(itertools.chain.from_iterable(rows)),
+    }
+    if np:
+        arr = np.array(rows)
+        variants["numpy"] = lambda: arr.ravel().copy()
+    return variants
+
+
+@case("list_initials", "comprehensions.py List E6")
+def _list_initials(n):
+    words = [w or "x" for w in _words(n)]
+
+    def loop():
+        out = []
+        for w in words:
+            out.append(w[0])
+        return out
+    return {
+        "comprehension": lambda: [w[0] for w in words],
+        "loop": loop,
+        "map": lambda: list(map(operator.itemgetter(0), words)),
+    }
+
+
+@case("list_pairs", "comprehensions.py List E7")
+def _list_pairs(n):
+    side = max(1, int(math.isqrt(n)))
+
+    def loop():
+        out = []
+        for x in range(side):
+            for y in range(side):
+                out.append((x, y))
+        return out
+    return {
+        "comprehension": lambda: [(x, y) for x in range(side) for y in range(side)],
+        "loop": loop,
+        "product": lambda: list(itertools.product(range(side), range(side))),
+    }
+
+
+@case("list_cleaned", "comprehensions.py List E8")
+def _list_cleaned(n):
+    words = _words(n)
+
+    def loop():
+        out = []
+        for s in words:
+            if s.strip():
+                out.append(s.strip())
+        return out
+    return {
+        "comprehension": lambda: [s.strip() for s in words if s.strip()],
+        "comprehension_walrus": lambda: [t for s in words if (t := s.strip())],
+        "loop": loop,
+        "map_filter": lambda: list(filter(None, map(str.strip, words))),
+    }
+
+
+@case("list_identity", "comprehensions.py List E9")
+def _list_identity(n):
+    side = max(1, int(math.isqrt(n)))
+
+    def loop():
+        out = []
+        for i in range(side):
+            row = []
+            for j in range(side):
+                row.append(1 if i == j else 0)
+            out.append(row)
+        return out
+    variants = {
+        "comprehension": lambda: [[1 if i == j else 0 for j in range(side)] for i in range(side)],
+        "loop": loop,
+        "map": lambda: list(map(lambda i: list(map(lambda j: 1 if i == j else 0, range(side))), range(side))),
+    }
+    if np:
+        variants["numpy"] = lambda: np.eye(side, dtype=np.int64)
+    return variants
+
+
+@case("list_div_by_6", "list_comprehensions.py 1.A")
+def _list_div_by_6(n):
+    def loop():
+        out = []
+        for x in range(n):
+            if x % 2 == 0:
+                if x % 3 == 0:
+                    out.append(x)
+        return out
+    variants = {
+        "comprehension": lambda: [x for x in range(n) if x % 2 == 0 if x % 3 == 0],
+        "loop": loop,
+        "filter": lambda: list(filter(lambda x: x % 2 == 0 and x % 3 == 0, range(n))),
+        "range_step": lambda: list(range(0, n, 6)),
+    }
+    if np:
+        def vectorized():
+            a = np.arange(n)
+            return a[(a % 2 == 0) & (a % 3 == 0)]
+        variants["numpy"] = vectorized
+    return variants
+
+
+@case("list_transpose", "list_comprehensions.py 1.C")
+def _list_transpose(n):
+    cols = max(1, int(math.isqrt(n)))
+    matrix = [[r * cols + c for c in range(cols)] for r in range(cols)]
+
+    def loop():
+        out = []
+        for i in range(cols):
+            row = []
+            for r in matrix:
+                row.append(r[i])
+            out.append(row)
+        return out
+    variants = {
+        "comprehension": lambda: [[row[i] for row in matrix] for i in range(cols)],
+        "loop": loop,
+        "zip": lambda: list(map(list, zip(*matrix))),
+    }
+    if np:
+        arr = np.array(matrix)
+        variants["numpy"] = lambda: arr.T.copy()
+    return variants
+
+
+# ------------------------------------------------------------------------------
+# Set comprehensions
+# ------------------------------------------------------------------------------
+
+@case("set_unique_chars", "comprehensions.py Set E1")
+def _set_unique_chars(n):
+    text = _text(n)
+
+    def loop():
+        out = set()
+        for c in text:
+            out.add(c)
+        return out
+    variants = {
+        "comprehension": lambda: {c for c in text},
+        "loop": loop,
+        "builtin": lambda: set(text),
+    }
+    if np:
+        raw = np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+        variants["numpy"] = lambda: set(map(chr, np.unique(raw).tolist()))
+    return variants
+
+
+@case("set_word_lengths", "comprehensions.py Set E2")
+def _set_word_lengths(n):
+    words = [_words(7)[i % 7] * (i % 5 + 1) for i in range(n)]
+
+    def loop():
+        out = set()
+        for w in words:
+            out.add(len(w))
+        return out
+    return {
+        "comprehension": lambda: {len(w) for w in words},
+        "loop": loop,
+        "map": lambda: set(map(len, words)),
+    }
+
+
+@case("set_vowels", "comprehensions.py Set E3 / list_comprehensions.py 2.A")
+def _set_vowels(n):
+    sentence = _text(n)
+
+    def loop():
+        out = set()
+        for c in sentence:
+            if c in "aeiou":
+                out.add(c)
+        return out
+    return {
+        "comprehension": lambda: {c for c in sentence if c in "aeiou"},
+        "loop": loop,
+        "filter": lambda: set(filter(lambda c: c in "aeiou", sentence)),
+        "set_ops": lambda: set(sentence) & set("aeiou"),
+    }
+
+
+@case("set_lowercase", "comprehensions.py Set E4")
+def _set_lowercase(n):
+    words = [("Python", "PYTHON", "python", "Data")[i % 4] + str(i % 50) for i in range(n)]
+
+    def loop():
+        out = set()
+        for w in words:
+            out.add(w.lower())
+        return out
+    return {
+        "comprehension": lambda: {w.lower() for w in words},
+        "loop": loop,
+        "map": lambda: set(map(str.lower, words)),
+    }
+
+
+@case("set_div57", "comprehensions.py Set E6")
+def _set_div57(n):
+    def loop():
+        out = set()
+        for x in range(n):
+            if x % 5 == 0 or x % 7 == 0:
+                out.add(x)
+        return out
+    variants = {
+        "comprehension": lambda: {x for x in range(n) if x % 5 == 0 or x % 7 == 0},
+        "loop": loop,
+        "filter": lambda: set(filter(lambda x: x % 5 == 0 or x % 7 == 0, range(n))),
+        "range_union": lambda: set(range(0, n, 5)) | set(range(0, n, 7)),
+    }
+    if np:
+        def vectorized():
+            a = np.arange(n)
+            return a[(a % 5 == 0) | (a % 7 == 0)]
+        variants["numpy"] = vectorized
+    return variants
+
+
+@case("set_non_digits", "comprehensions.py Set E7")
+def _set_non_digits(n):
+    text = ("Room 101, floor 3 " * (n // 18 + 1))[:n]
+
+    def loop():
+        out = set()
+        for c in text:
+            if not c.isdigit():
+                out.add(c)
+        return out
+    return {
+        "comprehension": lambda: {c for c in text if not c.isdigit()},
+        "loop": loop,
+        "filter": lambda: set(itertools.filterfalse(str.isdigit, text)),
+        "set_ops": lambda: set(text) - set("0123456789"),
+    }
+
+
+@case("set_coprime_10", "comprehensions.py Set E8")
+def _set_coprime_10(n):
+    def loop():
+        out = set()
+        for x in range(n):
+            if x % 2 != 0 and x % 5 != 0:
+                out.add(x)
+        return out
+    variants = {
+        "comprehension": lambda: {x for x in range(n) if x % 2 != 0 and x % 5 != 0},
+        "loop": loop,
+        "filter": lambda: set(filter(lambda x: x % 2 != 0 and x % 5 != 0, range(n))),
+    }
+    if np:
+        def vectorized():
+            a = np.arange(n)
+            return a[(a % 2 != 0) & (a % 5 != 0)]
+        variants["numpy"] = vectorized
+    return variants
+
+
+@case("set_points", "comprehensions.py Set E9")
+def _set_points(n):
+    def loop():
+        out = set()
+        for x in range(n):
+            out.add((x, x * 2))
+        return out
+    return {
+        "comprehension": lambda: {(x, x * 2) for x in range(n)},
+        "loop": loop,
+        "zip": lambda: set(zip(range(n), range(0, 2 * n, 2))),
+    }
+
+
+@case("set_roots", "comprehensions.py Set E5 / list_comprehensions.py 2.B")
+def _set_roots(n):
+    nums = [(i % 1000) ** 2 for i in range(n)]
+
+    def loop():
+        out = set()
+        for x in nums:
+            out.add(int(math.sqrt(x)))
+        return out
+    variants = {
+        "comprehension": lambda: {int(math.sqrt(x)) for x in nums},
+        "loop": loop,
+        "map": lambda: set(map(math.isqrt, nums)),
+    }
+    if np:
+        arr = np.array(nums)
+        variants["numpy"] = lambda: np.unique(np.sqrt(arr).astype(np.int64))
+    return variants
+
+
+# ------------------------------------------------------------------------------
+# Dictionary comprehensions
+# ------------------------------------------------------------------------------
+
+@case("dict_squares", "comprehensions.py Dict E1 / list_comprehensions.py 3.A")
+def _dict_squares(n):
+    def loop():
+        out = {}
+        for x in range(n):
+            out[x] = x**2
+        return out
+    return {
+        "comprehension": lambda: {x: x**2 for x in range(n)},
+        "loop": loop,
+        "map_zip": lambda: dict(zip(range(n), map(lambda x: x**2, range(n)))),
+    }
+
+
+@case("dict_char_freq", "comprehensions.py Dict E2 / list_comprehensions.py 3.C")
+def _dict_char_freq(n):
+    text = _text(n)
+
+    def loop():
+        out = {}
+        for c in text:
+            out[c] = out.get(c, 0) + 1
+        return out
+    variants = {
+        "comprehension": lambda: {c: text.count(c) for c in set(text)},
+        "loop": loop,
+        "counter": lambda: collections.Counter(text),
+    }
+    if np:
+        def vectorized():
+            counts = np.bincount(np.frombuffer(text.encode("ascii"), dtype=np.uint8))
+            return {chr(i): int(counts[i]) for i in np.flatnonzero(counts)}
+        variants["numpy"] = vectorized
+    return variants
+
+
+@case("dict_filter", "comprehensions.py Dict E4 / list_comprehensions.py 3.B")
+def _dict_filter(n):
+    stock = {f"item{i}": i % 10 for i in range(n)}
+
+    def loop():
+        out = {}
+        for k, v in stock.items():
+            if v > 3:
+                out[k] = v
+        return out
+    return {
+        "comprehension": lambda: {k: v for k, v in stock.items() if v > 3},
+        "loop": loop,
+        "filter": lambda: dict(filter(lambda kv: kv[1] > 3, stock.items())),
+    }
+
+
+@case("dict_invert", "comprehensions.py Dict E3")
+def _dict_invert(n):
+    prices = {f"k{i}": i for i in range(n)}
+
+    def loop():
+        out = {}
+        for k, v in prices.items():
+            out[v] = k
+        return out
+    return {
+        "comprehension": lambda: {v: k for k, v in prices.items()},
+        "loop": loop,
+        "zip": lambda: dict(zip(prices.values(), prices.keys())),
+    }
+
+
+@case("dict_word_lengths", "comprehensions.py Dict E5")
+def _dict_word_lengths(n):
+    words = [f"word{i}" for i in range(n)]
+
+    def loop():
+        out = {}
+        for w in words:
+            out[w] = len(w)
+        return out
+    return {
+        "comprehension": lambda: {w: len(w) for w in words},
+        "loop": loop,
+        "zip_map": lambda: dict(zip(words, map(len, words))),
+    }
+
+
+@case("dict_fill_missing", "comprehensions.py Dict E6")
+def _dict_fill_missing(n):
+    raw = {f"k{i}": None if i % 3 == 0 else i for i in range(n)}
+
+    def loop():
+        out = {}
+        for k, v in raw.items():
+            out[k] = v if v else 0
+        return out
+    return {
+        "comprehension": lambda: {k: (v if v else 0) for k, v in raw.items()},
+        "loop": loop,
+        "zip_map": lambda: dict(zip(raw, map(lambda v: v if v else 0, raw.values()))),
+    }
+
+
+@case("dict_unicode", "comprehensions.py Dict E7")
+def _dict_unicode(n):
+    text = _text(n)
+
+    def loop():
+        out = {}
+        for c in text:
+            out[c] = ord(c)
+        return out
+    return {
+        "comprehension": lambda: {c: ord(c) for c in text},
+        "comprehension_dedup": lambda: {c: ord(c) for c in set(text)},
+        "loop": loop,
+        "zip_map": lambda: dict(zip(text, map(ord, text))),
+    }
+
+
+@case("dict_even_squares", "comprehensions.py Dict E8")
+def _dict_even_squares(n):
+    def loop():
+        out = {}
+        for x in range(n):
+            if x % 2 == 0:
+                out[x] = x**2
+        return out
+    return {
+        "comprehension": lambda: {x: x**2 for x in range(n) if x % 2 == 0},
+        "loop": loop,
+        "range_step": lambda: {x: x**2 for x in range(0, n, 2)},
+        "map_zip": lambda: dict(zip(range(0, n, 2), map(lambda x: x**2, range(0, n, 2)))),
+    }
+
+
+@case("dict_merge_lists", "comprehensions.py Dict E9")
+def _dict_merge_lists(n):
+    keys, vals = [f"key{i}" for i in range(n)], list(range(n))
+
+    def loop():
+        out = {}
+        for i in range(len(keys)):
+            out[keys[i]] = vals[i]
+        return out
+    return {
+        "comprehension": lambda: {keys[i]: vals[i] for i in range(len(keys))},
+        "loop": loop,
+        "zip": lambda: dict(zip(keys, vals)),
+    }
+
+
+# ------------------------------------------------------------------------------
+# Generator expressions
+# ------------------------------------------------------------------------------
+
+@case("gen_sum", "comprehensions.py Generator E1")
+def _gen_sum(n):
+    def loop():
+        total = 0
+        for x in range(n):
+            total += x
+        return total
+    variants = {
+        "generator": lambda: sum(x for x in range(n)),
+        "list_comprehension": lambda: sum([x for x in range(n)]),
+        "loop": loop,
+        "builtin": lambda: sum(range(n)),
+    }
+    if np:
+        variants["numpy"] = lambda: int(np.arange(n, dtype=np.int64).sum())
+    return variants
+
+
+@case("gen_sum_squares", "list_comprehensions.py 4.A (sum_squares)")
+def _gen_sum_squares(n):
+    def loop():
+        total = 0
+        for x in range(n):
+            total += x**2
+        return total
+    variants = {
+        "generator": lambda: sum(x**2 for x in range(n)),
+        "list_comprehension": lambda: sum([x**2 for x in range(n)]),
+        "loop": loop,
+        "map": lambda: sum(map(lambda x: x**2, range(n))),
+    }
+    if np and (n - 1) * n * (2 * n - 1) // 6 < 2**63:  # beyond this the int64 sum wraps around
+        variants["numpy"] = lambda: int((np.arange(n, dtype=np.int64) ** 2).sum())
+    return variants
+
+
+@case("gen_factorials", "comprehensions.py Generator E2")
+def _gen_factorials(n):
+    def loop():
+        total = 0
+        for x in range(n):
+            total += math.factorial(x % 20)
+        return total
+    return {
+        "generator": lambda: sum(math.factorial(x % 20) for x in range(n)),
+        "list_comprehension": lambda: sum([math.factorial(x % 20) for x in range(n)]),
+        "loop": loop,
+        "map": lambda: sum(map(math.factorial, map((20).__rmod__, range(n)))),
+    }
+
+
+@case("gen_strip_lines", "comprehensions.py Generator E3")
+def _gen_strip_lines(n):
+    lines = [f"line {i}\n" for i in range(n)]
+
+    def loop():
+        out = []
+        for line in lines:
+            out.append(line.strip())
+        return out
+    return {
+        "generator": lambda: list(line.strip() for line in lines),
+        "list_comprehension": lambda: [line.strip() for line in lines],
+        "loop": loop,
+        "map": lambda: list(map(str.strip, lines)),
+    }
+
+
+@case("gen_format", "comprehensions.py Generator E5")
+def _gen_format(n):
+    def loop():
+        out = []
+        for i in range(n):
+            out.append(f"Item {i}")
+        return out
+    return {
+        "generator": lambda: list(f"Item {i}" for i in range(n)),
+        "list_comprehension": lambda: [f"Item {i}" for i in range(n)],
+        "loop": loop,
+        "map": lambda: list(map("Item {}".format, range(n))),
+    }
+
+
+@case("gen_reverse", "comprehensions.py Generator E6")
+def _gen_reverse(n):
+    text = _text(n)
+
+    def loop():
+        out = ""
+        for c in reversed(text):
+            out += c
+        return out
+    return {
+        "generator": lambda: "".join(c for c in reversed(text)),
+        "list_comprehension": lambda: "".join([c for c in reversed(text)]),
+        "loop": loop,
+        "join_reversed": lambda: "".join(reversed(text)),
+        "slice": lambda: text[::-1],
+    }
+
+
+@case("gen_lazy_evens", "comprehensions.py Generator E7")
+def _gen_lazy_evens(n):
+    # The first n values of the guide's range(10**10) filter: only a lazy form
+    # can do this, so there is no list-comprehension variant.
+    def loop():
+        out = []
+        for x in range(10**10):
+            if len(out) == n:  # checked first, so n=0 stops at once
+                break
+            if x % 2 == 0:
+                out.append(x)
+        return out
+    return {
+        "generator": lambda: list(itertools.islice((x for x in range(10**10) if x % 2 == 0), n)),
+        "loop": loop,
+        "filter": lambda: list(itertools.islice(filter(lambda x: x % 2 == 0, range(10**10)), n)),
+        "range_step": lambda: list(range(0, 2 * n, 2)),
+    }
+
+
+@case("gen_any", "comprehensions.py Generator E4")
+def _gen_any(n):
+    text = "pythn" * (n // 5 + 1)
+
+    def loop():
+        for c in text:
+            if c in "aeiou":
+                return True
+        return False
+    return {
+        "generator": lambda: any(c in "aeiou" for c in text),
+        "list_comprehension": lambda: any([c in "aeiou" for c in text]),
+        "loop": loop,
+        "map": lambda: any(map("aeiou".__contains__, text)),
+    }
+
+
+@case("gen_min_squares", "comprehensions.py Generator E8")
+def _gen_min_squares(n):
+    half = max(1, n // 2)  # min() of an empty range raises
+
+    def loop():
+        best = None
+        for x in range(-half, half):
+            sq = x**2
+            if best is None or sq < best:
+                best = sq
+        return best
+    variants = {
+        "generator": lambda: min(x**2 for x in range(-half, half)),
+        "list_comprehension": lambda: min([x**2 for x in range(-half, half)]),
+        "loop": loop,
+        "map": lambda: min(map(lambda x: x**2, range(-half, half))),
+    }
+    if np:
+        variants["numpy"] = lambda: int((np.arange(-half, half, dtype=np.int64) ** 2).min())
+    return variants
+
+
+@case("gen_chained", "comprehensions.py Generator E9")
+def _gen_chained(n):
+    def loop():
+        total = 0
+        for x in range(n):
+            total += x * 2
+        return total
+    return {
+        "generator": lambda: sum(x * 2 for x in (m for m in range(n))),
+        "list_comprehension": lambda: sum([x * 2 for x in [m for m in range(n)]]),
+        "loop": loop,
+        "map": lambda: sum(map(lambda x: x * 2, range(n))),
+    }
+
+
+@case("list_vs_generator", "list_comprehensions.py 4.C (getsizeof comparison)")
+def _list_vs_generator(n):
+    # The guide compares getsizeof() of the containers; here we time building
+    # and consuming them, and tracemalloc reports the real peak memory.
+    return {
+        "list_comprehension": lambda: max([x for x in range(n)], default=None),
+        "generator": lambda: max((x for x in range(n)), default=None),
+    }
+
+
+# ==============================================================================
+# 2. RESULT CHECKS
+# ==============================================================================
+
+def _plain(value):
+    """NumPy results as Python objects, so they compare with the pure-Python ones."""
+    if np is not None:
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        if isinstance(value, np.generic):
+            return value.item()
+    return value
+
+
+def check_variants(name, n, variants):
+    """
+    Run each variant once and compare it with the first (reference) variant.
+    Array results of set cases are compared as sets. Raises AssertionError on
+    a mismatch, even under python -O.
+    """
+    (ref_name, ref_func), *others = variants.items()
+    reference = _plain(ref_func())
+    for variant, func in others:
+        result = _plain(func())
+        if isinstance(reference, (set, frozenset)) and isinstance(result, list):
+            result = set(result)
+        if result != reference:
+            raise AssertionError(f"{name} (n={n:,}): variant {variant!r} does not return "
+                                 f"the same result as {ref_name!r}")
+
+
+# ==============================================================================
+# 3. MEASUREMENT
+# ==============================================================================
+
+def time_callable(func, warmup=1, repeat=5, min_time=0.05):
+    """
+    Time `func` and return per-call statistics in seconds.
+    Each sample loops the call enough times to last about `min_time`, which
+    keeps timer resolution from dominating fast variants.
+    """
+    for _ in range(warmup):
+        func()
+
+    # Calibrate the number of calls per sample
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()  # same policy as timeit: keep collector pauses out of samples
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(loops):
+                func()
+            samples.append((time.perf_counter() - start) / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return {
+        "loops": loops,
+        "repeat": repeat,
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "max": max(samples),
+    }
+
+
+def peak_memory(func):
+    """Peak bytes allocated while running `func` once, measured with tracemalloc."""
+    gc.collect()
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    try:
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        del result
+    finally:
+        if not already_tracing:
+            tracemalloc.stop()
+    return peak - base
+
+
+def run_benchmarks(sizes, names=None, warmup=1, repeat=5, min_time=0.05):
+    """Run the selected cases at every size and return the JSON-ready report."""
+    selected = names or list(CASES)
+    unknown = [name for name in selected if name not in CASES]
+    if unknown:
+        raise KeyError(f"Unknown benchmark case(s): {', '.join(unknown)}")
+
+    results = []
+    for name in selected:
+        entry = CASES[name]
+        for n in sizes:
+            variants = entry["build"](n)
+            check_variants(name, n, variants)
+            for variant, func in variants.items():
+                timing = time_callable(func, warmup, repeat, min_time)
+                results.append({
+                    "case": name,
+                    "source": entry["source"],
+                    "variant": variant,
+                    "n": n,
+                    "time": timing,
+                    "peak_bytes": peak_memory(func),
+                })
+    return {
+        "meta": {
+            "python": sys.version,
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "numpy": np.__version__ if np else None,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "warmup": warmup,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def print_summary(report):
+    """Human-readable table: median time and peak memory, fastest variant first."""
+    rows = {}
+    for r in report["results"]:
+        rows.setdefault((r["case"], r["n"]), []).append(r)
+    for (name, n), group in rows.items():
+        print(f"\n{name} (n={n:,})")
+        group.sort(key=lambda r: r["time"]["median"])
+        fastest = group[0]["time"]["median"]
+        for r in group:
+            median = r["time"]["median"]
+            print(f"  {r['variant']:<22} {median * 1e6:>12.1f} us  "
+                  f"x{median / fastest:>5.2f}  peak {r['peak_bytes']:>12,} B")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--cases", nargs="+", help="subset of cases to run (default: all)")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05,
+                        help="minimum seconds per timed sample")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, entry in CASES.items():
+            print(f"{name:<20} {entry['source']}")
+        return
+
+    report = run_benchmarks(args.sizes, args.cases, args.warmup, args.repeat, args.min_time)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print_summary(report)
+        print(f"\nJSON report written to {args.output}")
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Guide: Deep Memory Measurement
+The "List vs Generator" section of list_comprehensions.py uses sys.getsizeof,
+which only measures the container itself: a list of 10,000 big strings and a
+list of 10,000 small ints look the same size. This module follows references:
+
+- deep_sizeof(obj): total bytes of obj and everything reachable from it.
+- memory_report(*roots): per-type totals, plus how many bytes each root owns
+  exclusively and how many are shared between roots.
+- allocated(): a tracemalloc context manager reporting what a block allocated.
+
+The walk is iterative (an explicit stack, so no RecursionError on deep or huge
+graphs) and tracks visited objects by id(), like the GraphNode example in
+reflection_introspection_guide.py, so shared and cyclic objects are counted once.
+Classes, modules, functions and singletons such as None are not counted: they
+belong to the program, not to the data.
+"""
+
+import gc
+import sys
+import tracemalloc
+import types
+from contextlib import contextmanager
+
+_SKIP_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+               types.MethodType, types.CodeType, types.FrameType)
+_SINGLETONS = {id(None), id(True), id(False), id(Ellipsis), id(NotImplemented)}
+_SHARED = -1
+
+
+def _should_skip(obj):
+    return id(obj) in _SINGLETONS or isinstance(obj, _SKIP_TYPES)
+
+
+def _walk(roots, owner, sizes, ignore):
+    """
+    Visit everything reachable from each root. `owner` maps id -> index of the
+    only root reaching it, or _SHARED. Once an object is shared, so is
+    everything below it, so shared subgraphs are not walked again.
+    """
+    getsizeof = sys.getsizeof
+    get_referents = gc.get_referents
+    for index, root in enumerate(roots):
+        stack = [root]
+        while stack:
+            obj = stack.pop()
+            key = id(obj)
+            if key in ignore:
+                continue
+            current = owner.get(key)
+            if current == index or current == _SHARED:
+                continue
+            if current is None:
+                if _should_skip(obj):
+                    ignore.add(key)
+                    continue
+                sizes[key] = (getsizeof(obj), type(obj))
+                owner[key] = index
+            else:
+                owner[key] = _SHARED
+            stack.extend(get_referents(obj))
+
+
+def deep_sizeof(obj, ignore=()):
+    """Bytes used by obj and every object reachable from it (each counted once)."""
+    owner, sizes = {}, {}
+    _walk([obj], owner, sizes, {id(o) for o in ignore})
+    return sum(size for size, _ in sizes.values())
+
+
+class SizeReport:
+    """Result of memory_report(): totals, per-type breakdown and sharing."""
+
+    def __init__(self, owner, sizes, root_count):
+        self.total_bytes = 0
+        self.object_count = len(sizes)
+        self.by_type = {}  # type name -> [count, bytes]
+        self.exclusive_bytes = [0] * root_count
+        self.shared_bytes = 0
+        for key, (size, tp) in sizes.items():
+            self.total_bytes += size
+            entry = self.by_type.setdefault(tp.__qualname__, [0, 0])
+            entry[0] += 1
+            entry[1] += size
+            who = owner[key]
+            if who == _SHARED:
+                self.shared_bytes += size
+            else:
+                self.exclusive_bytes[who] += size
+
+    def top_types(self, n=10):
+        """The n types using the most bytes: [(name, count, bytes), ...]."""
+        ranked = sorted(self.by_type.items(), key=lambda item: item[1][1], reverse=True)
+        return [(name, count, size) for name, (count, size) in ranked[:n]]
+
+    def format(self, n=10):
+        lines = [f"{self.object_count:,} objects, {self.total_bytes:,} bytes "
+                 f"({self.shared_bytes:,} shared between roots)"]
+        for i, size in enumerate(self.exclusive_bytes):
+            lines.append(f"  root {i}: {size:,} bytes exclusive")
+        lines.append(f"  {'type':<24}{'count':>12}{'bytes':>16}")
+        for name, count, size in self.top_types(n):
+            lines.append(f"  {name:<24}{count:>12,}{size:>16,}")
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return (f"SizeReport(total_bytes={self.total_bytes}, objects={self.object_count}, "
+                f"shared_bytes={self.shared_bytes})")
+
+
+def memory_report(*roots, ignore=()):
+    """Deep-size one or more roots at once, with per-type and sharing breakdowns."""
+    owner, sizes = {}, {}
+    _walk(roots, owner, sizes, {id(o) for o in ignore})
+    return SizeReport(owner, sizes, len(roots))
+
+
+# ==============================================================================
+# "ALLOCATED DURING THIS BLOCK" (tracemalloc)
+# ==============================================================================
+
+class Allocation:
+    """Filled in when the `with allocated()` block exits."""
+    net_bytes = 0   # still allocated at the end of the block
+    peak_bytes = 0  # highest point reached inside the block
+    top = ()        # [(location, size_bytes, count)] when top_n > 0
+
+    def __repr__(self):
+        return f"Allocation(net_bytes={self.net_bytes}, peak_bytes={self.peak_bytes})"
+
+
+@contextmanager
+def allocated(top_n=0, frames=1):
+    """
+    Measure memory allocated inside a block:
+
+        with allocated() as alloc:
+            cache = build_cache()
+        print(alloc.net_bytes, alloc.peak_bytes)
+
+    Uses tracemalloc, so it sees C-level allocations (array buffers, NumPy
+    data...) that a reference walk cannot. If tracemalloc is already running
+    it is left running; note that reset_peak() then affects the outer user.
+    """
+    result = Allocation()
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start(frames)
+    before_snapshot = tracemalloc.take_snapshot() if top_n else None
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    try:
+        yield result
+    finally:
+        current, peak = tracemalloc.get_traced_memory()
+        result.net_bytes = current - before
+        result.peak_bytes = peak - before
+        if top_n:
+            stats = tracemalloc.take_snapshot().compare_to(before_snapshot, "lineno")
+            result.top = [(str(s.traceback), s.size_diff, s.count_diff) for s in stats[:top_n]]
+        if started_here:
+            tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    print("--- 1. getsizeof vs deep_sizeof (the List vs Generator section) ---")
+    list_comp = [x for x in range(10000)]
+    gen_exp = (x for x in range(10000))
+    print(f"List: getsizeof {sys.getsizeof(list_comp):,} B, deep {deep_sizeof(list_comp):,} B")
+    print(f"Generator: getsizeof {sys.getsizeof(gen_exp):,} B, deep {deep_sizeof(gen_exp):,} B")
+
+    print("\n--- 2. Same shallow size, very different real size ---")
+    small = [0] * 1000
+    big = ["x" * 1000 + str(i) for i in range(1000)]
+    print(f"getsizeof: {sys.getsizeof(small):,} vs {sys.getsizeof(big):,}")
+    print(f"deep_sizeof: {deep_sizeof(small):,} vs {deep_sizeof(big):,}")
+
+    print("\n--- 3. Shared objects between two caches ---")
+    records = [{"id": i, "tags": ["a", "b"]} for i in range(1000)]
+    cache_a = {r["id"]: r for r in records}
+    cache_b = {r["id"]: r for r in records[:500]}
+    print(memory_report(cache_a, cache_b).format(n=5))
+
+    print("\n--- 4. No recursion limit: a 1,000,000-deep linked list ---")
+    head = None
+    for i in range(1_000_000):
+        head = (i, head)
+    print(f"deep_sizeof: {deep_sizeof(head):,} B")
+
+    print("\n--- 5. What did this block allocate? ---")
+    with allocated() as alloc:
+        table = {i: str(i) for i in range(100_000)}
+    print(alloc)
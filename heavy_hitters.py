@@ -0,0 +1,427 @@
+"""
+Guide: Heavy Hitters (top-k counting at stream scale)
+collections_guide.py and comprehensions.py count with Counter / defaultdict(int).
+Two problems at scale:
+  1. counter.most_common(k) sorts every distinct key on each call.
+  2. Every distinct key is kept forever.
+
+This module offers three counters with a Counter-like API (add, update,
+[key], most_common):
+
+- TopKCounter(k):       exact counts, plus an incrementally maintained top-k
+                        (a min-heap with a key -> position index). Updating a
+                        key is O(log k); most_common(k) reads k entries.
+- SpaceSaving(capacity): bounded memory (capacity keys). Every estimate is
+                        between the true count and true count + N / capacity
+                        (N = total added), and any key with a true count above
+                        N / capacity is guaranteed to be tracked.
+- CountMinSketch(...):  bounded memory (width * depth integers), optionally
+                        tracking the top-k keys. Estimates never undercount;
+                        with probability 1 - delta they overcount by at most
+                        epsilon * N.
+
+SpaceSaving and CountMinSketch summaries can be merged (per-shard counting).
+"""
+
+import array
+import heapq
+import math
+import random
+from typing import Hashable, Iterable, Mapping, Union
+
+_MERSENNE_61 = (1 << 61) - 1
+
+
+# ==============================================================================
+# 1. INDEXED MIN-HEAP (the shared building block)
+# ==============================================================================
+
+class _IndexedMinHeap:
+    """Min-heap of [count, key] entries with O(1) lookup of a key's position."""
+    __slots__ = ("entries", "pos")
+
+    def __init__(self):
+        self.entries = []
+        self.pos = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.pos
+
+    def count(self, key):
+        return self.entries[self.pos[key]][0]
+
+    def min_count(self):
+        return self.entries[0][0]
+
+    def push(self, key, count):
+        self.entries.append([count, key])
+        self.pos[key] = len(self.entries) - 1
+        self._sift_up(len(self.entries) - 1)
+
+    def set(self, key, count):
+        i = self.pos[key]
+        old = self.entries[i][0]
+        self.entries[i][0] = count
+        if count > old:
+            self._sift_down(i)
+        else:
+            self._sift_up(i)
+
+    def replace_min(self, key, count):
+        """Evict the smallest entry, insert (key, count); returns the evicted (count, key)."""
+        old_count, old_key = self.entries[0]
+        del self.pos[old_key]
+        self.entries[0] = [count, key]
+        self.pos[key] = 0
+        self._sift_down(0)
+        return old_count, old_key
+
+    def largest(self, n):
+        return heapq.nlargest(n, self.entries, key=lambda entry: entry[0])
+
+    def _swap(self, i, j):
+        e = self.entries
+        e[i], e[j] = e[j], e[i]
+        self.pos[e[i][1]] = i
+        self.pos[e[j][1]] = j
+
+    def _sift_up(self, i):
+        e = self.entries
+        while i:
+            parent = (i - 1) >> 1
+            if e[i][0] < e[parent][0]:
+                self._swap(i, parent)
+                i = parent
+            else:
+                break
+
+    def _sift_down(self, i):
+        e = self.entries
+        n = len(e)
+        while True:
+            smallest = i
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < n and e[child][0] < e[smallest][0]:
+                    smallest = child
+            if smallest == i:
+                return
+            self._swap(i, smallest)
+            i = smallest
+
+
+def _pairs(data: Union[Iterable[Hashable], Mapping]):
+    """(key, increment) pairs from an iterable of keys or a key -> count mapping."""
+    if isinstance(data, Mapping):
+        return data.items()
+    return ((key, 1) for key in data)
+
+
+# ==============================================================================
+# 2. EXACT COUNTS, INCREMENTAL TOP-K
+# ==============================================================================
+
+class TopKCounter:
+    """
+    Exact counter that keeps its k most common keys up to date on every add().
+    Ties are broken arbitrarily (Counter breaks them by insertion order).
+    """
+
+    def __init__(self, k, data=None):
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        self.k = k
+        self.counts = {}
+        self._top = _IndexedMinHeap()
+        self._dirty = False  # set by decrements, which can break the top-k invariant
+        if data is not None:
+            self.update(data)
+
+    def add(self, key, n=1):
+        count = self.counts.get(key, 0) + n
+        self.counts[key] = count
+        if n < 0:
+            self._dirty = True
+            return
+        if self._dirty:
+            return
+        top = self._top
+        if key in top:
+            top.set(key, count)
+        elif len(top) < self.k:
+            top.push(key, count)
+        elif count > top.min_count():
+            top.replace_min(key, count)
+
+    def update(self, data):
+        add = self.add
+        for key, n in _pairs(data):
+            add(key, n)
+        return self
+
+    def subtract(self, data):
+        for key, n in _pairs(data):
+            self.add(key, -n)
+        return self
+
+    def _rebuild(self):
+        self._top = _IndexedMinHeap()
+        for key, count in heapq.nlargest(self.k, self.counts.items(), key=lambda kv: kv[1]):
+            self._top.push(key, count)
+        self._dirty = False
+
+    def most_common(self, n=None):
+        """Like Counter.most_common; O(k log k) for n <= k, a full sort otherwise."""
+        if n is None or n > self.k:
+            return sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:n]
+        if self._dirty:
+            self._rebuild()
+        return [(key, count) for count, key in self._top.largest(n)]
+
+    def __getitem__(self, key):
+        return self.counts.get(key, 0)
+
+    def __contains__(self, key):
+        return key in self.counts
+
+    def __len__(self):
+        return len(self.counts)
+
+    def total(self):
+        return sum(self.counts.values())
+
+    def __repr__(self):
+        return f"TopKCounter(k={self.k}, top={self.most_common(min(self.k, 5))})"
+
+
+# ==============================================================================
+# 3. SPACE-SAVING (bounded memory, deterministic error bound)
+# ==============================================================================
+
+class SpaceSaving:
+    """
+    Metwally et al.'s Space-Saving summary. Tracks at most `capacity` keys; a
+    new key evicts the smallest one and inherits its count as possible error.
+    """
+
+    def __init__(self, capacity, data=None):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.n = 0  # total weight added
+        self._heap = _IndexedMinHeap()
+        self._error = {}
+        if data is not None:
+            self.update(data)
+
+    def add(self, key, n=1):
+        if n < 0:
+            raise ValueError("SpaceSaving only supports positive increments")
+        self.n += n
+        heap = self._heap
+        if key in heap:
+            heap.set(key, heap.count(key) + n)
+        elif len(heap) < self.capacity:
+            heap.push(key, n)
+            self._error[key] = 0
+        else:
+            min_count = heap.min_count()
+            _, evicted = heap.replace_min(key, min_count + n)
+            del self._error[evicted]
+            self._error[key] = min_count
+
+    def update(self, data):
+        add = self.add
+        for key, n in _pairs(data):
+            add(key, n)
+        return self
+
+    def __getitem__(self, key):
+        """Estimated count (an upper bound). Untracked keys return 0."""
+        return self._heap.count(key) if key in self._heap else 0
+
+    def error(self, key):
+        """How much __getitem__ may overestimate this key by."""
+        return self._error.get(key, self.max_error)
+
+    @property
+    def max_error(self):
+        """Upper bound on the overestimate of any key: N / capacity."""
+        if len(self._heap) < self.capacity:
+            return 0
+        return self._heap.min_count()
+
+    def most_common(self, n=None):
+        """[(key, estimated count)], largest first."""
+        n = len(self._heap) if n is None else n
+        return [(key, count) for count, key in self._heap.largest(n)]
+
+    def guaranteed_top(self, n):
+        """Keys certain to be in the true top-n: lower bound beats the (n+1)-th estimate."""
+        ranked = self._heap.largest(n + 1)
+        threshold = ranked[n][0] if len(ranked) > n else 0
+        return [key for count, key in ranked[:n] if count - self._error[key] >= threshold]
+
+    def merge(self, other: "SpaceSaving"):
+        """
+        Combine with another summary (Agarwal et al., "Mergeable Summaries").
+        Keys missing from one side get that side's minimum as their possible count.
+        """
+        capacity = max(self.capacity, other.capacity)
+        mine_min = self.max_error
+        theirs_min = other.max_error
+        merged = {}
+        for key in set(self._heap.pos) | set(other._heap.pos):
+            count = self[key] if key in self._heap else mine_min
+            error = self._error[key] if key in self._heap else mine_min
+            count += other[key] if key in other._heap else theirs_min
+            error += other._error[key] if key in other._heap else theirs_min
+            merged[key] = (count, error)
+        kept = heapq.nlargest(capacity, merged.items(), key=lambda item: item[1][0])
+        self.capacity = capacity
+        self.n += other.n
+        self._heap = _IndexedMinHeap()
+        self._error = {}
+        for key, (count, error) in kept:
+            self._heap.push(key, count)
+            self._error[key] = error
+        return self
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __repr__(self):
+        return f"SpaceSaving(capacity={self.capacity}, n={self.n}, top={self.most_common(5)})"
+
+
+# ==============================================================================
+# 4. COUNT-MIN SKETCH (bounded memory, probabilistic error bound)
+# ==============================================================================
+
+class CountMinSketch:
+    """
+    depth rows of width counters. Each key increments one counter per row;
+    its estimate is the minimum over rows. Optionally tracks the top_k keys.
+
+    Keys are hashed with hash(), so str/bytes sketches can only be merged with
+    sketches from the same process (or with a fixed PYTHONHASHSEED).
+    """
+
+    def __init__(self, width=2048, depth=5, top_k=0, seed=0):
+        if width < 1 or depth < 1:
+            raise ValueError("width and depth must be at least 1")
+        self.width, self.depth, self.seed = width, depth, seed
+        self.n = 0
+        self._table = array.array("q", [0]) * (width * depth)
+        rng = random.Random(seed)
+        self._hashes = [(rng.randrange(1, _MERSENNE_61), rng.randrange(_MERSENNE_61))
+                        for _ in range(depth)]
+        self.top_k = top_k
+        self._top = _IndexedMinHeap()
+
+    @classmethod
+    def from_error(cls, epsilon, delta, top_k=0, seed=0):
+        """Size the sketch so estimates exceed the truth by <= epsilon*N with prob >= 1-delta."""
+        return cls(math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta)), top_k, seed)
+
+    def _cells(self, key):
+        h = hash(key) & _MERSENNE_61
+        w = self.width
+        return [row * w + ((a * h + b) % _MERSENNE_61) % w
+                for row, (a, b) in enumerate(self._hashes)]
+
+    def add(self, key, n=1):
+        if n < 0:
+            raise ValueError("CountMinSketch only supports positive increments")
+        self.n += n
+        table = self._table
+        estimate = None
+        for cell in self._cells(key):
+            value = table[cell] + n
+            table[cell] = value
+            if estimate is None or value < estimate:
+                estimate = value
+        if self.top_k:
+            self._track(key, estimate)
+
+    def _track(self, key, estimate):
+        top = self._top
+        if key in top:
+            top.set(key, estimate)
+        elif len(top) < self.top_k:
+            top.push(key, estimate)
+        elif estimate > top.min_count():
+            top.replace_min(key, estimate)
+
+    def update(self, data):
+        add = self.add
+        for key, n in _pairs(data):
+            add(key, n)
+        return self
+
+    def __getitem__(self, key):
+        table = self._table
+        return min(table[cell] for cell in self._cells(key))
+
+    @property
+    def error_bound(self):
+        """With probability 1 - e**-depth, no estimate exceeds the truth by more than this."""
+        return math.e / self.width * self.n
+
+    def most_common(self, n=None):
+        """Top tracked keys by estimate (requires top_k > 0)."""
+        if not self.top_k:
+            raise ValueError("create the sketch with top_k > 0 to track heavy hitters")
+        n = len(self._top) if n is None else n
+        return [(key, self[key]) for _, key in self._top.largest(n)]
+
+    def merge(self, other: "CountMinSketch"):
+        if (self.width, self.depth, self.seed) != (other.width, other.depth, other.seed):
+            raise ValueError("only sketches with the same width, depth and seed can be merged")
+        table = self._table
+        for i, value in enumerate(other._table):
+            if value:
+                table[i] += value
+        self.n += other.n
+        if self.top_k:
+            candidates = set(self._top.pos) | set(other._top.pos)
+            self._top = _IndexedMinHeap()
+            for key in candidates:
+                self._track(key, self[key])
+        return self
+
+    @property
+    def nbytes(self):
+        return self._table.itemsize * len(self._table)
+
+    def __repr__(self):
+        return f"CountMinSketch(width={self.width}, depth={self.depth}, n={self.n})"
+
+
+if __name__ == "__main__":
+    import collections
+
+    print("--- 1. Same counts as Counter('mississippi') ---")
+    exact = TopKCounter(2, "mississippi")
+    print(f"TopKCounter: {exact.most_common(2)}, Counter: {collections.Counter('mississippi').most_common(2)}")
+
+    print("\n--- 2. A skewed event stream (Zipf-like) ---")
+    rng = random.Random(7)
+    stream = [f"user{int(rng.paretovariate(1.1))}" for _ in range(200_000)]
+    truth = collections.Counter(stream)
+    print(f"Distinct keys: {len(truth):,}, true top 3: {truth.most_common(3)}")
+
+    ss = SpaceSaving(200, stream)
+    print(f"SpaceSaving(200 keys): {ss.most_common(3)}, max error {ss.max_error:,}")
+    print(f"Guaranteed top-3: {ss.guaranteed_top(3)}")
+
+    cms = CountMinSketch.from_error(epsilon=0.001, delta=0.01, top_k=10)
+    cms.update(stream)
+    print(f"CountMinSketch ({cms.nbytes / 1024:.0f} KiB): {cms.most_common(3)}, "
+          f"error bound {cms.error_bound:,.0f}")
+
+    print("\n--- 3. Merging per-shard summaries ---")
+    left, right = SpaceSaving(200, stream[:100_000]), SpaceSaving(200, stream[100_000:])
+    print(f"Merged SpaceSaving: {left.merge(right).most_common(3)}")
@@ -0,0 +1,466 @@
+"""
+Guide: Thread-Safe Instance Pools (SingletonMeta, grown up)
+SingletonMeta in metaprogramming.py has two limits:
+
+1. It is not thread-safe. Two threads can both find `cls not in _instances`
+   and both run __init__ (two "Initializing Database Connection..." lines).
+2. It caches exactly one instance per class, but a database wants a bounded
+   number of connections per DSN, each used by one thread at a time.
+
+This module goes from the locked singleton to a full pool:
+
+- LockedSingletonMeta: SingletonMeta with double-checked locking.
+- Pool: a bounded pool of resources for one key. It supports checkout via a
+  context manager, max-wait timeouts, health checks on checkout, idle
+  eviction and metrics.
+- KeyedPool: one Pool per distinct constructor arguments.
+- PooledMeta: the metaclass form.
+
+    class Database(metaclass=PooledMeta):
+        pool_options = {"max_size": 4, "timeout": 5.0, "max_idle": 60}
+        def __init__(self, path): ...
+
+    with Database.checkout("app.db") as db:   # same path -> same pool
+        ...
+
+Creating, health-checking and closing resources happen outside the pool lock,
+so a slow connect() never blocks threads that are returning connections.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+
+class PoolTimeout(TimeoutError):
+    """No resource became available within the checkout timeout."""
+
+
+class PoolClosed(RuntimeError):
+    """Checkout from a pool that has been closed."""
+
+
+# ==============================================================================
+# 1. THE THREAD-SAFE SINGLETON
+# ==============================================================================
+
+class LockedSingletonMeta(type):
+    """SingletonMeta with double-checked locking: __init__ runs once, even under races."""
+    _instances = {}
+    _lock = threading.Lock()
+
+    def __call__(cls, *args, **kwargs):
+        instance = cls._instances.get(cls)  # fast path: no lock once created
+        if instance is None:
+            with cls._lock:
+                instance = cls._instances.get(cls)
+                if instance is None:
+                    instance = cls._instances[cls] = super().__call__(*args, **kwargs)
+        return instance
+
+
+# ==============================================================================
+# 2. ONE BOUNDED POOL
+# ==============================================================================
+
+def _close_resource(resource):
+    close = getattr(resource, "close", None)
+    if close is not None:
+        close()
+
+
+class Pool:
+    """
+    At most max_size resources made by factory(). Idle resources are reused
+    last-in first-out, so the warmest connection is handed out first and the
+    coldest ones age out through max_idle.
+
+    health_check(resource) -> bool runs on checkout of an idle resource that
+    has been idle for at least check_after seconds. A failing resource is
+    closed and replaced. reset(resource) runs when a checkout block raises
+    (e.g. conn.rollback); if reset itself fails, the resource is discarded.
+    """
+
+    def __init__(self, factory: Callable, max_size=10, timeout: Optional[float] = 30.0,
+                 max_idle: Optional[float] = None, health_check: Optional[Callable] = None,
+                 check_after=0.0, reset: Optional[Callable] = None, close: Callable = _close_resource,
+                 name=None):
+        if max_size < 1:
+            raise ValueError("max_size must be >= 1")
+        self.factory = factory
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.health_check = health_check
+        self.check_after = check_after
+        self.reset = reset
+        self.close_resource = close
+        self.name = name or getattr(factory, "__qualname__", repr(factory))
+
+        self._cond = threading.Condition(threading.Lock())
+        self._idle = deque()  # (resource, returned_at); oldest on the left
+        self._size = 0        # idle + checked out + being created
+        self._closed = False
+        self._stats = dict.fromkeys(
+            ["created", "destroyed", "checkouts", "timeouts", "failed_checks",
+             "evicted_idle", "discarded", "waits"], 0)
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._peak_in_use = 0
+
+    # --------------------------------------------------------------------------
+    # Checkout / return
+    # --------------------------------------------------------------------------
+    def acquire(self, timeout=...):
+        """Take a resource; raises PoolTimeout after `timeout` seconds (None waits forever)."""
+        timeout = self.timeout if timeout is ... else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waited_since = None
+        while True:
+            expired, resource, create = [], None, False
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise PoolClosed(f"pool {self.name} is closed")
+                    expired = self._pop_expired()
+                    if self._idle:
+                        resource, returned_at = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1  # reserve the slot, create outside the lock
+                        create = True
+                        break
+                    if expired:
+                        break  # close the expired ones first, then try again
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(f"no {self.name} resource available within {timeout}s "
+                                          f"({self.max_size} in use)")
+                    if waited_since is None:
+                        waited_since = time.monotonic()
+                        self._stats["waits"] += 1
+                    self._cond.wait(remaining)
+            self._destroy_all(expired)
+
+            if create:
+                try:
+                    resource = self.factory()
+                except BaseException:
+                    self._release_slot()
+                    raise
+                with self._cond:
+                    self._stats["created"] += 1
+            elif resource is None:
+                continue
+            elif not self._healthy(resource, returned_at):
+                with self._cond:
+                    self._stats["failed_checks"] += 1
+                self._destroy(resource)
+                continue
+            break
+
+        with self._cond:
+            self._stats["checkouts"] += 1
+            in_use = self._size - len(self._idle)
+            if in_use > self._peak_in_use:
+                self._peak_in_use = in_use
+            if waited_since is not None:
+                waited = time.monotonic() - waited_since
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+        return resource
+
+    def release(self, resource, discard=False):
+        """Give a resource back; discard=True closes it instead (its slot frees up)."""
+        with self._cond:
+            if not discard and not self._closed:
+                self._idle.append((resource, time.monotonic()))
+                self._cond.notify()
+                return
+            if discard:
+                self._stats["discarded"] += 1
+        self._destroy(resource)
+
+    @contextmanager
+    def checkout(self, timeout=...):
+        resource = self.acquire(timeout)
+        try:
+            yield resource
+        except BaseException:
+            self.release(resource, discard=not self._reset(resource))
+            raise
+        else:
+            self.release(resource)
+
+    # --------------------------------------------------------------------------
+    # Health, eviction and shutdown
+    # --------------------------------------------------------------------------
+    def _healthy(self, resource, returned_at):
+        if self.health_check is None or time.monotonic() - returned_at < self.check_after:
+            return True
+        try:
+            return bool(self.health_check(resource))
+        except Exception:
+            return False
+
+    def _reset(self, resource):
+        if self.reset is None:
+            return True
+        try:
+            self.reset(resource)
+            return True
+        except Exception:
+            return False
+
+    def _pop_expired(self):
+        """Idle resources past max_idle (call with the lock held)."""
+        if self.max_idle is None or not self._idle:
+            return []
+        cutoff = time.monotonic() - self.max_idle
+        expired = []
+        while self._idle and self._idle[0][1] < cutoff:
+            expired.append(self._idle.popleft()[0])
+        self._stats["evicted_idle"] += len(expired)
+        return expired
+
+    def evict_idle(self):
+        """Close idle resources past max_idle now; returns how many. Checkouts also do this."""
+        with self._cond:
+            expired = self._pop_expired()
+        self._destroy_all(expired)
+        return len(expired)
+
+    def _release_slot(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _destroy(self, resource):
+        try:
+            self.close_resource(resource)
+        except Exception:
+            pass  # a broken resource may fail to close; its slot is freed regardless
+        with self._cond:
+            self._stats["destroyed"] += 1
+        self._release_slot()
+
+    def _destroy_all(self, resources):
+        for resource in resources:
+            self._destroy(resource)
+
+    def close(self):
+        """Close idle resources now; checked-out ones are closed when released."""
+        with self._cond:
+            self._closed = True
+            idle = [r for r, _ in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        self._destroy_all(idle)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --------------------------------------------------------------------------
+    # Metrics
+    # --------------------------------------------------------------------------
+    def stats(self):
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                "size": self._size, "idle": idle, "in_use": self._size - idle,
+                "peak_in_use": self._peak_in_use, "max_size": self.max_size,
+                **self._stats,
+                "wait_avg_s": self._wait_total / self._stats["waits"] if self._stats["waits"] else 0.0,
+                "wait_max_s": self._wait_max,
+            }
+
+    def __repr__(self):
+        s = self.stats()
+        return f"Pool({self.name}, in_use={s['in_use']}, idle={s['idle']}, max_size={self.max_size})"
+
+
+# ==============================================================================
+# 3. ONE POOL PER KEY
+# ==============================================================================
+
+def pool_key(args, kwargs):
+    return args, tuple(sorted(kwargs.items())) if kwargs else ()
+
+
+class KeyedPool:
+    """
+    A Pool per distinct constructor arguments: checkout("a.db") and
+    checkout("b.db") draw from separate bounded pools. Arguments must be hashable.
+    """
+
+    def __init__(self, factory: Callable, **pool_options):
+        self.factory = factory
+        self.pool_options = pool_options
+        self._pools: Dict[tuple, Pool] = {}
+        self._lock = threading.Lock()
+
+    def pool(self, *args, **kwargs) -> Pool:
+        key = pool_key(args, kwargs)
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    shown = [repr(a) for a in args] + [f"{k}={v!r}" for k, v in kwargs.items()]
+                    name = f"{getattr(self.factory, '__qualname__', 'pool')}({', '.join(shown)})"
+                    pool = self._pools[key] = Pool(lambda: self.factory(*args, **kwargs),
+                                                   name=name, **self.pool_options)
+        return pool
+
+    def checkout(self, *args, timeout=..., **kwargs):
+        return self.pool(*args, **kwargs).checkout(timeout)
+
+    def evict_idle(self):
+        return sum(pool.evict_idle() for pool in list(self._pools.values()))
+
+    def stats(self):
+        return {pool.name: pool.stats() for pool in list(self._pools.values())}
+
+    def close(self):
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.close()
+
+
+# ==============================================================================
+# 4. THE METACLASS FORM
+# ==============================================================================
+
+class PooledMeta(type):
+    """
+    Gives each class a KeyedPool of its own instances. Options come from the
+    class attribute pool_options. The methods is_healthy(), reset() and close(),
+    if defined, become the pool's health check, reset and close hooks.
+    Calling the class directly still builds a plain, unpooled instance.
+    """
+
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        cls._pool = None
+        cls._pool_lock = threading.Lock()
+
+    @property
+    def pool(cls) -> KeyedPool:
+        if cls._pool is None:
+            with cls._pool_lock:
+                if cls._pool is None:
+                    options = dict(getattr(cls, "pool_options", {}))
+                    for hook, method in [("health_check", "is_healthy"), ("reset", "reset"),
+                                         ("close", "close")]:
+                        if hasattr(cls, method):
+                            options.setdefault(hook, getattr(cls, method))
+                    cls._pool = KeyedPool(cls, **options)
+        return cls._pool
+
+    def checkout(cls, *args, timeout=..., **kwargs):
+        return cls.pool.checkout(*args, timeout=timeout, **kwargs)
+
+
+if __name__ == "__main__":
+    import os
+    import sqlite3
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    print("--- 1. SingletonMeta vs LockedSingletonMeta under a race ---")
+
+    def race(meta):
+        inits = []
+
+        class Database(metaclass=meta):
+            def __init__(self):
+                time.sleep(0.01)  # a slow connect widens the race window
+                inits.append(1)
+
+        with ThreadPoolExecutor(8) as ex:
+            instances = set(map(id, ex.map(lambda _: Database(), range(8))))
+        return len(inits), len(instances)
+
+    class SingletonMeta(type):  # as in metaprogramming.py
+        _instances = {}
+
+        def __call__(cls, *args, **kwargs):
+            if cls not in cls._instances:
+                instance = super().__call__(*args, **kwargs)
+                cls._instances[cls] = instance
+            return cls._instances[cls]
+
+    for meta in (SingletonMeta, LockedSingletonMeta):
+        inits, distinct = race(meta)
+        print(f"{meta.__name__:<20} __init__ ran {inits}x, {distinct} distinct instance(s)")
+
+    print("\n--- 2. A SQLite connection pool, 32 threads on 4 connections ---")
+
+    class Database(metaclass=PooledMeta):
+        pool_options = {"max_size": 4, "timeout": 10.0, "max_idle": 0.5}
+
+        def __init__(self, path):
+            # connections move between threads, so disable sqlite3's same-thread check
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute("CREATE TABLE IF NOT EXISTS hits (worker INTEGER)")
+
+        def is_healthy(self):
+            return self.conn.execute("SELECT 1").fetchone() == (1,)
+
+        def reset(self):
+            self.conn.rollback()
+
+        def close(self):
+            self.conn.close()
+
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, "app.db")
+    in_use, peak, lock = 0, 0, threading.Lock()
+
+    def work(worker):
+        global in_use, peak
+        for _ in range(50):
+            with Database.checkout(path) as db:
+                with lock:
+                    in_use += 1
+                    peak = max(peak, in_use)
+                with db.conn:
+                    db.conn.execute("INSERT INTO hits VALUES (?)", (worker,))
+                with lock:
+                    in_use -= 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(32) as ex:
+        list(ex.map(work, range(32)))
+    with Database.checkout(path) as db:
+        rows = db.conn.execute("SELECT COUNT(*) FROM hits").fetchone()[0]
+    print(f"{rows:,} rows inserted in {time.perf_counter() - start:.2f}s, "
+          f"at most {peak} connections in use at once")
+    print({k: v for k, v in Database.pool.pool(path).stats().items() if v})
+
+    print("\n--- 3. Timeouts, failed health checks, idle eviction ---")
+    pool = Database.pool.pool(path)
+    held = [pool.acquire() for _ in range(4)]
+    try:
+        pool.acquire(timeout=0.1)
+    except PoolTimeout as e:
+        print(f"PoolTimeout: {e}")
+    held[0].conn.close()  # break one connection behind the pool's back
+    for db in held:
+        pool.release(db)
+    fresh = [pool.acquire() for _ in range(4)]
+    for db in fresh:
+        pool.release(db)
+    time.sleep(0.6)
+    print(f"evicted after max_idle: {pool.evict_idle()}")
+    s = pool.stats()
+    print(f"created={s['created']}, failed_checks={s['failed_checks']}, timeouts={s['timeouts']}, "
+          f"evicted_idle={s['evicted_idle']}, size now {s['size']}")
+    Database.pool.close()
@@ -0,0 +1,552 @@
+"""
+Guide: Compressed Integer Sets (roaring-style bitmaps)
+set_guide() in collections_guide.py shows |, &, - and ^ on Python sets. For
+large sets of integer IDs a Python set costs 60+ bytes per element and hashes
+every element on every operation. IntBitmap stores the same sets compactly:
+
+- The 32-bit space is cut into 65,536-value chunks keyed by the high 16 bits.
+- Each chunk uses whichever container is smallest:
+    array  - sorted uint16 values        (2 bytes per element, up to 4096)
+    bitmap - 65,536 bits                 (a flat 8 KiB, for dense chunks)
+    run    - (start, length - 1) pairs   (4 bytes per run, for ID ranges)
+- Set operations work chunk by chunk. Dense work is done on Python ints used
+  as 65,536-bit masks, so the bit twiddling runs in C.
+
+serialize() writes a compact byte format; IntBitmap.frombytes() reads it back
+through memoryviews WITHOUT copying - membership tests, len() and iteration
+work directly on the buffer (e.g. an mmap), and a chunk is only copied when an
+operation has to modify it.
+"""
+
+import array
+import bisect
+import struct
+import sys
+from typing import Iterable
+
+MAX_VALUE = (1 << 32) - 1
+ARRAY_LIMIT = 4096        # above this many values, a bitmap is smaller than an array
+BITMAP_BYTES = 8192       # 65,536 bits
+_FULL = (1 << 65536) - 1
+
+_MAGIC = b"IBM1"
+_HEADER = struct.Struct("<4sI")          # magic, number of containers
+_ENTRY = struct.Struct("<HBxIII")        # key, kind, cardinality, item count, offset
+_ARRAY, _BITMAP, _RUN = 0, 1, 2
+_LITTLE = sys.byteorder == "little"
+
+# For each byte value, the positions of its set bits
+_BYTE_BITS = [tuple(i for i in range(8) if b >> i & 1) for b in range(256)]
+
+
+def _positions(bits):
+    """Positions of the set bits of a 65,536-bit int, ascending, as array('H')."""
+    out = array.array("H")
+    data = bits.to_bytes(BITMAP_BYTES, "little")
+    # Skip empty 8-byte words quickly, then expand bytes with the lookup table
+    words = memoryview(data).cast("Q") if _LITTLE else None
+    for w in range(BITMAP_BYTES // 8):
+        if words is not None and not words[w]:
+            continue
+        base = w * 8
+        for i in range(base, base + 8):
+            byte = data[i]
+            if byte:
+                pos = i << 3
+                out.extend(pos + b for b in _BYTE_BITS[byte])
+    return out
+
+
+# ==============================================================================
+# 1. CONTAINERS (one per 65,536-value chunk)
+# ==============================================================================
+# Storage may be an array.array / bytearray (owned) or a memoryview into a
+# serialized buffer (borrowed, read-only). Mutations always produce owned storage.
+
+class _ArrayContainer:
+    kind = _ARRAY
+    __slots__ = ("values",)
+
+    def __init__(self, values):
+        self.values = values  # sorted uint16s
+
+    @property
+    def card(self):
+        return len(self.values)
+
+    def __contains__(self, low):
+        values = self.values
+        i = bisect.bisect_left(values, low)
+        return i < len(values) and values[i] == low
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def to_int(self):
+        bits = bytearray(BITMAP_BYTES)
+        for v in self.values:
+            bits[v >> 3] |= 1 << (v & 7)
+        return int.from_bytes(bits, "little")
+
+    def add(self, low):
+        if low in self:
+            return self
+        if len(self.values) >= ARRAY_LIMIT:
+            return _BitmapContainer.from_int(self.to_int() | (1 << low))
+        values = self.values if isinstance(self.values, array.array) else array.array("H", self.values)
+        values.insert(bisect.bisect_left(values, low), low)
+        return _ArrayContainer(values)
+
+    def discard(self, low):
+        if low not in self:
+            return self
+        values = array.array("H", self.values)
+        del values[bisect.bisect_left(values, low)]
+        return _ArrayContainer(values) if values else None
+
+    def copy(self):
+        return _ArrayContainer(array.array("H", self.values))
+
+    def payload(self):
+        values = array.array("H", self.values)
+        if not _LITTLE:
+            values.byteswap()
+        return values.tobytes(), len(values)
+
+    @property
+    def nbytes(self):
+        return 2 * len(self.values)
+
+
+class _BitmapContainer:
+    kind = _BITMAP
+    __slots__ = ("bits", "card")
+
+    def __init__(self, bits, card):
+        self.bits = bits  # 8192 bytes, little-endian bit order
+        self.card = card
+
+    @classmethod
+    def from_int(cls, value):
+        return cls(bytearray(value.to_bytes(BITMAP_BYTES, "little")), value.bit_count())
+
+    def __contains__(self, low):
+        return bool(self.bits[low >> 3] >> (low & 7) & 1)
+
+    def __iter__(self):
+        return iter(_positions(self.to_int()))
+
+    def to_int(self):
+        return int.from_bytes(self.bits, "little")
+
+    def add(self, low):
+        if low in self:
+            return self
+        bits = self.bits if isinstance(self.bits, bytearray) else bytearray(self.bits)
+        bits[low >> 3] |= 1 << (low & 7)
+        return _BitmapContainer(bits, self.card + 1)
+
+    def discard(self, low):
+        if low not in self:
+            return self
+        bits = self.bits if isinstance(self.bits, bytearray) else bytearray(self.bits)
+        bits[low >> 3] &= ~(1 << (low & 7)) & 0xFF
+        if self.card - 1 <= ARRAY_LIMIT:
+            return _best(int.from_bytes(bits, "little"))
+        return _BitmapContainer(bits, self.card - 1)
+
+    def copy(self):
+        return _BitmapContainer(bytearray(self.bits), self.card)
+
+    def payload(self):
+        return bytes(self.bits), BITMAP_BYTES
+
+    @property
+    def nbytes(self):
+        return BITMAP_BYTES
+
+
+class _RunContainer:
+    kind = _RUN
+    __slots__ = ("runs", "card")
+
+    def __init__(self, runs, card=None):
+        self.runs = runs  # flat uint16s: start0, length0 - 1, start1, length1 - 1, ...
+        self.card = card if card is not None else sum(runs[1::2]) + len(runs) // 2
+
+    def __contains__(self, low):
+        runs = self.runs
+        lo, hi = 0, len(runs) // 2
+        while lo < hi:  # last run whose start <= low
+            mid = (lo + hi) // 2
+            if runs[2 * mid] <= low:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0:
+            return False
+        start = runs[2 * (lo - 1)]
+        return low <= start + runs[2 * (lo - 1) + 1]
+
+    def __iter__(self):
+        runs = self.runs
+        for i in range(0, len(runs), 2):
+            yield from range(runs[i], runs[i] + runs[i + 1] + 1)
+
+    def to_int(self):
+        runs = self.runs
+        bits = 0
+        for i in range(0, len(runs), 2):
+            bits |= ((1 << (runs[i + 1] + 1)) - 1) << runs[i]
+        return bits
+
+    def add(self, low):
+        return self if low in self else _best(self.to_int() | (1 << low))
+
+    def discard(self, low):
+        return _best(self.to_int() & ~(1 << low)) if low in self else self
+
+    def copy(self):
+        return _RunContainer(array.array("H", self.runs), self.card)
+
+    def payload(self):
+        runs = array.array("H", self.runs)
+        if not _LITTLE:
+            runs.byteswap()
+        return runs.tobytes(), len(runs)
+
+    @property
+    def nbytes(self):
+        return 2 * len(self.runs)
+
+
+def _best(bits):
+    """The smallest container holding the values of a 65,536-bit int (None if empty)."""
+    card = bits.bit_count()
+    if not card:
+        return None
+    starts = bits & ~(bits << 1)
+    n_runs = starts.bit_count()
+    run_bytes, array_bytes = 4 * n_runs, 2 * card
+    if run_bytes < min(array_bytes, BITMAP_BYTES):
+        ends = bits & ~(bits >> 1)
+        runs = array.array("H")
+        for s, e in zip(_positions(starts), _positions(ends)):
+            runs.append(s)
+            runs.append(e - s)
+        return _RunContainer(runs, card)
+    if card <= ARRAY_LIMIT:
+        return _ArrayContainer(_positions(bits))
+    return _BitmapContainer.from_int(bits)
+
+
+def _combine(a, b, op):
+    """Apply a set operation to two containers of the same chunk."""
+    if a.kind == _ARRAY and b.kind == _ARRAY and op != "|":
+        x, y = set(a.values), set(b.values)
+        result = x & y if op == "&" else x - y if op == "-" else x ^ y
+        if len(result) <= ARRAY_LIMIT:
+            return _ArrayContainer(array.array("H", sorted(result))) if result else None
+    x, y = a.to_int(), b.to_int()
+    if op == "&":
+        return _best(x & y)
+    if op == "|":
+        return _best(x | y)
+    if op == "-":
+        return _best(x & ~y & _FULL)
+    return _best(x ^ y)
+
+
+# ==============================================================================
+# 2. THE SET TYPE
+# ==============================================================================
+
+class IntBitmap:
+    """A set of integers in [0, 2**32) with Python-set operators."""
+    __slots__ = ("_containers", "_keys", "_buffer")
+
+    def __init__(self, values: Iterable[int] = ()):
+        self._containers = {}
+        self._keys = []       # sorted chunk keys, for ordered iteration
+        self._buffer = None   # keeps a deserialized buffer alive
+        self.update(values)
+
+    @classmethod
+    def _from_containers(cls, containers):
+        result = cls()
+        result._containers = {k: c for k, c in containers.items() if c is not None}
+        result._keys = sorted(result._containers)
+        return result
+
+    @classmethod
+    def from_range(cls, start, stop):
+        """All integers in [start, stop), stored as run containers."""
+        result = cls()
+        result.add_range(start, stop)
+        return result
+
+    # --------------------------------------------------------------------------
+    # Mutation
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def _check(x):
+        if not 0 <= x <= MAX_VALUE:
+            raise ValueError(f"IntBitmap values must be in [0, 2**32), got {x}")
+
+    def _set(self, key, container):
+        if container is None:
+            if self._containers.pop(key, None) is not None:
+                del self._keys[bisect.bisect_left(self._keys, key)]
+            return
+        if key not in self._containers:
+            bisect.insort(self._keys, key)
+        self._containers[key] = container
+
+    def add(self, x):
+        self._check(x)
+        key, low = x >> 16, x & 0xFFFF
+        container = self._containers.get(key)
+        self._set(key, _ArrayContainer(array.array("H", [low])) if container is None else container.add(low))
+
+    def discard(self, x):
+        container = self._containers.get(x >> 16)
+        if container is not None:
+            self._set(x >> 16, container.discard(x & 0xFFFF))
+
+    def remove(self, x):
+        if x not in self:
+            raise KeyError(x)
+        self.discard(x)
+
+    def update(self, values: Iterable[int]):
+        """Add many values, grouped by chunk so each chunk is rebuilt once."""
+        groups = {}
+        for x in values:
+            self._check(x)
+            groups.setdefault(x >> 16, []).append(x & 0xFFFF)
+        for key, lows in groups.items():
+            bits = bytearray(BITMAP_BYTES)
+            for low in lows:
+                bits[low >> 3] |= 1 << (low & 7)
+            new = int.from_bytes(bits, "little")
+            existing = self._containers.get(key)
+            self._set(key, _best(new if existing is None else new | existing.to_int()))
+        return self
+
+    def add_range(self, start, stop):
+        """Add every integer in [start, stop) without enumerating them."""
+        if start >= stop:
+            return
+        self._check(start)
+        self._check(stop - 1)
+        for key in range(start >> 16, ((stop - 1) >> 16) + 1):
+            lo = max(start, key << 16) & 0xFFFF
+            hi = min(stop - 1, (key << 16) | 0xFFFF) & 0xFFFF
+            bits = ((1 << (hi - lo + 1)) - 1) << lo
+            existing = self._containers.get(key)
+            self._set(key, _best(bits if existing is None else bits | existing.to_int()))
+
+    def run_optimize(self):
+        """Re-pick the smallest container for every chunk (e.g. after many add() calls)."""
+        for key in self._keys:
+            self._containers[key] = _best(self._containers[key].to_int())
+        return self
+
+    # --------------------------------------------------------------------------
+    # Queries
+    # --------------------------------------------------------------------------
+    def __contains__(self, x):
+        if not isinstance(x, int):
+            return False
+        container = self._containers.get(x >> 16)
+        return container is not None and (x & 0xFFFF) in container
+
+    def __len__(self):
+        return sum(c.card for c in self._containers.values())
+
+    def __bool__(self):
+        return bool(self._containers)
+
+    def __iter__(self):
+        for key in self._keys:
+            base = key << 16
+            for low in self._containers[key]:
+                yield base + low
+
+    def min(self):
+        if not self._keys:
+            raise ValueError("min() of empty IntBitmap")
+        key = self._keys[0]
+        return (key << 16) + next(iter(self._containers[key]))
+
+    def max(self):
+        if not self._keys:
+            raise ValueError("max() of empty IntBitmap")
+        key = self._keys[-1]
+        return (key << 16) + (self._containers[key].to_int().bit_length() - 1)
+
+    @property
+    def nbytes(self):
+        """Bytes used by the container payloads."""
+        return sum(c.nbytes for c in self._containers.values())
+
+    def container_stats(self):
+        """How many chunks use each container kind."""
+        names = {_ARRAY: "array", _BITMAP: "bitmap", _RUN: "run"}
+        stats = {"array": 0, "bitmap": 0, "run": 0}
+        for c in self._containers.values():
+            stats[names[c.kind]] += 1
+        return stats
+
+    # --------------------------------------------------------------------------
+    # Set operators (same as set_guide(): |, &, -, ^)
+    # --------------------------------------------------------------------------
+    def _binary(self, other, op):
+        mine, theirs = self._containers, other._containers
+        result = {}
+        if op == "&":
+            keys = mine.keys() & theirs.keys()
+        elif op == "-":
+            keys = mine.keys()
+        else:
+            keys = mine.keys() | theirs.keys()
+        for key in keys:
+            a, b = mine.get(key), theirs.get(key)
+            if a is None:
+                result[key] = b.copy()
+            elif b is None:
+                result[key] = a.copy()
+            else:
+                result[key] = _combine(a, b, op)
+        return IntBitmap._from_containers(result)
+
+    def __or__(self, other):
+        return self._binary(other, "|") if isinstance(other, IntBitmap) else NotImplemented
+
+    def __and__(self, other):
+        return self._binary(other, "&") if isinstance(other, IntBitmap) else NotImplemented
+
+    def __sub__(self, other):
+        return self._binary(other, "-") if isinstance(other, IntBitmap) else NotImplemented
+
+    def __xor__(self, other):
+        return self._binary(other, "^") if isinstance(other, IntBitmap) else NotImplemented
+
+    def _assign(self, result):
+        self._containers, self._keys = result._containers, result._keys
+        return self
+
+    def __ior__(self, other):
+        return self._assign(self | other)
+
+    def __iand__(self, other):
+        return self._assign(self & other)
+
+    def __isub__(self, other):
+        return self._assign(self - other)
+
+    def __ixor__(self, other):
+        return self._assign(self ^ other)
+
+    union, intersection, difference, symmetric_difference = __or__, __and__, __sub__, __xor__
+
+    def isdisjoint(self, other):
+        return not (self & other)
+
+    def issubset(self, other):
+        return not (self - other)
+
+    def __eq__(self, other):
+        if not isinstance(other, IntBitmap):
+            return NotImplemented
+        if self._keys != other._keys:
+            return False
+        return all(self._containers[k].to_int() == other._containers[k].to_int() for k in self._keys)
+
+    __hash__ = None
+
+    def __repr__(self):
+        n = len(self)
+        if n <= 10:
+            return f"IntBitmap({list(self)})"
+        return f"IntBitmap(<{n:,} values in {len(self._keys)} chunks, {self.nbytes:,} bytes>)"
+
+    # --------------------------------------------------------------------------
+    # Serialization
+    # --------------------------------------------------------------------------
+    def serialize(self) -> bytes:
+        """
+        Layout: header | directory (one 16-byte entry per chunk) | payloads.
+        Payloads are 8-byte aligned, little-endian uint16 arrays / raw bitmaps.
+        """
+        payloads, entries = [], []
+        offset = _HEADER.size + _ENTRY.size * len(self._keys)
+        for key in self._keys:
+            c = self._containers[key]
+            offset += -offset % 8
+            data, count = c.payload()
+            entries.append(_ENTRY.pack(key, c.kind, c.card, count, offset))
+            payloads.append((offset, data))
+            offset += len(data)
+        out = bytearray(offset)
+        out[:_HEADER.size] = _HEADER.pack(_MAGIC, len(self._keys))
+        pos = _HEADER.size
+        for entry in entries:
+            out[pos:pos + _ENTRY.size] = entry
+            pos += _ENTRY.size
+        for start, data in payloads:
+            out[start:start + len(data)] = data
+        return bytes(out)
+
+    @classmethod
+    def frombytes(cls, buffer) -> "IntBitmap":
+        """
+        Load a serialized bitmap. On little-endian machines the containers are
+        memoryviews into `buffer` (bytes, bytearray, mmap...), so nothing is copied.
+        """
+        view = memoryview(buffer).cast("B")
+        magic, n = _HEADER.unpack_from(view, 0)
+        if magic != _MAGIC:
+            raise ValueError("not a serialized IntBitmap")
+        containers = {}
+        for i in range(n):
+            key, kind, card, count, offset = _ENTRY.unpack_from(view, _HEADER.size + i * _ENTRY.size)
+            if kind == _BITMAP:
+                containers[key] = _BitmapContainer(view[offset:offset + BITMAP_BYTES], card)
+                continue
+            raw = view[offset:offset + 2 * count]
+            if _LITTLE:
+                values = raw.cast("H")
+            else:
+                values = array.array("H", raw.tobytes())
+                values.byteswap()
+            containers[key] = _ArrayContainer(values) if kind == _ARRAY else _RunContainer(values, card)
+        result = cls._from_containers(containers)
+        result._buffer = buffer
+        return result
+
+
+if __name__ == "__main__":
+    print("--- 1. The set_guide() operators ---")
+    s1, s2 = IntBitmap({2, 3, 4, 5}), IntBitmap({4, 5, 6, 7})
+    print(f"Union (|): {s1 | s2}")
+    print(f"Intersection (&): {s1 & s2}")
+    print(f"Difference (-): {s1 - s2}")
+    print(f"Symmetric Difference (^): {s1 ^ s2}")
+
+    print("\n--- 2. Tens of millions of IDs ---")
+    import random
+    rng = random.Random(1)
+    active = IntBitmap.from_range(0, 20_000_000)                       # a dense ID range
+    sampled = IntBitmap(rng.randrange(40_000_000) for _ in range(200_000))
+    both = active & sampled
+    print(f"active: {len(active):,} IDs in {active.nbytes:,} bytes {active.container_stats()}")
+    print(f"sampled: {len(sampled):,} IDs in {sampled.nbytes:,} bytes")
+    print(f"active & sampled: {len(both):,} IDs")
+    print(f"A Python set of 20M ints would need ~{20_000_000 * 60 / 1e9:.1f} GB")
+
+    print("\n--- 3. Zero-copy round trip ---")
+    blob = (active | sampled).serialize()
+    loaded = IntBitmap.frombytes(blob)
+    print(f"{len(blob):,} bytes on the wire; equal after load: {loaded == active | sampled}; "
+          f"19_999_999 in loaded: {19_999_999 in loaded}")
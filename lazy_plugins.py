@@ -0,0 +1,329 @@
+"""
+Guide: Lazy Plugin Registry (deferred imports for fast startup)
+PluginBase in metaprogramming.py registers a subclass from __init_subclass__,
+so a plugin only exists once its module has been imported. To make every
+plugin available, a worker has to import all plugin modules at startup, even
+the ones it never uses.
+
+PluginRegistry instead starts from a manifest that maps a name to
+"module:attr". The manifest is a dict, a JSON file or installed entry points.
+A module is imported on the first lookup of one of its plugins:
+
+    registry = PluginRegistry.from_manifest({
+        "weather": {"target": "plugins.weather:WeatherPlugin", "capabilities": ["forecast"]},
+        "stocks": "plugins.stocks:StockPlugin",
+    })
+    "weather" in registry                  # True, nothing imported yet
+    registry.names_with("forecast")        # ['weather'], still nothing imported
+    registry["weather"]                    # imports plugins.weather now
+    print(registry.import_report())        # what was imported, and how long it took
+
+The eager path keeps working. Subclasses of PluginBase register themselves
+into PluginBase.registry (a PluginRegistry) when their module is imported.
+PluginBase.load_manifest(manifest) fills that same registry, so an imported
+manifest entry and its subclass share one entry and resolve to the same class.
+"""
+
+import importlib
+import json
+import sys
+import threading
+import time
+from collections.abc import Mapping
+from typing import Dict, Iterable, Optional, Set
+
+
+class PluginNotFound(KeyError):
+    """No plugin registered under this name."""
+
+
+class PluginLoadError(ImportError):
+    """Importing a plugin's module, or finding its attribute, failed."""
+
+    def __init__(self, name, target, error):
+        super().__init__(f"plugin {name!r} ({target}) failed to load: {error!r}")
+        self.plugin, self.target, self.error = name, target, error
+
+
+class PluginSpec:
+    """One registry entry: where the plugin lives and, once loaded, the object itself."""
+    __slots__ = ("name", "target", "capabilities", "origin", "obj", "loaded",
+                 "load_seconds", "new_modules", "lock")
+
+    def __init__(self, name, target=None, capabilities=(), origin="manifest"):
+        if target is not None and ":" not in target:
+            raise ValueError(f"plugin {name!r}: target must look like 'module:attr', got {target!r}")
+        self.name = name
+        self.target = target
+        self.capabilities = frozenset(capabilities)
+        self.origin = origin       # "manifest", "entry point" or "subclass"
+        self.obj = None
+        self.loaded = False
+        self.load_seconds = 0.0
+        self.new_modules = 0       # modules this import pulled into sys.modules
+        self.lock = threading.Lock()
+
+    @property
+    def module(self):
+        return self.target.partition(":")[0] if self.target else getattr(self.obj, "__module__", None)
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "lazy"
+        return f"PluginSpec({self.name!r}, {self.target or self.module}, {state})"
+
+
+class PluginRegistry(Mapping):
+    """
+    Name -> plugin mapping with a capability index. Membership, len(), iteration
+    and names_with() never import anything. registry[name] / get() import on
+    first use. values() and items() load every plugin (see preload()).
+    """
+
+    def __init__(self, name="plugins"):
+        self.name = name
+        self._specs: Dict[str, PluginSpec] = {}
+        self._by_capability: Dict[str, Set[str]] = {}
+        self._by_target: Dict[str, str] = {}  # "module:attr" -> name, for lazy entries
+        self._lock = threading.RLock()  # guards the indexes; imports run under each spec's lock
+
+    # --------------------------------------------------------------------------
+    # Populating
+    # --------------------------------------------------------------------------
+    @classmethod
+    def from_manifest(cls, manifest, name="plugins", into=None):
+        """
+        manifest: {name: "module:attr" | {"target": ..., "capabilities": [...]}} or
+        a JSON file path. into: an existing registry to add the entries to (such
+        as PluginBase.registry) instead of a new one.
+        """
+        if not isinstance(manifest, Mapping):
+            with open(manifest) as f:
+                manifest = json.load(f)
+        registry = cls(name) if into is None else into
+        for plugin, entry in manifest.items():
+            if isinstance(entry, str):
+                registry.register_lazy(plugin, entry)
+            else:
+                registry.register_lazy(plugin, entry["target"], entry.get("capabilities", ()))
+        return registry
+
+    def add_entry_points(self, group):
+        """Register the installed entry points of a group (importlib.metadata is itself lazy)."""
+        from importlib.metadata import entry_points
+        for ep in entry_points(group=group):
+            self.register_lazy(ep.name, ep.value, origin="entry point")
+        return self
+
+    def register_lazy(self, name, target, capabilities=(), origin="manifest"):
+        with self._lock:
+            existing = self._specs.get(name)
+            if existing is not None and existing.target != target:
+                raise ValueError(f"plugin {name!r} already registered as {existing.target or existing.module}")
+            if existing is None:
+                self._specs[name] = PluginSpec(name, target, capabilities, origin)
+                self._by_target[target] = name
+            else:
+                existing.capabilities |= frozenset(capabilities)
+            self._index(name, capabilities)
+
+    def register(self, obj, name=None, capabilities=()):
+        """
+        Eager registration of an already imported object (what __init_subclass__
+        calls). If a lazy entry targets this object's module:qualname, the object
+        fills that entry, whatever name it was given.
+        """
+        with self._lock:
+            target = f"{getattr(obj, '__module__', None)}:{getattr(obj, '__qualname__', None)}"
+            name = self._by_target.get(target) or name or obj.__name__
+            spec = self._specs.get(name)
+            if spec is None:
+                spec = self._specs[name] = PluginSpec(name, capabilities=capabilities, origin="subclass")
+            elif spec.loaded and spec.obj is not obj:
+                raise ValueError(f"plugin name {name!r} is already taken by {spec.obj!r}")
+            else:
+                spec.capabilities |= frozenset(capabilities)
+            spec.obj = obj
+            # while _load() is importing this module, it marks the spec loaded once the import finishes
+            if not spec.lock.locked():
+                spec.loaded = True
+            self._index(name, capabilities)
+        return obj
+
+    def _index(self, name, capabilities):
+        for capability in capabilities:
+            self._by_capability.setdefault(capability, set()).add(name)
+
+    # --------------------------------------------------------------------------
+    # Lookup
+    # --------------------------------------------------------------------------
+    def __getitem__(self, name):
+        spec = self._specs.get(name)
+        if spec is None:
+            raise PluginNotFound(name)
+        if spec.loaded:
+            return spec.obj
+        return self._load(spec)
+
+    def _load(self, spec):
+        with spec.lock:  # one import per plugin, even if many threads ask at once
+            if spec.loaded:
+                return spec.obj
+            module_name, _, attr = spec.target.partition(":")
+            before = len(sys.modules)
+            start = time.perf_counter()
+            try:
+                obj = importlib.import_module(module_name)
+                for part in attr.split("."):
+                    obj = getattr(obj, part)
+            except Exception as e:
+                raise PluginLoadError(spec.name, spec.target, e) from e
+            spec.load_seconds = time.perf_counter() - start
+            spec.new_modules = len(sys.modules) - before
+            with self._lock:
+                spec.obj, spec.loaded = obj, True
+            return obj
+
+    def __contains__(self, name):
+        return name in self._specs
+
+    def __iter__(self):
+        return iter(list(self._specs))
+
+    def __len__(self):
+        return len(self._specs)
+
+    def spec(self, name) -> PluginSpec:
+        try:
+            return self._specs[name]
+        except KeyError:
+            raise PluginNotFound(name) from None
+
+    def names_with(self, capability) -> list:
+        """Plugin names offering a capability, without importing them."""
+        return sorted(self._by_capability.get(capability, ()))
+
+    def with_capability(self, capability) -> list:
+        """The plugins offering a capability, imported as needed."""
+        return [self[name] for name in self.names_with(capability)]
+
+    def capabilities(self):
+        return {cap: sorted(names) for cap, names in self._by_capability.items()}
+
+    def loaded(self) -> list:
+        """The plugins that have been imported so far, in registration order."""
+        return [spec.obj for spec in list(self._specs.values()) if spec.loaded]
+
+    def preload(self, names: Optional[Iterable[str]] = None, background=False):
+        """Import plugins ahead of their first lookup, optionally in a daemon thread."""
+        names = list(self._specs) if names is None else list(names)
+        if not background:
+            return [self[name] for name in names]
+        thread = threading.Thread(target=lambda: [self.get(name) for name in names],
+                                  name=f"{self.name}-preload", daemon=True)
+        thread.start()
+        return thread
+
+    # --------------------------------------------------------------------------
+    # Reporting
+    # --------------------------------------------------------------------------
+    def import_report(self):
+        specs = sorted(self._specs.values(), key=lambda s: (not s.loaded, -s.load_seconds, s.name))
+        lines = [f"{'plugin':<16}{'origin':<14}{'state':<9}{'import':>10}{'modules':>9}  module"]
+        for s in specs:
+            timing = f"{s.load_seconds * 1000:.1f} ms" if s.loaded and s.target else "-"
+            modules = f"{s.new_modules}" if s.loaded and s.target else "-"
+            lines.append(f"{s.name:<16}{s.origin:<14}{'loaded' if s.loaded else 'lazy':<9}"
+                         f"{timing:>10}{modules:>9}  {s.module}")
+        total = sum(s.load_seconds for s in specs)
+        loaded = sum(s.loaded for s in specs)
+        lines.append(f"{loaded}/{len(specs)} loaded, {total * 1000:.1f} ms spent importing")
+        return "\n".join(lines)
+
+    def __repr__(self):
+        loaded = sum(s.loaded for s in self._specs.values())
+        return f"PluginRegistry({self.name!r}, {len(self)} plugins, {loaded} loaded)"
+
+
+# ==============================================================================
+# THE EAGER PATH: __init_subclass__, as in metaprogramming.py
+# ==============================================================================
+
+class PluginBase:
+    """
+    Subclasses register themselves when their module is imported:
+
+        class WeatherPlugin(PluginBase, name="weather", capabilities={"forecast"}): ...
+    """
+    registry = PluginRegistry()
+
+    @classmethod
+    def load_manifest(cls, manifest):
+        """Add a manifest's lazy entries to the registry the subclasses register into."""
+        return PluginRegistry.from_manifest(manifest, into=cls.registry)
+
+    def __init_subclass__(cls, name=None, capabilities=(), **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.registry.register(cls, name, capabilities)
+
+
+if __name__ == "__main__":
+    import os
+    import subprocess
+    import tempfile
+    import textwrap
+
+    # Plugin modules must import *this* module by name, not __main__.
+    import lazy_plugins
+
+    print("--- 1. The eager path still works ---")
+
+    class WeatherPlugin(lazy_plugins.PluginBase, capabilities={"forecast"}):
+        pass
+
+    class StockPlugin(lazy_plugins.PluginBase, capabilities={"quotes"}):
+        pass
+
+    print(f"Registered Plugins: {[p.__name__ for p in lazy_plugins.PluginBase.registry.loaded()]}")
+
+    print("\n--- 2. Twenty heavy plugin modules, loaded on demand ---")
+    root = tempfile.mkdtemp()
+    package = os.path.join(root, "demo_plugins")
+    os.mkdir(package)
+    open(os.path.join(package, "__init__.py"), "w").close()
+    manifest = {}
+    for i in range(20):
+        with open(os.path.join(package, f"plugin{i}.py"), "w") as f:
+            f.write(textwrap.dedent(f"""
+                import time
+                from lazy_plugins import PluginBase
+                time.sleep(0.05)  # stands in for heavy imports (numpy, SDK clients...)
+
+                class Plugin{i}(PluginBase, name="plugin{i}", capabilities={{"{'export' if i % 5 == 0 else 'ingest'}"}}):
+                    pass
+            """))
+        manifest[f"plugin{i}"] = {"target": f"demo_plugins.plugin{i}:Plugin{i}",
+                                  "capabilities": ["export" if i % 5 == 0 else "ingest"]}
+    manifest_path = os.path.join(root, "plugins.json")
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([here, root])}
+    startup = {
+        "eager (import every module)": "import importlib; "
+            + "; ".join(f"importlib.import_module('demo_plugins.plugin{i}')" for i in range(20)),
+        "lazy (manifest only)": f"from lazy_plugins import PluginRegistry; "
+                                f"PluginRegistry.from_manifest({manifest_path!r})",
+    }
+    for label, code in startup.items():
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], env=env, check=True)
+        print(f"Worker start, {label:<28}: {time.perf_counter() - start:.2f}s")
+
+    sys.path.insert(0, root)
+    registry = lazy_plugins.PluginBase.load_manifest(manifest_path)
+    print(f"'plugin3' in registry: {'plugin3' in registry}, exporters: {registry.names_with('export')}")
+    print(f"registry['plugin3'] -> {registry['plugin3'].__name__}; "
+          f"exporters loaded: {[p.__name__ for p in registry.with_capability('export')]}")
+    print(f"{registry}\n")
+    print(registry.import_report())
@@ -0,0 +1,295 @@
+"""
+Guide: Lazy Strided Ranges (modulo filters as arithmetic)
+comprehensions.py defines
+    large_evens = (x for x in range(10**10) if x % 2 == 0)
+and list_comprehensions.py filters range(50) with `x % 2 == 0 if x % 3 == 0`.
+Asking those for len(), an index or `in` means walking every element. But a
+modulo filter on a range is not really a filter, it is arithmetic:
+
+    x in range(a, b) and x % m in R    <=>    periodic pattern with period m
+
+LazyRange stores exactly that: the bounds [start, stop), a modulus m and the
+sorted residues R. len(), indexing, slicing and `in` are then O(1) (O(log|R|)
+to be precise), and elements are only produced when you iterate.
+
+    evens = LazyRange(range(10**10)).where(2)       # x % 2 == 0
+    len(evens), evens[123_456_789], 999 in evens     # instant
+    div_by_6 = LazyRange(range(50)).where(2).where(3)
+    div_by_6.to_range()                              # range(0, 49, 6)
+
+Filters combine with & (intersection, solved with the Chinese Remainder
+Theorem), | (union) and - (difference). Unions and differences need a common
+period, so their residue sets are expanded to lcm(m1, m2); that expansion is
+capped at MAX_RESIDUES to keep memory bounded.
+"""
+
+import bisect
+import math
+from collections.abc import Sequence
+
+MAX_RESIDUES = 1 << 20
+
+
+# ==============================================================================
+# 1. RESIDUE ARITHMETIC
+# ==============================================================================
+
+def _crt(r1, m1, r2, m2):
+    """Solve x = r1 (mod m1), x = r2 (mod m2). Returns x mod lcm, or None if impossible."""
+    g = math.gcd(m1, m2)
+    if (r2 - r1) % g:
+        return None
+    lcm = m1 // g * m2
+    # x = r1 + m1 * t, with m1 * t = r2 - r1 (mod m2)
+    t = ((r2 - r1) // g * pow(m1 // g, -1, m2 // g)) % (m2 // g)
+    return (r1 + m1 * t) % lcm
+
+
+def _lift(residues, modulus, new_modulus):
+    """Re-express residues mod `modulus` as residues mod a multiple of it."""
+    return {r + k * modulus for k in range(new_modulus // modulus) for r in residues}
+
+
+def _check_size(count):
+    if count > MAX_RESIDUES:
+        raise ValueError(
+            f"this combination needs {count:,} residues per period "
+            f"(limit MAX_RESIDUES={MAX_RESIDUES:,})"
+        )
+
+
+# ==============================================================================
+# 2. THE LAZY RANGE TYPE
+# ==============================================================================
+
+class LazyRange(Sequence):
+    """The integers x in [start, stop) with x % modulus in residues, ascending."""
+    __slots__ = ("start", "stop", "modulus", "residues", "_residue_set")
+
+    def __init__(self, start, stop=None, modulus=1, residues=(0,)):
+        if isinstance(start, range):
+            if stop is not None:
+                raise TypeError("LazyRange(range_obj) takes no stop argument")
+            r = start
+            if r.step < 0:
+                raise ValueError("only ascending ranges are supported; use reversed() on the result")
+            start, stop = r.start, max(r.start, r.stop)
+            modulus, residues = r.step, (r.start % r.step,)
+            if modulus == 1:
+                residues = (0,)
+        elif stop is None:
+            start, stop = 0, start
+        if modulus < 1:
+            raise ValueError("modulus must be a positive integer")
+        self.start = start
+        self.stop = max(start, stop)
+        self.modulus = modulus
+        self.residues = tuple(sorted({r % modulus for r in residues}))
+        self._residue_set = frozenset(self.residues)
+
+    # --------------------------------------------------------------------------
+    # Filters
+    # --------------------------------------------------------------------------
+    def where(self, modulus, *residues):
+        """Keep x with x % modulus in residues (default: 0, i.e. multiples of modulus)."""
+        return self & LazyRange(self.start, self.stop, modulus, residues or (0,))
+
+    def where_not(self, modulus, *residues):
+        """Drop x with x % modulus in residues (default: 0)."""
+        return self - LazyRange(self.start, self.stop, modulus, residues or (0,))
+
+    def __and__(self, other):
+        if not isinstance(other, LazyRange):
+            return NotImplemented
+        start, stop = max(self.start, other.start), min(self.stop, other.stop)
+        _check_size(len(self.residues) * len(other.residues))
+        modulus = math.lcm(self.modulus, other.modulus)
+        residues = set()
+        for r1 in self.residues:
+            for r2 in other.residues:
+                x = _crt(r1, self.modulus, r2, other.modulus)
+                if x is not None:
+                    residues.add(x)
+        return LazyRange(start, max(start, stop), modulus, residues)
+
+    def _common_period(self, other, op):
+        if (self.start, self.stop) != (other.start, other.stop) and len(other) and len(self):
+            if op == "|" or not (other.start <= self.start and self.stop <= other.stop):
+                raise ValueError(
+                    f"'{op}' needs both sides over the same bounds; got "
+                    f"[{self.start}, {self.stop}) and [{other.start}, {other.stop})"
+                )
+        modulus = math.lcm(self.modulus, other.modulus)
+        _check_size(max(len(self.residues) * (modulus // self.modulus),
+                        len(other.residues) * (modulus // other.modulus)))
+        return (modulus,
+                _lift(self.residues, self.modulus, modulus),
+                _lift(other.residues, other.modulus, modulus))
+
+    def __or__(self, other):
+        if not isinstance(other, LazyRange):
+            return NotImplemented
+        if not len(other):
+            return self
+        if not len(self):
+            return other
+        modulus, mine, theirs = self._common_period(other, "|")
+        return LazyRange(self.start, self.stop, modulus, mine | theirs)
+
+    def __sub__(self, other):
+        if not isinstance(other, LazyRange):
+            return NotImplemented
+        if not len(other) or not len(self):
+            return self
+        modulus, mine, theirs = self._common_period(other, "-")
+        return LazyRange(self.start, self.stop, modulus, mine - theirs)
+
+    # --------------------------------------------------------------------------
+    # Sequence protocol, all arithmetic
+    # --------------------------------------------------------------------------
+    def _rank(self, v):
+        """How many x < v match the residue pattern (counted from a fixed origin)."""
+        q, rem = divmod(v, self.modulus)
+        return q * len(self.residues) + bisect.bisect_left(self.residues, rem)
+
+    def __len__(self):
+        if not self.residues:
+            return 0
+        return self._rank(self.stop) - self._rank(self.start)
+
+    def _at(self, i):
+        q, j = divmod(self._rank(self.start) + i, len(self.residues))
+        return q * self.modulus + self.residues[j]
+
+    def __getitem__(self, index):
+        n = len(self)
+        if isinstance(index, slice):
+            return self._slice(index, n)
+        index = index.__index__()
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("LazyRange index out of range")
+        return self._at(index)
+
+    def _slice(self, s, n):
+        first, last, step = s.indices(n)
+        if step < 0:
+            raise ValueError("negative slice steps are not supported; use reversed()")
+        if first >= last:
+            return LazyRange(self.start, self.start, 1, ())
+        start, stop = self._at(first), self._at(last - 1) + 1
+        if step == 1:
+            return LazyRange(start, stop, self.modulus, self.residues)
+        # Every step-th element repeats after lcm(step, |R|) positions, which
+        # span a whole number of periods of the original pattern.
+        positions = math.lcm(step, len(self.residues))
+        _check_size(positions // step)
+        modulus = self.modulus * (positions // len(self.residues))
+        residues = {self._at(first + t * step) for t in range(positions // step)}
+        return LazyRange(start, stop, modulus, residues)
+
+    def __contains__(self, x):
+        if isinstance(x, float):
+            if not x.is_integer():
+                return False
+            x = int(x)
+        elif not isinstance(x, int):
+            return False
+        return self.start <= x < self.stop and x % self.modulus in self._residue_set
+
+    def index(self, x, start=0, stop=None):
+        if x not in self:
+            raise ValueError(f"{x!r} is not in LazyRange")
+        i = self._rank(x) - self._rank(self.start)
+        if i < start or (stop is not None and i >= stop):
+            raise ValueError(f"{x!r} is not in LazyRange")
+        return i
+
+    def count(self, x):
+        return int(x in self)
+
+    def __iter__(self):
+        # Only here do the elements actually get produced
+        if not self.residues:
+            return
+        m, residues = self.modulus, self.residues
+        base = self.start - self.start % m
+        j = bisect.bisect_left(residues, self.start % m)
+        while True:
+            for r in residues[j:]:
+                x = base + r
+                if x >= self.stop:
+                    return
+                yield x
+            base += m
+            j = 0
+
+    def __reversed__(self):
+        for i in range(len(self) - 1, -1, -1):
+            yield self._at(i)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __eq__(self, other):
+        if isinstance(other, (LazyRange, range)):
+            if isinstance(other, range):
+                other = LazyRange(other)
+            n = len(self)
+            if n != len(other):
+                return False
+            if n == 0:
+                return True
+            # Both are periodic with period lcm(m1, m2): agreeing on one full
+            # period (plus the first element of the next) means agreeing everywhere
+            window = len(self.residues) * (math.lcm(self.modulus, other.modulus) // self.modulus)
+            _check_size(window)
+            return all(self._at(i) == other._at(i) for i in range(min(n, window + 1)))
+        return NotImplemented
+
+    __hash__ = None
+
+    def to_range(self):
+        """The equivalent built-in range, if the pattern is a single stride."""
+        n = len(self)
+        if n <= 1:
+            first = self[0] if n else self.start
+            return range(first, first + n)
+        if len(self.residues) == 1:
+            return range(self[0], self[-1] + 1, self.modulus)
+        step = self[1] - self[0]
+        if all(self[i + 1] - self[i] == step for i in range(min(n - 1, len(self.residues)))):
+            return range(self[0], self[-1] + 1, step)
+        raise ValueError("this LazyRange is not a single arithmetic progression")
+
+    def __repr__(self):
+        if len(self.residues) <= 8:
+            res = ", ".join(map(str, self.residues))
+        else:
+            res = ", ".join(map(str, self.residues[:8])) + ", ..."
+        return f"LazyRange({self.start}, {self.stop}, x % {self.modulus} in {{{res}}})"
+
+
+if __name__ == "__main__":
+    print("--- 1. large_evens from comprehensions.py, with len/index/in ---")
+    large_evens = LazyRange(range(10**10)).where(2)
+    print(f"{large_evens}")
+    print(f"len: {len(large_evens):,}, [123_456_789]: {large_evens[123_456_789]:,}, "
+          f"9_999_999_998 in it? {9_999_999_998 in large_evens}")
+
+    print("\n--- 2. div_by_6 from list_comprehensions.py ---")
+    div_by_6 = LazyRange(range(50)).where(2).where(3)
+    print(f"{div_by_6} -> {list(div_by_6)}")
+    print(f"As a built-in range: {div_by_6.to_range()}")
+
+    print("\n--- 3. Unions: div57 from comprehensions.py (Set E6) ---")
+    base = LazyRange(range(100))
+    div57 = base.where(5) | base.where(7)
+    print(f"Same as the set comprehension: "
+          f"{set(div57) == {x for x in range(100) if x % 5 == 0 or x % 7 == 0}}")
+    print(f"len: {len(div57)}, div57[5:10]: {list(div57[5:10])}, every 3rd: {list(div57[::3])}")
+
+    print("\n--- 4. Huge ID spaces ---")
+    ids = LazyRange(range(10**18)).where(7, 3).where_not(2)   # odd, x % 7 == 3
+    print(f"{len(ids):,} ids, the billionth is {ids[10**9 - 1]:,}")
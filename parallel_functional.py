@@ -0,0 +1,255 @@
+"""
+Guide: Parallel map / filter / reduce
+lamda_functions.py chains reduce(lambda x, y: x + y, map(lambda x: x * 2, numbers))
+on a single core. This module keeps the same shape but spreads the work over a
+process (or thread) pool:
+
+- pmap(func, items)                    -> list(map(func, items))
+- pfilter(pred, items)                 -> list(filter(pred, items))
+- preduce(reducer, items, mapper=...)  -> reduce(reducer, map(mapper, items))
+
+How it works:
+1. A few items are run serially first to measure the per-item cost.
+2. If the whole job would finish faster than a pool can start, it simply stays
+   serial (small inputs never pay the pool overhead).
+3. Otherwise the chunk size is picked so that one chunk takes ~50 ms, and the
+   chunks are streamed to the pool with a bounded number in flight.
+4. preduce() reduces each chunk inside its worker, then combines the partial
+   results with a pairwise tree reduction. The reducer must be associative
+   (x + y, max, set union, Counter addition...), but it does NOT need to be
+   commutative: the left-to-right order of the items is preserved.
+
+NOTE: with mode="process", functions are pickled to the workers, so they must
+be defined at module level. Lambdas work with mode="thread" (useful when the
+function releases the GIL, e.g. I/O or NumPy) or with serial execution.
+"""
+
+import functools
+import itertools
+import os
+import pickle
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+SAMPLE_TIME = 0.01        # seconds spent measuring the per-item cost
+TARGET_CHUNK_TIME = 0.05  # aim for chunks that take ~50 ms in a worker
+MIN_PARALLEL_TIME = 0.2   # below this estimated total, stay serial
+
+_MISSING = object()
+
+
+# ==============================================================================
+# 1. CHUNK STAGES (module-level so process pools can pickle them)
+# ==============================================================================
+
+def _map_chunk(func, items):
+    return list(map(func, items))
+
+
+def _filter_chunk(pred, items):
+    return list(filter(pred, items))
+
+
+def _reduce_chunk(reducer, mapper, items):
+    if mapper is not None:
+        items = map(mapper, items)
+    return functools.reduce(reducer, items)
+
+
+def tree_reduce(reducer, values):
+    """
+    Reduce `values` pairwise: ((a+b) + (c+d)) instead of (((a+b)+c)+d).
+    Same result for associative reducers, with log2(n) depth instead of n.
+    """
+    values = list(values)
+    if not values:
+        raise TypeError("tree_reduce() of empty sequence")
+    while len(values) > 1:
+        paired = [reducer(values[i], values[i + 1]) for i in range(0, len(values) - 1, 2)]
+        if len(values) % 2:
+            paired.append(values[-1])
+        values = paired
+    return values[0]
+
+
+# ==============================================================================
+# 2. PLANNING (calibrate, decide serial vs parallel, size the chunks)
+# ==============================================================================
+
+def _calibrate(stage, iterator):
+    """
+    Run `stage` on growing batches from the front of the iterator until about
+    SAMPLE_TIME has passed. Returns (stage outputs, items seen, seconds per item,
+    exhausted). The outputs are real results, so no work is wasted.
+    """
+    outputs, seen, elapsed, batch = [], 0, 0.0, 1
+    while elapsed < SAMPLE_TIME:
+        items = list(itertools.islice(iterator, batch))
+        if not items:
+            return outputs, seen, elapsed / max(seen, 1), True
+        start = time.perf_counter()
+        outputs.append(stage(items))
+        elapsed += time.perf_counter() - start
+        seen += len(items)
+        batch *= 2
+    return outputs, seen, elapsed / seen, False
+
+
+def _plan_chunksize(per_item, remaining, workers, chunksize):
+    if chunksize:
+        return chunksize
+    size = max(1, int(TARGET_CHUNK_TIME / max(per_item, 1e-9)))
+    if remaining is not None:
+        # at least ~4 chunks per worker so the pool stays balanced at the end
+        size = min(size, max(1, -(-remaining // (workers * 4))))
+    return size
+
+
+def _make_executor(mode, workers):
+    if mode == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    if mode == "thread":
+        return ThreadPoolExecutor(max_workers=workers)
+    raise ValueError(f"mode must be 'process', 'thread' or an Executor, got {mode!r}")
+
+
+def _check_picklable(*funcs):
+    for func in funcs:
+        if func is None:
+            continue
+        try:
+            pickle.dumps(func)
+        except Exception as e:
+            raise TypeError(
+                f"{getattr(func, '__name__', func)!r} cannot be sent to worker processes "
+                f"({e}). Define it at module level, or use mode='thread'."
+            ) from None
+
+
+def _run_rest(stage, iterator, outputs):
+    """Finish sequentially. Calibration may have used up every item, and a stage
+    such as preduce's cannot take an empty chunk."""
+    rest = list(iterator)
+    if rest:
+        outputs.append(stage(rest))
+    return outputs
+
+
+def _run(stage, iterable, mode, workers, chunksize, funcs):
+    """Shared driver: returns the list of per-chunk stage outputs, in order."""
+    workers = workers or os.cpu_count() or 1
+    try:
+        remaining = len(iterable)
+    except TypeError:
+        remaining = None
+    iterator = iter(iterable)
+
+    outputs, seen, per_item, exhausted = _calibrate(stage, iterator)
+    if exhausted:
+        return outputs
+    if remaining is not None:
+        remaining -= seen
+    else:
+        # Unknown length: look ahead just far enough to know if a pool pays off
+        lookahead = list(itertools.islice(iterator, int(MIN_PARALLEL_TIME / max(per_item, 1e-9)) + 1))
+        remaining_hint = len(lookahead)
+        iterator = itertools.chain(lookahead, iterator)
+        if remaining_hint * per_item < MIN_PARALLEL_TIME:
+            return _run_rest(stage, iterator, outputs)
+
+    if workers <= 1 or (remaining is not None and remaining * per_item < MIN_PARALLEL_TIME):
+        return _run_rest(stage, iterator, outputs)
+
+    size = _plan_chunksize(per_item, remaining, workers, chunksize)
+    own_executor = not isinstance(mode, Executor)
+    if own_executor and mode == "process":
+        _check_picklable(*funcs)
+    executor = _make_executor(mode, workers) if own_executor else mode
+    try:
+        in_flight = deque()
+        max_in_flight = workers * 2  # bounded, so huge iterators stay streaming
+        while True:
+            items = list(itertools.islice(iterator, size))
+            if items:
+                in_flight.append(executor.submit(stage, items))
+            if in_flight and (not items or len(in_flight) >= max_in_flight):
+                outputs.append(in_flight.popleft().result())
+            if not items and not in_flight:
+                break
+    finally:
+        if own_executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+    return outputs
+
+
+# ==============================================================================
+# 3. PUBLIC API
+# ==============================================================================
+
+def pmap(func, iterable, mode="process", workers=None, chunksize=None):
+    """Parallel list(map(func, iterable)); results keep the input order."""
+    chunks = _run(functools.partial(_map_chunk, func), iterable, mode, workers, chunksize, (func,))
+    return list(itertools.chain.from_iterable(chunks))
+
+
+def pfilter(pred, iterable, mode="process", workers=None, chunksize=None):
+    """Parallel list(filter(pred, iterable)); results keep the input order."""
+    chunks = _run(functools.partial(_filter_chunk, pred), iterable, mode, workers, chunksize, (pred,))
+    return list(itertools.chain.from_iterable(chunks))
+
+
+def preduce(reducer, iterable, initializer=_MISSING, mapper=None,
+            mode="process", workers=None, chunksize=None):
+    """
+    Parallel functools.reduce(reducer, map(mapper, iterable)[, initializer]).
+    `reducer` must be associative. Like reduce(), an empty input returns the
+    initializer, or raises TypeError if there is none.
+    """
+    stage = functools.partial(_reduce_chunk, reducer, mapper)
+    partials = _run(stage, iterable, mode, workers, chunksize, (reducer, mapper))
+    if not partials:
+        if initializer is _MISSING:
+            raise TypeError("preduce() of empty iterable with no initial value")
+        return initializer
+    total = tree_reduce(reducer, partials)
+    return total if initializer is _MISSING else reducer(initializer, total)
+
+
+# Module-level helpers for the demo (lambdas cannot be pickled)
+def _double(x):
+    return x * 2
+
+
+def _is_even(x):
+    return x % 2 == 0
+
+
+def _add(x, y):
+    return x + y
+
+
+def _slow_square(x):
+    total = 0
+    for _ in range(200):
+        total += x * x
+    return total // 200
+
+
+if __name__ == "__main__":
+    print("--- 1. Same chains as lamda_functions.py (small input: runs serially) ---")
+    numbers = [14, 20, 5, 6, 26, 10]
+    print(f"pmap(x*2): {pmap(_double, numbers)}")
+    print(f"preduce(+, map(x*2)): {preduce(_add, numbers, mapper=_double)}")
+    print(f"preduce(+, filter(even)): {preduce(_add, pfilter(_is_even, numbers))}")
+
+    print("\n--- 2. Larger input: calibrated chunks over a process pool ---")
+    big = range(300_000)
+    start = time.perf_counter()
+    serial = functools.reduce(_add, map(_slow_square, big))
+    t_serial = time.perf_counter() - start
+    start = time.perf_counter()
+    parallel = preduce(_add, big, mapper=_slow_square)
+    t_parallel = time.perf_counter() - start
+    print(f"Same result: {serial == parallel}")
+    print(f"Serial: {t_serial:.2f}s, parallel ({os.cpu_count()} cores): {t_parallel:.2f}s")
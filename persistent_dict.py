@@ -0,0 +1,437 @@
+"""
+Guide: Persistent Dict (snapshots and merges without copying)
+dict_guide() in collections_guide.py merges with `user | extra_info`, which
+copies every key of both dicts. Taking a snapshot of a dict (dict(state) or
+state.copy()) is also a full O(n) copy. PersistentDict is an immutable mapping
+stored as a hash array mapped trie (HAMT): a 32-way tree indexed by 5 bits of
+the key's hash per level.
+
+- d.set(k, v) / d.delete(k) return a NEW dict in O(log32 n): only the ~4 nodes
+  on the path to the key are copied, everything else is shared with d.
+- A snapshot is just a reference to a version: O(1), because versions never change.
+- d | other merges structurally; subtrees that are the same object are reused.
+- d.transient() gives a mutable TransientDict for bulk edits. It mutates nodes
+  it created itself in place, and transient.persistent() freezes it in O(1).
+
+Iteration follows hash order, not insertion order as with dict.
+"""
+
+from collections.abc import ItemsView, Mapping, MutableMapping, ValuesView
+
+_BITS = 5
+_WIDTH_MASK = (1 << _BITS) - 1
+_HASH_BITS = 64
+_HASH_MASK = (1 << _HASH_BITS) - 1
+_NODE = object()     # key marker: the value slot holds a child node
+_MISSING = object()
+
+
+def _hash(key):
+    return hash(key) & _HASH_MASK
+
+
+# ==============================================================================
+# 1. TRIE NODES
+# ==============================================================================
+# A node's `array` stores [key0, value0, key1, value1, ...] for the bits set in
+# `bitmap`, in bit order; key _NODE means the value is a child node one level
+# down. Nodes whose `edit` token matches the caller's may be changed in place
+# (that is what makes TransientDict cheap); edit=None means "never".
+
+class _BitmapNode:
+    __slots__ = ("bitmap", "array", "edit")
+
+    def __init__(self, bitmap, array, edit):
+        self.bitmap = bitmap
+        self.array = array
+        self.edit = edit
+
+    def _index(self, bit):
+        return 2 * (self.bitmap & (bit - 1)).bit_count()
+
+    def _set(self, i, value, edit):
+        if edit is not None and self.edit is edit:
+            self.array[i] = value
+            return self
+        array = self.array.copy()
+        array[i] = value
+        return _BitmapNode(self.bitmap, array, edit)
+
+    def _replace(self, i, key, value, edit):
+        if edit is not None and self.edit is edit:
+            self.array[i:i + 2] = key, value
+            return self
+        array = self.array.copy()
+        array[i:i + 2] = key, value
+        return _BitmapNode(self.bitmap, array, edit)
+
+    def find(self, shift, h, key, default):
+        bit = 1 << ((h >> shift) & _WIDTH_MASK)
+        if not self.bitmap & bit:
+            return default
+        i = self._index(bit)
+        k, v = self.array[i], self.array[i + 1]
+        if k is _NODE:
+            return v.find(shift + _BITS, h, key, default)
+        return v if k is key or k == key else default
+
+    def assoc(self, shift, h, key, value, edit, added):
+        bit = 1 << ((h >> shift) & _WIDTH_MASK)
+        i = self._index(bit)
+        if not self.bitmap & bit:
+            added[0] += 1
+            if edit is not None and self.edit is edit:
+                self.array[i:i] = key, value
+                self.bitmap |= bit
+                return self
+            return _BitmapNode(self.bitmap | bit, self.array[:i] + [key, value] + self.array[i:], edit)
+        k, v = self.array[i], self.array[i + 1]
+        if k is _NODE:
+            child = v.assoc(shift + _BITS, h, key, value, edit, added)
+            return self if child is v else self._set(i + 1, child, edit)
+        if k is key or k == key:
+            return self if v is value else self._set(i + 1, value, edit)
+        added[0] += 1
+        child = _pair_node(shift + _BITS, k, v, h, key, value, edit)
+        return self._replace(i, _NODE, child, edit)
+
+    def without(self, shift, h, key, edit, removed):
+        """Node without key, or None if that leaves it empty."""
+        bit = 1 << ((h >> shift) & _WIDTH_MASK)
+        if not self.bitmap & bit:
+            return self
+        i = self._index(bit)
+        k, v = self.array[i], self.array[i + 1]
+        if k is _NODE:
+            child = v.without(shift + _BITS, h, key, edit, removed)
+            if child is v:
+                return self
+            if child is not None:
+                if len(child.array) == 2 and child.array[0] is not _NODE:
+                    # Only one entry left below: pull it up into this node
+                    return self._replace(i, child.array[0], child.array[1], edit)
+                return self._set(i + 1, child, edit)
+        elif not (k is key or k == key):
+            return self
+        else:
+            removed[0] += 1
+        if self.bitmap == bit:
+            return None
+        if edit is not None and self.edit is edit:
+            del self.array[i:i + 2]
+            self.bitmap ^= bit
+            return self
+        return _BitmapNode(self.bitmap ^ bit, self.array[:i] + self.array[i + 2:], edit)
+
+
+class _CollisionNode:
+    """Keys whose full 64-bit hashes are equal: a plain list of pairs."""
+    __slots__ = ("array", "edit")
+
+    def __init__(self, array, edit):
+        self.array = array
+        self.edit = edit
+
+    def _slot(self, key):
+        array = self.array
+        for i in range(0, len(array), 2):
+            if array[i] is key or array[i] == key:
+                return i
+        return -1
+
+    def find(self, shift, h, key, default):
+        i = self._slot(key)
+        return default if i < 0 else self.array[i + 1]
+
+    def assoc(self, shift, h, key, value, edit, added):
+        i = self._slot(key)
+        if i >= 0 and self.array[i + 1] is value:
+            return self
+        array = self.array if edit is not None and self.edit is edit else self.array.copy()
+        if i >= 0:
+            array[i + 1] = value
+        else:
+            added[0] += 1
+            array += [key, value]
+        return self if array is self.array else _CollisionNode(array, edit)
+
+    def without(self, shift, h, key, edit, removed):
+        i = self._slot(key)
+        if i < 0:
+            return self
+        removed[0] += 1
+        if len(self.array) == 2:
+            return None
+        if edit is not None and self.edit is edit:
+            del self.array[i:i + 2]
+            return self
+        return _CollisionNode(self.array[:i] + self.array[i + 2:], edit)
+
+
+def _new_node(shift, edit):
+    return _CollisionNode([], edit) if shift >= _HASH_BITS else _BitmapNode(0, [], edit)
+
+
+def _pair_node(shift, k1, v1, h2, k2, v2, edit):
+    """A fresh node holding two entries (splitting further down if their hash bits match)."""
+    added = [0]
+    node = _new_node(shift, edit)
+    node = node.assoc(shift, _hash(k1), k1, v1, edit, added)
+    return node.assoc(shift, h2, k2, v2, edit, added)
+
+
+def _iter_items(root):
+    if root is None:
+        return
+    stack = [root.array]
+    while stack:
+        array = stack.pop()
+        for i in range(0, len(array), 2):
+            k = array[i]
+            if k is _NODE:
+                stack.append(array[i + 1].array)
+            else:
+                yield k, array[i + 1]
+
+
+def _merge(a, b, shift):
+    """Trie with the entries of both a and b (b wins), reusing shared subtrees."""
+    if a is b:
+        return a
+    added = [0]
+    if shift >= _HASH_BITS:
+        for k, v in _iter_items(b):
+            a = a.assoc(shift, 0, k, v, None, added)
+        return a
+    array = []
+    ia = ib = 0
+    a_array, b_array = a.array, b.array
+    remaining = a.bitmap | b.bitmap
+    while remaining:
+        bit = remaining & -remaining
+        remaining ^= bit
+        if a.bitmap & bit and b.bitmap & bit:
+            ka, va, kb, vb = a_array[ia], a_array[ia + 1], b_array[ib], b_array[ib + 1]
+            if ka is _NODE and kb is _NODE:
+                array += (_NODE, _merge(va, vb, shift + _BITS))
+            elif kb is _NODE:  # a's entry only goes in if b does not have the key
+                ha = _hash(ka)
+                if vb.find(shift + _BITS, ha, ka, _MISSING) is _MISSING:
+                    vb = vb.assoc(shift + _BITS, ha, ka, va, None, added)
+                array += (_NODE, vb)
+            elif ka is _NODE:
+                array += (_NODE, va.assoc(shift + _BITS, _hash(kb), kb, vb, None, added))
+            elif ka is kb or ka == kb:
+                array += (kb, vb)
+            else:
+                array += (_NODE, _pair_node(shift + _BITS, ka, va, _hash(kb), kb, vb, None))
+            ia += 2
+            ib += 2
+        elif a.bitmap & bit:
+            array += a_array[ia:ia + 2]
+            ia += 2
+        else:
+            array += b_array[ib:ib + 2]
+            ib += 2
+    return _BitmapNode(a.bitmap | b.bitmap, array, None)
+
+
+# ==============================================================================
+# 2. THE MAPPINGS
+# ==============================================================================
+
+class _ItemsView(ItemsView):
+    def __iter__(self):
+        return _iter_items(self._mapping._root)
+
+
+class _ValuesView(ValuesView):
+    def __iter__(self):
+        return (v for _, v in _iter_items(self._mapping._root))
+
+
+class _TrieMapping:
+    """Read-only operations shared by PersistentDict and TransientDict."""
+    __slots__ = ()
+
+    def get(self, key, default=None):
+        if self._root is None:
+            return default
+        return self._root.find(0, _hash(key), key, default)
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self):
+        return (k for k, _ in _iter_items(self._root))
+
+    def __len__(self):
+        if self._count is None:  # after a structural merge; counted once
+            self._count = sum(1 for _ in _iter_items(self._root))
+        return self._count
+
+    def items(self):
+        return _ItemsView(self)
+
+    def values(self):
+        return _ValuesView(self)
+
+    def __repr__(self):
+        body = ", ".join(f"{k!r}: {v!r}" for k, v in _iter_items(self._root))
+        return f"{type(self).__name__}({{{body}}})"
+
+
+class PersistentDict(_TrieMapping, Mapping):
+    """Immutable mapping; every "change" returns a new version sharing structure."""
+    __slots__ = ("_root", "_count")
+
+    def __init__(self, *args, **kwargs):
+        self._root, self._count = None, 0
+        if args or kwargs:
+            t = self.transient()
+            t.update(*args, **kwargs)
+            self._root, self._count = t._root, t._count
+
+    @classmethod
+    def _make(cls, root, count):
+        d = cls.__new__(cls)
+        d._root, d._count = root, count
+        return d
+
+    def set(self, key, value):
+        """New version with key -> value."""
+        added = [0]
+        h = _hash(key)
+        root = (self._root or _BitmapNode(0, [], None)).assoc(0, h, key, value, None, added)
+        if root is self._root:
+            return self
+        return self._make(root, None if self._count is None else self._count + added[0])
+
+    def delete(self, key):
+        """New version without key (KeyError if it is missing)."""
+        removed = [0]
+        root = self._root.without(0, _hash(key), key, None, removed) if self._root else None
+        if not removed[0]:
+            raise KeyError(key)
+        return self._make(root, None if self._count is None else self._count - 1)
+
+    def update(self, *args, **kwargs):
+        """New version with many changes, applied through one transient."""
+        t = self.transient()
+        t.update(*args, **kwargs)
+        return t.persistent()
+
+    def transient(self):
+        return TransientDict(self)
+
+    def __or__(self, other):
+        if isinstance(other, PersistentDict):
+            if self._root is None:
+                return other
+            if other._root is None:
+                return self
+            return self._make(_merge(self._root, other._root, 0), None)
+        if isinstance(other, Mapping):
+            return self.update(other)
+        return NotImplemented
+
+    def __ror__(self, other):  # dict | PersistentDict
+        if isinstance(other, Mapping):
+            return PersistentDict(other) | self
+        return NotImplemented
+
+    def __eq__(self, other):
+        if isinstance(other, PersistentDict) and other._root is self._root:
+            return True
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        if len(self) != len(other):
+            return False
+        return all(other.get(k, _MISSING) == v for k, v in _iter_items(self._root))
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return PersistentDict, (dict(_iter_items(self._root)),)
+
+
+class TransientDict(_TrieMapping, MutableMapping):
+    """
+    Mutable builder over a PersistentDict. Nodes it creates are tagged with its
+    own edit token and updated in place; nodes shared with persistent versions
+    are copied first, so those versions never change.
+    """
+    __slots__ = ("_root", "_count", "_edit")
+
+    def __init__(self, source=None):
+        source = source if source is not None else PersistentDict()
+        self._root, self._count = source._root, source._count
+        self._edit = object()
+
+    def __setitem__(self, key, value):
+        added = [0]
+        root = self._root or _BitmapNode(0, [], self._edit)
+        self._root = root.assoc(0, _hash(key), key, value, self._edit, added)
+        if self._count is not None:
+            self._count += added[0]
+
+    def __delitem__(self, key):
+        removed = [0]
+        if self._root is not None:
+            self._root = self._root.without(0, _hash(key), key, self._edit, removed)
+        if not removed[0]:
+            raise KeyError(key)
+        if self._count is not None:
+            self._count -= 1
+
+    def persistent(self):
+        """
+        O(1) snapshot of the current contents. The transient stays usable: it
+        takes a new edit token, so later writes copy instead of mutating nodes
+        the snapshot now shares.
+        """
+        self._edit = object()
+        return PersistentDict._make(self._root, self._count)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from deep_sizeof import deep_sizeof
+
+    print("--- 1. dict_guide() merge, persistently ---")
+    user = PersistentDict(name="Alice", age=25).set("email", "alice@example.com").delete("age")
+    extra_info = PersistentDict({"city": "New York", "name": "Alice Smith"})
+    merged = user | extra_info
+    print(f"Merged: {dict(merged)}")
+    print(f"Original untouched: {dict(user)}")
+
+    print("\n--- 2. 1000 snapshots of a 100k-key state ---")
+    n, versions = 100_000, 1000
+    state = PersistentDict({f"key{i}": i for i in range(n)}).transient()
+    snapshots = []
+    start = time.perf_counter()
+    for v in range(versions):
+        state[f"key{v * 97 % n}"] = -v
+        snapshots.append(state.persistent())
+    elapsed = time.perf_counter() - start
+    plain = {f"key{i}": i for i in range(n)}
+    copy_cost = sys.getsizeof(plain) * versions
+    shared = deep_sizeof(snapshots)
+    print(f"{versions} snapshots in {elapsed * 1000:.1f} ms, {shared / 1e6:.1f} MB in total")
+    print(f"{versions} dict.copy()s would need ~{copy_cost / 1e6:,.0f} MB just for their hash tables")
+    print(f"Snapshot 5 sees key970 = {snapshots[5]['key970']}, latest sees {snapshots[-1]['key970']}")
+
+    print("\n--- 3. Merging two versions that share most of their structure ---")
+    a = snapshots[-1]
+    b = a.update({"key1": "changed", "new": True})
+    start = time.perf_counter()
+    c = a | b
+    print(f"merge: {(time.perf_counter() - start) * 1000:.2f} ms, len={len(c):,}, "
+          f"key1={c['key1']!r}, equals b: {c == b}")
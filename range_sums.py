@@ -0,0 +1,356 @@
+"""
+Guide: Closed-Form Sums over Ranges
+list_comprehensions.py computes sum(x**2 for x in range(1000000)) and
+comprehensions.py computes sum(x for x in range(1000000)) by iterating a
+million Python ints. Both have closed forms (x -> n(n-1)/2, x**2 -> ...).
+
+range_sum(func, r) gives the same answer as sum(func(x) for x in r):
+
+1. Polynomial detection: func is called ONCE with a symbolic stand-in for x.
+   If it only uses +, -, * and integer powers, we get its exact coefficients
+   and sum them in closed form with integer arithmetic (Stirling numbers), so
+   the result is bit-exact for integer polynomials and O(degree^2) regardless
+   of len(r). Anything else (comparisons, %, math.* calls...) makes the trace
+   fail, and we fall back:
+2. NumPy: func is applied to whole chunks of the range as arrays. Every
+   integer operation is checked for possible int64 overflow, and NumPy float
+   errors raise; either sends the chunk to plain Python.
+3. Plain Python: sum(map(func, chunk)) - identical to the generator.
+
+NOTE: polynomials with float coefficients are summed exactly and rounded
+once, which is more accurate than (so not always bit-identical to) the
+float generator. Float NumPy chunks use NumPy's pairwise summation.
+"""
+
+import math
+from fractions import Fraction
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure-Python fallback is used
+    np = None
+
+CHUNK_SIZE = 1 << 16
+
+
+# ==============================================================================
+# 1. SYMBOLIC TRACING: is func a polynomial in x?
+# ==============================================================================
+
+class _NotPolynomial(TypeError):
+    pass
+
+
+def _const(value):
+    """Exact coefficient for a constant, and whether it introduces floats."""
+    if isinstance(value, bool) or not isinstance(value, (int, float, Fraction)):
+        raise _NotPolynomial(f"unsupported constant {value!r}")
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise _NotPolynomial("non-finite constant")
+        return Fraction(value), True
+    return value, False
+
+
+class _Poly:
+    """A polynomial c0 + c1*x + c2*x**2 ... built by running func on this object."""
+    __slots__ = ("coeffs", "is_float")
+
+    def __init__(self, coeffs, is_float=False):
+        coeffs = list(coeffs)
+        while len(coeffs) > 1 and coeffs[-1] == 0:
+            coeffs.pop()
+        self.coeffs = tuple(coeffs)
+        self.is_float = is_float
+
+    def _coerce(self, other):
+        if isinstance(other, _Poly):
+            return other
+        value, is_float = _const(other)
+        return _Poly((value,), is_float)
+
+    def __add__(self, other):
+        other = self._coerce(other)
+        n = max(len(self.coeffs), len(other.coeffs))
+        a = self.coeffs + (0,) * (n - len(self.coeffs))
+        b = other.coeffs + (0,) * (n - len(other.coeffs))
+        return _Poly((x + y for x, y in zip(a, b)), self.is_float or other.is_float)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return _Poly((-c for c in self.coeffs), self.is_float)
+
+    def __pos__(self):
+        return self
+
+    def __sub__(self, other):
+        return self + (-self._coerce(other))
+
+    def __rsub__(self, other):
+        return self._coerce(other) + (-self)
+
+    def __mul__(self, other):
+        other = self._coerce(other)
+        out = [0] * (len(self.coeffs) + len(other.coeffs) - 1)
+        for i, a in enumerate(self.coeffs):
+            if a:
+                for j, b in enumerate(other.coeffs):
+                    out[i + j] += a * b
+        return _Poly(out, self.is_float or other.is_float)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, _Poly):
+            if len(other.coeffs) != 1:
+                raise _NotPolynomial("division by a polynomial")
+            value = other.coeffs[0]
+        else:
+            value, _ = _const(other)
+        if value == 0:
+            raise ZeroDivisionError("division by zero")
+        # x / 2 is a float in Python, so the result is too
+        return _Poly((Fraction(c) / Fraction(value) for c in self.coeffs), True)
+
+    def __pow__(self, exponent):
+        if isinstance(exponent, bool) or not isinstance(exponent, int) or exponent < 0:
+            raise _NotPolynomial("only non-negative integer powers are polynomial")
+        result = _Poly((1,), self.is_float)
+        base = self
+        while exponent:
+            if exponent & 1:
+                result = result * base
+            base = base * base
+            exponent >>= 1
+        return result
+
+    # Anything that needs a concrete value means "not a polynomial"
+    def _reject(self, *args):
+        raise _NotPolynomial("expression depends on the concrete value of x")
+
+    __bool__ = __eq__ = __ne__ = __lt__ = __le__ = __gt__ = __ge__ = _reject
+    __int__ = __float__ = __index__ = __abs__ = _reject
+    __hash__ = None
+
+
+def polynomial_of(func):
+    """
+    Coefficients [c0, c1, ...] of func if it is a polynomial in x, else None.
+    Second item of the returned tuple says whether Python would produce floats.
+    """
+    try:
+        result = func(_Poly((0, 1)))
+    except (TypeError, ZeroDivisionError, AttributeError, ValueError):
+        return None
+    if isinstance(result, _Poly):
+        return list(result.coeffs), result.is_float
+    try:  # func ignored x and returned a constant
+        value, is_float = _const(result)
+    except _NotPolynomial:
+        return None
+    return [value], is_float
+
+
+# ==============================================================================
+# 2. CLOSED FORMS
+# ==============================================================================
+
+@lru_cache(maxsize=None)
+def _stirling2_row(p):
+    """Stirling numbers of the second kind S(p, 0..p)."""
+    row = [1]  # S(0, 0)
+    for n in range(1, p + 1):
+        new = [0] * (n + 1)
+        for k in range(1, n + 1):
+            new[k] = k * (row[k] if k < len(row) else 0) + row[k - 1]
+        row = new
+    return tuple(row)
+
+
+def power_sum(n, p):
+    """
+    sum(k**p for k in range(n)), exactly, in O(p) big-int operations.
+    Uses k**p = sum_j S(p, j) * j! * C(k, j) and sum_k C(k, j) = C(n, j + 1).
+    """
+    if n <= 0:
+        return 0
+    if p == 0:
+        return n
+    return sum(s * math.factorial(j) * math.comb(n, j + 1)
+               for j, s in enumerate(_stirling2_row(p)) if s)
+
+
+def sum_poly(r: range, coeffs):
+    """
+    sum(c0 + c1*x + c2*x**2 + ... for x in r), exactly.
+    x = r.start + r.step * k, so the polynomial is re-expanded in k and each
+    power of k is summed with power_sum().
+    """
+    n = len(r)
+    if n == 0:
+        return 0
+    a, d = r.start, r.step
+    # coefficients of the same polynomial as a function of k
+    in_k = [0] * len(coeffs)
+    for i, c in enumerate(coeffs):
+        if not c:
+            continue
+        # (a + d*k)**i = sum_j C(i, j) a**(i-j) d**j k**j
+        for j in range(i + 1):
+            in_k[j] += c * math.comb(i, j) * a ** (i - j) * d ** j
+    return sum(c * power_sum(n, j) for j, c in enumerate(in_k) if c)
+
+
+def sum_powers(r: range, p):
+    """sum(x**p for x in r), exactly."""
+    return sum_poly(r, [0] * p + [1])
+
+
+# ==============================================================================
+# 3. FALLBACKS (chunked NumPy, then plain Python)
+# ==============================================================================
+
+class _Untrusted(Exception):
+    """An int64 operation that may have wrapped around, or one we cannot check."""
+
+
+if np is not None:
+    _SAFE_UFUNCS = {  # never overflow (or return floats/bools)
+        np.remainder, np.fmod, np.bitwise_and, np.bitwise_or, np.bitwise_xor, np.invert,
+        np.right_shift, np.minimum, np.maximum, np.sign, np.positive, np.true_divide,
+        np.equal, np.not_equal, np.less, np.less_equal, np.greater, np.greater_equal,
+        np.logical_and, np.logical_or, np.logical_xor, np.logical_not,
+    }
+    _SHADOWS = {  # the same operation on exact float64 copies of the inputs
+        np.add: np.add, np.subtract: np.subtract, np.multiply: np.multiply, np.power: np.power,
+        np.negative: np.negative, np.absolute: np.absolute, np.square: np.square,
+        np.floor_divide: np.floor_divide, np.left_shift: lambda a, b: a * np.exp2(b),
+    }
+
+    class _CheckedInts(np.ndarray):
+        """
+        int64 array that refuses to wrap around: every integer operation is
+        repeated in float64 on its (exact) inputs, and a magnitude that could
+        reach 2**62 raises _Untrusted. Reductions and methods that bypass
+        __array_ufunc__ are refused outright.
+        """
+
+        def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+            if method != "__call__" or "out" in kwargs:
+                raise _Untrusted(f"{ufunc.__name__}.{method}")
+            raw = [np.asarray(x) if isinstance(x, np.ndarray) else x for x in inputs]
+            result = ufunc(*raw, **kwargs)
+            if not isinstance(result, np.ndarray):
+                raise _Untrusted(ufunc.__name__)
+            if result.dtype.kind in "iu" and ufunc not in _SAFE_UFUNCS:
+                shadow = _SHADOWS.get(ufunc)
+                if shadow is None:
+                    raise _Untrusted(ufunc.__name__)
+                estimate = shadow(*[np.asarray(x, dtype=np.float64) for x in raw])
+                if not (np.abs(estimate) < 2.0**62).all():
+                    raise _Untrusted(ufunc.__name__)
+            return result.view(_CheckedInts)
+
+        def __array_function__(self, func, types, args, kwargs):
+            if func is not np.where:
+                raise _Untrusted(func.__name__)
+            return super().__array_function__(func, types, args, kwargs)
+
+        def _refuse(self, *args, **kwargs):
+            raise _Untrusted("unchecked ndarray method")
+
+        sum = prod = cumsum = cumprod = dot = trace = astype = __matmul__ = _refuse
+
+
+def _numpy_chunk(func, chunk):
+    """
+    Vectorized sum of func over one range chunk, or None if not applicable.
+    Integer results are exact: any step that could overflow int64 sends the
+    chunk back to plain Python. Float errors (division by zero, overflow) do
+    the same, so the generator's own exception is raised.
+    """
+    if np is None or len(chunk) == 0:
+        return None
+    try:
+        with np.errstate(all="raise"):
+            x = np.arange(chunk.start, chunk.stop, chunk.step, dtype=np.int64).view(_CheckedInts)
+            values = func(x)
+    except Exception:  # _Untrusted, FloatingPointError, or func does not vectorize
+        return None
+    if not isinstance(values, np.ndarray) or values.shape != (len(chunk),):
+        return None
+    values = np.asarray(values)
+    if values.dtype.kind in "iub":
+        # Spot-check the ends against Python ints: catches functions that
+        # vectorize with different semantics
+        for i in (0, len(chunk) - 1):
+            if int(values[i]) != func(chunk[i]):
+                return None
+        if int(np.abs(values).max()) * len(chunk) >= 2**63:
+            return sum(values.tolist())
+        return int(values.sum(dtype=np.int64))
+    if values.dtype.kind == "f":
+        return float(values.sum())
+    return None
+
+
+def _chunked_sum(func, r, chunk_size):
+    total = 0
+    for start in range(0, len(r), chunk_size):
+        chunk = r[start:start + chunk_size]
+        part = _numpy_chunk(func, chunk)
+        if part is None:
+            part = sum(map(func, chunk))
+        total += part
+    return total
+
+
+# ==============================================================================
+# 4. PUBLIC API
+# ==============================================================================
+
+def range_sum(func, r: range, chunk_size=CHUNK_SIZE):
+    """Same result as sum(func(x) for x in r), in closed form when possible."""
+    if not isinstance(r, range):
+        raise TypeError(f"range_sum() needs a range, got {type(r).__name__}")
+    poly = polynomial_of(func)
+    if poly is not None:
+        coeffs, is_float = poly
+        exact = sum_poly(r, coeffs)
+        if is_float:
+            return float(exact) if len(r) else 0
+        if isinstance(exact, Fraction) and exact.denominator == 1:
+            return exact.numerator
+        return exact
+    return _chunked_sum(func, r, chunk_size)
+
+
+if __name__ == "__main__":
+    import time
+
+    def timed(label, thunk):
+        start = time.perf_counter()
+        value = thunk()
+        print(f"{label:<42} {value}  ({(time.perf_counter() - start) * 1e3:.3f} ms)")
+        return value
+
+    print("--- 1. The two sums from the guides ---")
+    a = timed("sum(x**2 for x in range(1000000))", lambda: sum(x**2 for x in range(1000000)))
+    b = timed("range_sum(lambda x: x**2, range(1000000))", lambda: range_sum(lambda x: x**2, range(1000000)))
+    print(f"Bit-exact: {a == b}")
+    c = timed("sum(x for x in range(1000000))", lambda: sum(x for x in range(1000000)))
+    d = timed("range_sum(lambda x: x, range(1000000))", lambda: range_sum(lambda x: x, range(1000000)))
+    print(f"Bit-exact: {c == d}")
+
+    print("\n--- 2. Any polynomial, any range (even huge ones) ---")
+    score = lambda x: 3 * x**3 - 2 * (x - 7)**2 + 11
+    r = range(-500, 10**5, 3)
+    print(f"Matches the generator: {range_sum(score, r) == sum(score(x) for x in r)}")
+    print(f"Over range(10**15): {range_sum(lambda x: x**2, range(10**15))}")
+
+    print("\n--- 3. Non-polynomials fall back to chunked evaluation ---")
+    odd_part = lambda x: x % 7
+    print(f"polynomial_of(x % 7): {polynomial_of(odd_part)}")
+    print(f"Matches the generator: {range_sum(odd_part, range(100000)) == sum(x % 7 for x in range(100000))}")
@@ -0,0 +1,243 @@
+"""
+Guide: Choosing a Record Type (User / Transaction benchmark matrix)
+dataclasses_guide.py and pure_python_guide.py build the same User and
+Transaction two ways. This script adds __slots__ dataclasses, namedtuples and
+plain tuples, then measures each representation on the operations an ingestion
+path pays for, per record:
+
+- build:  instances created per second (from ready-made column lists)
+- access: reading one attribute (username / amount)
+- eq:     comparing with an equal copy
+- hash:   hash(record), or "unhashable"
+- memory: bytes per instance for the record structure itself (instance,
+          attribute storage or tuple) and including its field values
+
+SlottedUser and SlottedTransaction below are drop-in slotted variants of the
+guide classes, for when the numbers say they are worth it.
+
+Usage:
+    python3 record_benchmarks.py --n 1000000 --output records.json
+"""
+
+import argparse
+import itertools
+import json
+import operator
+import platform
+import sys
+import time
+from collections import deque, namedtuple
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List
+
+import dataclasses_guide
+import pure_python_guide
+from comprehension_benchmarks import time_callable
+from deep_sizeof import allocated, deep_sizeof
+
+# ==============================================================================
+# 1. SLOTTED VARIANTS (same fields and behavior as dataclasses_guide.py)
+# ==============================================================================
+
+@dataclass(frozen=True, slots=True)  # slots=True needs Python 3.10+
+class SlottedUser:
+    """dataclasses_guide.User without a per-instance __dict__."""
+    id: int
+    username: str
+    email: str
+    is_active: bool = True
+    tags: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        if "@" not in self.email:
+            print(f"Warning: Invalid email format for {self.username}")
+
+
+@dataclass(slots=True)
+class SlottedTransaction:
+    """dataclasses_guide.Transaction without a per-instance __dict__."""
+    amount: float
+    description: str
+    timestamp: datetime = field(default_factory=datetime.now)
+
+    def display_amount(self):
+        return f"${self.amount:,.2f}"
+
+
+UserTuple = namedtuple("UserTuple", ["id", "username", "email", "is_active", "tags"], defaults=(True, ()))
+TransactionTuple = namedtuple("TransactionTuple", ["amount", "description", "timestamp"])
+
+
+# ==============================================================================
+# 2. THE MATRIX
+# ==============================================================================
+# Every representation is built from the same column lists, so field values
+# (strings, datetimes...) are shared and the memory columns can separate what
+# the record structure costs from what its values cost.
+
+def _user_columns(n):
+    # tags are tuples so the hashable representations can actually be hashed
+    return [
+        list(range(n)),
+        [f"user{i}" for i in range(n)],
+        [f"user{i}@example.com" for i in range(n)],
+        [i % 10 != 0 for i in range(n)],
+        [("python", "dev") if i % 2 else () for i in range(n)],
+    ]
+
+
+def _transaction_columns(n):
+    start = datetime(2024, 1, 1)
+    descriptions = ["Cloud Hosting", "Coffee", "Rent", "Salary", "Groceries"]
+    return [
+        [round(i * 0.37 % 5000, 2) for i in range(n)],
+        [descriptions[i % len(descriptions)] for i in range(n)],
+        [start + timedelta(seconds=i) for i in range(n)],
+    ]
+
+
+RECORDS = {
+    "User": {
+        "columns": _user_columns,
+        "access": "username",
+        "types": {
+            "dataclass": dataclasses_guide.User,
+            "dataclass_slots": SlottedUser,
+            "namedtuple": UserTuple,
+            "tuple": tuple,
+            "manual": pure_python_guide.User,
+        },
+    },
+    "Transaction": {
+        "columns": _transaction_columns,
+        "access": "amount",
+        "types": {
+            "dataclass": dataclasses_guide.Transaction,
+            "dataclass_slots": SlottedTransaction,
+            "namedtuple": TransactionTuple,
+            "tuple": tuple,
+            "manual": pure_python_guide.Transaction,
+        },
+    },
+}
+
+
+def _builder(cls):
+    if cls is tuple:
+        return lambda columns: list(zip(*columns))
+    return lambda columns: list(itertools.starmap(cls, zip(*columns)))
+
+
+def _getter(record, cls):
+    name = RECORDS[record]["access"]
+    if cls is tuple:
+        fields = {"username": 1, "amount": 0}
+        return operator.itemgetter(fields[name])
+    return operator.attrgetter(name)
+
+
+def measure(record, representation, n, repeat=3, memory_sample=100_000):
+    """Benchmark one representation of one record; times are per instance."""
+    cls = RECORDS[record]["types"][representation]
+    columns = RECORDS[record]["columns"](n)
+    build = _builder(cls)
+    getter = _getter(record, cls)
+
+    items = build(columns)
+    copies = build(columns)
+    timings = {
+        "build": time_callable(lambda: build(columns), warmup=0, repeat=repeat, min_time=0),
+        "access": time_callable(lambda: deque(map(getter, items), maxlen=0), 1, repeat, 0),
+        "eq": time_callable(lambda: deque(map(operator.eq, items, copies), maxlen=0), 1, repeat, 0),
+    }
+    try:
+        hash(items[0])
+    except TypeError:
+        pass
+    else:
+        timings["hash"] = time_callable(lambda: deque(map(hash, items), maxlen=0), 1, repeat, 0)
+
+    # Memory is linear in n, so a sample is enough. The structure is measured
+    # with tracemalloc: since 3.11, instance attributes live in an inline values
+    # array that neither getsizeof() nor a reference walk can see.
+    sample = min(n, memory_sample)
+    sample_columns = [col[:sample] for col in columns]
+    with allocated() as alloc:
+        sample_items = build(sample_columns)
+    structure = alloc.net_bytes - sys.getsizeof(sample_items)
+    containers = sys.getsizeof(sample_columns) + sum(map(sys.getsizeof, sample_columns))
+    values = deep_sizeof(sample_columns) - containers
+    del sample_items
+
+    per_item = {op: t["median"] / n for op, t in timings.items()}
+    return {
+        "record": record,
+        "representation": representation,
+        "n": n,
+        "build_per_sec": 1 / per_item["build"],
+        "access_ns": per_item["access"] * 1e9,
+        "eq_ns": per_item["eq"] * 1e9,
+        "eq_by_value": items[0] == copies[0],
+        "hash_ns": per_item["hash"] * 1e9 if "hash" in per_item else None,
+        "bytes_structure": structure / sample,
+        "bytes_with_values": (structure + values) / sample,
+    }
+
+
+def run_matrix(n=1_000_000, records=None, representations=None, repeat=3, memory_sample=100_000):
+    results = []
+    for record in records or RECORDS:
+        for representation in representations or RECORDS[record]["types"]:
+            results.append(measure(record, representation, n, repeat, memory_sample))
+    return {
+        "meta": {
+            "python": sys.version,
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "n": n,
+            "repeat": repeat,
+            "memory_sample": memory_sample,
+        },
+        "results": results,
+    }
+
+
+def print_table(report):
+    current = None
+    for r in report["results"]:
+        if r["record"] != current:
+            current = r["record"]
+            print(f"\n{current} (n={r['n']:,})")
+            print(f"  {'representation':<17}{'build/s':>12}{'access ns':>11}{'eq ns':>9}"
+                  f"{'hash ns':>9}{'B/struct':>10}{'B/total':>9}")
+        hash_ns = f"{r['hash_ns']:.0f}" if r["hash_ns"] is not None else "unhash."
+        eq_ns = f"{r['eq_ns']:.0f}" + ("" if r["eq_by_value"] else "*")
+        print(f"  {r['representation']:<17}{r['build_per_sec']:>12,.0f}{r['access_ns']:>11.1f}"
+              f"{eq_ns:>9}{hash_ns:>9}{r['bytes_structure']:>10.0f}{r['bytes_with_values']:>9.0f}")
+    print("\n  * identity comparison: the class does not define __eq__")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--n", type=int, default=1_000_000, help="instances per representation")
+    parser.add_argument("--records", nargs="+", choices=list(RECORDS))
+    parser.add_argument("--representations", nargs="+",
+                        choices=["dataclass", "dataclass_slots", "namedtuple", "tuple", "manual"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--memory-sample", type=int, default=100_000,
+                        help="instances walked for the memory columns")
+    parser.add_argument("--output", help="also write the JSON report here")
+    args = parser.parse_args(argv)
+
+    report = run_matrix(args.n, args.records, args.representations, args.repeat, args.memory_sample)
+    print_table(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nJSON report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,483 @@
+"""
+Guide: Binary Record Files (mmap random access for User / Transaction)
+pickle and JSON files must be read completely before the first record can be
+used. A RecordFile is laid out so it can be used in place through mmap: the OS
+pages in only what a lookup touches.
+
+    [header 64 B][schema JSON][fixed section: one struct per record]
+    [string heap][index: sorted keys (int64) + record numbers (int64)]
+
+- Fixed section: every record has the same size, so record i is at
+  fixed_offset + i * record_size. ints/floats/bools/(naive) datetimes are packed
+  inline; strings and other values are (offset, length) pairs into the heap.
+- Heap: UTF-8 strings (short repeated ones such as descriptions are stored once)
+  and JSON for lists and other values.
+- Index: a binary search over the sorted key array (key="id" by default) finds
+  the record number in ~log2(n) probes of a memoryview, so a lookup in a 20 GB
+  file touches a handful of pages.
+
+    write_records("users.rec", users)
+    with RecordFile("users.rec") as f:
+        f.get(12345)            # User(...) decoded from one record
+        f.view(7).email         # decodes just that field
+        f.column("is_active")   # one field for every record (NumPy view if available)
+"""
+
+import array
+import bisect
+import dataclasses
+import importlib
+import json
+import mmap
+import shutil
+import struct
+import tempfile
+import typing
+from datetime import datetime
+from operator import attrgetter
+from typing import Iterable
+
+from transaction_ledger import from_micros, to_micros
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; column() then returns lists
+    np = None
+
+_MAGIC = b"RECF"
+_VERSION = 1
+# magic, version, flags, record_size, count, schema_offset, schema_size, fixed_offset, heap_offset, index_offset
+_HEADER = struct.Struct("<4sHHIQQQQQQ")
+_HEADER_SIZE = 64
+_INLINE = {"int": "q", "float": "d", "bool": "?", "datetime": "q"}
+_HEAP_REF = "QI"  # heap offset, byte length
+_DEDUP_MAX_LEN, _DEDUP_MAX_ENTRIES = 64, 1 << 16
+_json_encode = json.JSONEncoder(separators=(",", ":")).encode
+
+
+# ==============================================================================
+# 1. SCHEMA
+# ==============================================================================
+
+def _kind(tp):
+    if tp in (int, float, bool, str, bytes):
+        return tp.__name__
+    if tp is datetime:
+        return "datetime"
+    return "json"  # lists, Optional[...], nested values...
+
+
+def _schema(cls, key):
+    hints = typing.get_type_hints(cls)
+    fields = [(f.name, _kind(hints.get(f.name))) for f in dataclasses.fields(cls) if f.init]
+    kinds = dict(fields)
+    if key == "id" and "id" not in kinds:
+        key = None  # default key only applies when there is an id field
+    if key is not None and kinds.get(key) != "int":
+        raise ValueError(f"index key {key!r} must be an int field")
+    return {"class": f"{cls.__module__}:{cls.__qualname__}", "fields": fields, "key": key}
+
+
+def _struct_for(fields):
+    return struct.Struct("<" + "".join(_INLINE.get(kind, _HEAP_REF) for _, kind in fields))
+
+
+def _field_offsets(fields):
+    """(offset within the record, struct code) per field."""
+    offsets, position = {}, 0
+    for name, kind in fields:
+        code = _INLINE.get(kind, _HEAP_REF)
+        offsets[name] = (position, code)
+        position += struct.calcsize("<" + code)
+    return offsets
+
+
+# ==============================================================================
+# 2. WRITING
+# ==============================================================================
+
+class _Heap:
+    """Collects byte strings for the heap (spooled to a temp file), deduplicating short ones."""
+
+    def __init__(self, f):
+        self.f = f
+        self.size = 0
+        self._seen = {}
+        self._pending = []
+
+    def add(self, data: bytes):
+        n = len(data)
+        if n <= _DEDUP_MAX_LEN:
+            ref = self._seen.get(data)
+            if ref is not None:
+                return ref
+            if len(self._seen) >= _DEDUP_MAX_ENTRIES:
+                self._seen.clear()
+            ref = self._seen[data] = (self.size, n)
+        else:
+            ref = (self.size, n)
+        self._pending.append(data)
+        self.size += n
+        return ref
+
+    def flush(self):
+        self.f.write(b"".join(self._pending))
+        self._pending.clear()
+
+
+def _encoder(schema, heap):
+    """Generated `encode(record) -> bytes` for one schema (like dataclasses' generated methods)."""
+    args = []
+    for name, kind in schema["fields"]:
+        if kind in ("int", "float", "bool"):
+            args.append(f"o.{name}")
+        elif kind == "datetime":
+            args.append(f"_micros(o.{name})")
+        elif kind == "str":
+            args.append(f"*_add(o.{name}.encode())")
+        elif kind == "bytes":
+            args.append(f"*_add(bytes(o.{name}))")
+        else:
+            args.append(f"*_add(_json(o.{name}).encode())")
+    namespace = {"_pack": _struct_for(schema["fields"]).pack, "_add": heap.add,
+                 "_micros": _naive_micros, "_json": _json_encode}
+    exec(f"def encode(o):\n    return _pack({', '.join(args)})", namespace)
+    return namespace["encode"]
+
+
+def _naive_micros(value):
+    """Naive datetime -> epoch µs. The file stores no UTC offset, so aware values are refused."""
+    if value.tzinfo is not None and value.utcoffset() is not None:
+        raise ValueError(f"cannot store timezone-aware datetime {value!r}; "
+                         "convert it to naive UTC first (the file keeps no offset)")
+    return to_micros(value)
+
+
+def write_records(path, records: Iterable, cls=None, key="id", chunk_size=65_536) -> int:
+    """
+    Write dataclass records to `path` in bulk and return how many were
+    written. `key` names the int field to index (default "id", if present);
+    None means records are only addressed by position. Pass cls to write an
+    empty file.
+    """
+    records = iter(records)
+    first = next(records, None)
+    if cls is None:
+        if first is None:
+            raise ValueError("write_records() got no records; pass cls= to write an empty file")
+        cls = type(first)
+    schema = _schema(cls, key)
+    schema_bytes = json.dumps(schema).encode()
+    record_size = _struct_for(schema["fields"]).size
+    keys = array.array("q")
+
+    with open(path, "wb") as f, tempfile.TemporaryFile() as heap_file:
+        heap = _Heap(heap_file)
+        encode = _encoder(schema, heap)
+        key_name = schema["key"]
+        f.write(bytes(_HEADER_SIZE))
+        f.write(schema_bytes)
+        fixed_offset = _align(f)
+
+        count = 0
+        pending = [first] if first is not None else []
+        while True:
+            chunk = pending + [r for _, r in zip(range(chunk_size - len(pending)), records)]
+            pending = []
+            if not chunk:
+                break
+            f.write(b"".join(map(encode, chunk)))
+            heap.flush()
+            if key_name:
+                keys.extend(map(attrgetter(key_name), chunk))
+            count += len(chunk)
+
+        heap_offset = f.tell()
+        heap_file.seek(0)
+        shutil.copyfileobj(heap_file, f, 1 << 20)
+        index_offset = _align(f)
+        if key_name:
+            sorted_keys, order = _sort_index(keys)
+            f.write(sorted_keys)
+            f.write(order)
+
+        f.seek(0)
+        f.write(_HEADER.pack(_MAGIC, _VERSION, 0, record_size, count, _HEADER_SIZE,
+                             len(schema_bytes), fixed_offset, heap_offset, index_offset))
+    return count
+
+
+def _align(f, to=8):
+    position = f.tell()
+    padding = -position % to
+    f.write(bytes(padding))
+    return position + padding
+
+
+def _sort_index(keys):
+    """(keys in sorted order, their record numbers) as int64 bytes; stable for repeated keys."""
+    if np is not None and len(keys):
+        column = np.frombuffer(keys, dtype=np.int64)
+        order = np.argsort(column, kind="stable")
+        return column[order].tobytes(), order.astype(np.int64, copy=False).tobytes()
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    return array.array("q", map(keys.__getitem__, order)).tobytes(), array.array("q", order).tobytes()
+
+
+# ==============================================================================
+# 3. READING
+# ==============================================================================
+
+class RecordView:
+    """Lazy view of one record: each attribute access decodes only that field."""
+    __slots__ = ("_file", "_index")
+
+    def __init__(self, file, index):
+        self._file = file
+        self._index = index
+
+    def __getattr__(self, name):
+        try:
+            return self._file._field(self._index, name)
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def materialize(self):
+        return self._file[self._index]
+
+    def __repr__(self):
+        return f"RecordView({self._file.path!r}, {self._index})"
+
+
+class RecordFile:
+    """Read-only, memory-mapped access to a file written by write_records()."""
+
+    def __init__(self, path, cls=None):
+        self.path = path
+        self._f = open(path, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, _, self.record_size, self.count, schema_offset, schema_size,
+         self._fixed, self._heap, index_offset) = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self._mm.close()
+            self._f.close()
+            raise ValueError(f"{path} is not a version {_VERSION} record file")
+        self.schema = json.loads(self._mm[schema_offset:schema_offset + schema_size])
+        self.fields = [tuple(f) for f in self.schema["fields"]]
+        self.key = self.schema["key"]
+        self.cls = cls or _resolve(self.schema["class"])
+        self._struct = _struct_for(self.fields)
+        self._offsets = _field_offsets(self.fields)
+        self._kinds = dict(self.fields)
+        self._decode = self._decoder()
+
+        self._views = []
+        if self.key:
+            index = memoryview(self._mm)[index_offset:index_offset + 16 * self.count]
+            self._keys = index[:8 * self.count].cast("q")
+            self._positions = index[8 * self.count:].cast("q")
+            self._views += [index, self._keys, self._positions]
+
+    def _decoder(self):
+        """Generated `decode(position) -> record` for this file's schema."""
+        args, j = [], 0
+        for name, kind in self.fields:
+            if kind in ("int", "float", "bool"):
+                args.append(f"{name}=v[{j}]")
+                j += 1
+            elif kind == "datetime":
+                args.append(f"{name}=_from_micros(v[{j}])")
+                j += 1
+            else:
+                convert = {"str": "_str", "bytes": "_bytes"}.get(kind, "_json")
+                args.append(f"{name}={convert}(v[{j}], v[{j + 1}])")
+                j += 2
+        namespace = {"_unpack": self._struct.unpack_from, "_mm": self._mm, "_from_micros": from_micros,
+                     "_str": self._heap_str, "_bytes": self._heap_bytes, "_json": self._heap_json,
+                     "_make": self.cls or dict}
+        exec(f"def decode(pos):\n    v = _unpack(_mm, pos)\n    return _make({', '.join(args)})", namespace)
+        return namespace["decode"]
+
+    def _heap_bytes(self, offset, length):
+        start = self._heap + offset
+        return self._mm[start:start + length]
+
+    def _heap_str(self, offset, length):
+        return self._heap_bytes(offset, length).decode()
+
+    def _heap_json(self, offset, length):
+        return json.loads(self._heap_bytes(offset, length))
+
+    # --------------------------------------------------------------------------
+    # Records
+    # --------------------------------------------------------------------------
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        """Record number i, decoded."""
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("record index out of range")
+        return self._decode(self._fixed + i * self.record_size)
+
+    def __iter__(self):
+        decode, size = self._decode, self.record_size
+        for pos in range(self._fixed, self._fixed + self.count * size, size):
+            yield decode(pos)
+
+    def position(self, key):
+        """Record number of `key` via binary search of the index, or -1."""
+        if not self.key:
+            raise TypeError("this file has no index; use positions")
+        i = bisect.bisect_left(self._keys, key)
+        if i < self.count and self._keys[i] == key:
+            return self._positions[i]
+        return -1
+
+    def get(self, key, default=None):
+        """The record whose key field equals `key` (the first one, if repeated)."""
+        i = self.position(key)
+        return default if i < 0 else self[i]
+
+    def __contains__(self, key):
+        return self.position(key) >= 0
+
+    def view(self, i):
+        return RecordView(self, i)
+
+    # --------------------------------------------------------------------------
+    # Single fields
+    # --------------------------------------------------------------------------
+    def _field(self, i, name):
+        offset, code = self._offsets[name]
+        values = struct.unpack_from("<" + code, self._mm, self._fixed + i * self.record_size + offset)
+        kind = self._kinds[name]
+        if kind == "datetime":
+            return from_micros(values[0])
+        if kind in _INLINE:
+            return values[0]
+        return {"str": self._heap_str, "bytes": self._heap_bytes}.get(kind, self._heap_json)(*values)
+
+    def column(self, name):
+        """
+        One field for every record. Inline fields come back as a strided NumPy
+        view of the mapped file (no copy) when NumPy is installed; heap fields
+        are decoded record by record.
+
+        The view holds its own reference to the mapping: it stays valid after
+        close(), which then leaves unmapping to the last such column, when it is
+        garbage-collected. Use column(name).copy() to detach it from the file.
+        """
+        if self.closed:
+            raise ValueError(f"{self.path} is closed")
+        offset, code = self._offsets[name]
+        kind = self._kinds[name]
+        if kind in _INLINE and np is not None:
+            dtype = np.dtype("<" + code)
+            # np.ndarray(buffer=mmap) does not hold a buffer export, so close() could
+            # unmap memory the array still points to; frombuffer() keeps one
+            raw = np.frombuffer(self._mm, dtype=np.uint8)
+            column = np.ndarray((self.count,), dtype=dtype, buffer=raw,
+                                offset=self._fixed + offset, strides=(self.record_size,))
+            return column.astype("datetime64[us]") if kind == "datetime" else column
+        fmt = struct.Struct(f"<{offset}x{code}{self.record_size - offset - struct.calcsize('<' + code)}x")
+        section = memoryview(self._mm)[self._fixed:self._fixed + self.count * self.record_size]
+        try:
+            values = list(fmt.iter_unpack(section))
+        finally:
+            section.release()
+        if kind in _INLINE:
+            return [from_micros(v[0]) for v in values] if kind == "datetime" else [v[0] for v in values]
+        decode = {"str": self._heap_str, "bytes": self._heap_bytes}.get(kind, self._heap_json)
+        return [decode(*v) for v in values]
+
+    # --------------------------------------------------------------------------
+    # Lifetime
+    # --------------------------------------------------------------------------
+    @property
+    def closed(self):
+        return self._mm is None
+
+    def close(self):
+        if self.closed:
+            return
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._decode = None
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # column() views are still alive; dropping our reference leaves the mapping to them
+        self._mm = None
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"RecordFile({self.path!r}, records={self.count:,}, class={self.schema['class']})"
+
+
+def _resolve(dotted):
+    module, _, qualname = dotted.partition(":")
+    try:
+        obj = importlib.import_module(module)
+        for part in qualname.split("."):
+            obj = getattr(obj, part)
+        return obj
+    except (ImportError, AttributeError):
+        return None  # decode to dicts instead
+
+
+if __name__ == "__main__":
+    import os
+    import pickle
+    import random
+    import time
+
+    from dataclasses_guide import Transaction, User
+
+    folder = tempfile.mkdtemp()
+    n = 1_000_000
+    print(f"--- 1. Write {n:,} Users ---")
+    users = [User(id=i * 7, username=f"user{i}", email=f"user{i}@example.com",
+                  is_active=i % 3 != 0, tags=["python", "dev"] if i % 2 else []) for i in range(n)]
+    rec_path, pkl_path = os.path.join(folder, "users.rec"), os.path.join(folder, "users.pkl")
+    start = time.perf_counter()
+    write_records(rec_path, users)
+    print(f"write_records: {time.perf_counter() - start:.2f}s, {os.path.getsize(rec_path) / 1e6:.0f} MB")
+    with open(pkl_path, "wb") as f:
+        pickle.dump(users, f)
+
+    print("\n--- 2. Point lookups without loading the file ---")
+    start = time.perf_counter()
+    with open(pkl_path, "rb") as f:
+        loaded = pickle.load(f)
+    print(f"pickle.load before the first lookup: {time.perf_counter() - start:.2f}s")
+    del loaded
+    with RecordFile(rec_path) as users_file:
+        ids = [random.randrange(n) * 7 for _ in range(100_000)]
+        start = time.perf_counter()
+        found = [users_file.get(i) for i in ids]
+        elapsed = time.perf_counter() - start
+        print(f"RecordFile.get: {elapsed / len(ids) * 1e6:.1f} us per lookup -> {found[0]}")
+        print(f"Lazy field: view(42).email = {users_file.view(42).email!r}")
+
+        print("\n--- 3. Scanning one field ---")
+        start = time.perf_counter()
+        active = int(sum(users_file.column("is_active")))
+        print(f"{active:,} active users, {time.perf_counter() - start:.3f}s (NumPy: {'yes' if np else 'no'})")
+
+    print("\n--- 4. Transactions (no id field: positional access) ---")
+    tx_path = os.path.join(folder, "tx.rec")
+    write_records(tx_path, (Transaction(i / 4, "Cloud Hosting" if i % 2 else "Coffee") for i in range(1000)))
+    with RecordFile(tx_path) as txs:
+        print(f"{txs}, last: {txs[-1].display_amount()}, heap dedup keeps descriptions once")
+    for path in (rec_path, pkl_path, tx_path):
+        os.remove(path)
@@ -0,0 +1,263 @@
+"""
+Guide: Interning Frozen Records (one shared instance per distinct value)
+dataclasses_guide.User is frozen=True, but it still can't be hashed, because
+`tags` is a list. Even a hashable frozen dataclass recomputes its __hash__ over
+every field on each dict/set lookup. And when the same user shows up in a
+million sessions, a million equal copies are kept.
+
+- frozen_record(User) builds FrozenUser: the same fields with lists turned into
+  tuples and sets into frozensets, the hash computed once in __post_init__ and
+  cached, plus __slots__ and weakref support.
+- InternPool(FrozenUser).intern(record) returns the one canonical instance for
+  that value, the way sys.intern() does for strings. The pool only holds weak
+  references, so canonical records disappear once nothing else uses them.
+
+    users = InternPool(FrozenUser)
+    u = users.intern(User(id=1, username="arthur", email="arthur@example.com", tags=["dev"]))
+    u is users.intern({"id": 1, "username": "arthur", ...})   # True
+"""
+
+import dataclasses
+import typing
+import weakref
+from typing import FrozenSet, Iterable, Tuple
+
+from dataclasses_guide import Transaction, User
+
+_ATOMIC = frozenset({int, float, str, bool, bytes, type(None), complex})
+
+
+# ==============================================================================
+# 1. FROZEN RECORD CLASSES
+# ==============================================================================
+
+
+def freeze(value):
+    """Hashable equivalent of a value: list/tuple -> tuple, set -> frozenset, dict -> tuple of items."""
+    tp = type(value)
+    if tp in _ATOMIC:
+        return value
+    if tp is list or tp is tuple:
+        return tuple(map(freeze, value))
+    if tp is set or tp is frozenset:
+        return frozenset(map(freeze, value))
+    if tp is dict:
+        return tuple((k, freeze(v)) for k, v in value.items())
+    if tp is bytearray:
+        return bytes(value)
+    return value
+
+
+def _frozen_type(tp):
+    """List[X] -> Tuple[X, ...], Set[X] -> FrozenSet[X] (annotations are documentation only)."""
+    origin, args = typing.get_origin(tp) or tp, typing.get_args(tp)
+    if origin is list:
+        return Tuple[args[0], ...] if args else tuple
+    if origin is set:
+        return FrozenSet[args[0]] if args else frozenset
+    return tp
+
+
+def _frozen_default(f):
+    if f.default is not dataclasses.MISSING:
+        return {"default": freeze(f.default)}
+    if f.default_factory is not dataclasses.MISSING:
+        # still a factory: defaults like datetime.now must be evaluated per instance
+        factory = f.default_factory
+        return {"default_factory": lambda: freeze(factory())}  # [] -> (), set() -> frozenset()
+    return {}
+
+
+def frozen_record(cls, name=None):
+    """
+    A frozen, slotted, weak-referenceable copy of dataclass `cls` with cached
+    hashing. Methods (like Transaction.display_amount), properties,
+    class/static methods and __post_init__ checks are carried over.
+    """
+    names = [f.name for f in dataclasses.fields(cls) if f.init]
+    spec = [(f.name, _frozen_type(f.type), dataclasses.field(**_frozen_default(f)))
+            for f in dataclasses.fields(cls) if f.init]
+    spec.append(("_hash", int, dataclasses.field(init=False, repr=False, compare=False)))
+
+    # methods, properties, classmethods, staticmethods and class constants; the
+    # field defaults stored on the class are replaced by slots
+    field_names = {f.name for f in dataclasses.fields(cls)}
+    namespace = {k: v for k, v in vars(cls).items()
+                 if not k.startswith("__") and k not in field_names}
+    original_post_init = getattr(cls, "__post_init__", None)
+
+    # Same approach as @dataclass itself: generate the per-field code once
+    values = ", ".join(f"self.{n}" for n in names)
+    source = "\n".join([
+        "def __post_init__(self):",
+        *[f"    _set(self, {n!r}, _freeze(self.{n}))" for n in names],
+        f"    _set(self, '_hash', hash(({values},)))",
+        "    if _original is not None:",
+        "        _original(self)",
+        "",
+        "def __hash__(self):",
+        "    return self._hash",
+        "",
+        "def __eq__(self, other):",
+        "    if self is other:",
+        "        return True",
+        "    if other.__class__ is not self.__class__:",
+        "        return NotImplemented",
+        f"    return self._hash == other._hash and ({values},) == "
+        f"({', '.join(f'other.{n}' for n in names)},)",
+    ])
+    globals_ = {"_set": object.__setattr__, "_freeze": freeze, "_original": original_post_init}
+    exec(source, globals_)
+    for method in ("__post_init__", "__hash__", "__eq__"):
+        namespace[method] = globals_[method]
+
+    frozen = dataclasses.make_dataclass(
+        name or f"Frozen{cls.__name__}", spec, namespace=namespace,
+        frozen=True, slots=True, weakref_slot=True)  # weakref_slot needs Python 3.11+
+    frozen.__module__ = cls.__module__
+    frozen.__doc__ = f"Frozen, hash-cached variant of {cls.__qualname__}."
+    return frozen
+
+
+FrozenUser = frozen_record(User)
+FrozenTransaction = frozen_record(Transaction)
+FrozenUser.__module__ = FrozenTransaction.__module__ = __name__  # so they pickle from here
+
+
+# ==============================================================================
+# 2. THE POOL
+# ==============================================================================
+
+class InternPool:
+    """
+    Weak canonicalizing table for one frozen record class. Entries are keyed
+    by the cached hash and hold weakref.KeyedRef objects, so the pool keeps
+    neither the records nor copies of their fields alive. (A
+    WeakValueDictionary keyed by the record itself would keep every key alive.)
+    """
+
+    def __init__(self, cls):
+        self.cls = cls
+        self.hits = 0
+        self.misses = 0
+        self._table = {}  # hash -> KeyedRef, or a list of them on hash collisions
+        self_ref = weakref.ref(self)
+
+        def remove(ref, self_ref=self_ref):
+            pool = self_ref()
+            if pool is not None:
+                pool._discard(ref)
+        self._remove = remove
+
+    def _discard(self, ref):
+        entry = self._table.get(ref.key)
+        if entry is ref:
+            del self._table[ref.key]
+        elif type(entry) is list and ref in entry:
+            entry.remove(ref)
+            if not entry:
+                del self._table[ref.key]
+
+    def _coerce(self, record):
+        if type(record) is self.cls:
+            return record
+        if isinstance(record, dict):
+            return self.cls(**record)
+        if isinstance(record, tuple):
+            return self.cls(*record)
+        if dataclasses.is_dataclass(record):
+            return self.cls(**{f.name: getattr(record, f.name) for f in dataclasses.fields(record) if f.init})
+        raise TypeError(f"cannot build {self.cls.__name__} from {type(record).__name__}")
+
+    def intern(self, record):
+        """The canonical instance equal to record (a frozen record, source dataclass, dict or tuple)."""
+        record = self._coerce(record)
+        h = record._hash
+        entry = self._table.get(h)
+        if entry is None:
+            self.misses += 1
+            self._table[h] = weakref.KeyedRef(record, self._remove, h)
+            return record
+        refs = entry if type(entry) is list else [entry]
+        for ref in refs:
+            existing = ref()
+            if existing is not None and existing == record:
+                self.hits += 1
+                return existing
+        # Hash collision (or a dead entry whose callback has not run yet)
+        self.misses += 1
+        live = [ref for ref in refs if ref() is not None]
+        live.append(weakref.KeyedRef(record, self._remove, h))
+        self._table[h] = live[0] if len(live) == 1 else live
+        return record
+
+    def intern_many(self, records: Iterable):
+        return list(map(self.intern, records))
+
+    def __contains__(self, record):
+        record = self._coerce(record)
+        entry = self._table.get(record._hash)
+        refs = entry if type(entry) is list else [entry] if entry is not None else []
+        return any(ref() == record for ref in refs)
+
+    def __len__(self):
+        """Live canonical records."""
+        return sum(sum(r() is not None for r in e) if type(e) is list else e() is not None
+                   for e in self._table.values())
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __repr__(self):
+        return (f"InternPool({self.cls.__name__}, live={len(self):,}, hits={self.hits:,}, "
+                f"misses={self.misses:,})")
+
+
+if __name__ == "__main__":
+    import gc
+    import random
+    import time
+    from deep_sizeof import allocated
+
+    print("--- 1. The guide's User, made hashable ---")
+    u1 = User(id=1, username="arthur", email="arthur@example.com", tags=["python", "dev"])
+    try:
+        hash(u1)
+    except TypeError as e:
+        print(f"hash(User): {e}")
+    users = InternPool(FrozenUser)
+    f1 = users.intern(u1)
+    f2 = users.intern({"id": 1, "username": "arthur", "email": "arthur@example.com", "tags": ["python", "dev"]})
+    print(f"{f1}\nhash cached: {hash(f1) == f1._hash}, same instance: {f1 is f2}, {users}")
+
+    print("\n--- 2. 1,000,000 sessions over 10,000 distinct users ---")
+    rng = random.Random(1)
+    ids = [rng.randrange(10_000) for _ in range(1_000_000)]
+
+    def make(i):
+        return User(id=i, username=f"user{i}", email=f"user{i}@example.com", tags=["python", "dev"])
+
+    with allocated() as plain_alloc:
+        plain = [make(i) for i in ids]
+    with allocated() as interned_alloc:
+        interned = [users.intern(make(i)) for i in ids]
+    print(f"Plain User copies: {plain_alloc.net_bytes / 1e6:.0f} MB, "
+          f"interned: {interned_alloc.net_bytes / 1e6:.0f} MB, {users}")
+
+    print("\n--- 3. Set / dict joins: cached hash vs recomputed tuple hash ---")
+    as_tuples = [(u.id, u.username, u.email, u.is_active, tuple(u.tags)) for u in plain]
+    for label, records in [("tuples", as_tuples), ("interned FrozenUser", interned)]:
+        start = time.perf_counter()
+        for _ in range(3):
+            seen = set(records)
+            index = {r: None for r in records}
+        print(f"{label:<20} {(time.perf_counter() - start) / 3 * 1000:.0f} ms, {len(seen):,} distinct")
+
+    print("\n--- 4. Records vanish from the pool when unused ---")
+    del plain, interned, as_tuples, records, seen, index, f1, f2
+    gc.collect()
+    print(users)
+    tx = InternPool(FrozenTransaction).intern(Transaction(1250.50, "Cloud Hosting"))
+    print(f"{tx.display_amount()} (methods carry over)")
@@ -0,0 +1,197 @@
+"""
+Guide: Single-Pass, Mergeable Statistics
+lamda_functions.py scans `numbers` three times: max(numbers), min(numbers) and
+a reduce() for the sum. RunningStats gets all of them (plus mean, variance and
+approximate quantiles) from ONE pass, and two accumulators can be merged, so
+each chunk or worker process can keep its own and combine them at the end.
+
+- Mean / variance: Welford's online algorithm (numerically stable), merged with
+  Chan et al.'s parallel formula.
+- Quantiles: a fixed-size reservoir sample (default 4096 values). Quantiles
+  from it have a rank error of roughly 1/sqrt(reservoir_size), about 1.6% by
+  default, whatever the length of the stream. Merging takes a weighted sample
+  of both reservoirs, so it is still a uniform sample of the combined stream.
+"""
+
+import math
+import random
+from typing import Iterable, Optional
+
+
+class RunningStats:
+    """Count, sum, min, max, mean, variance and approximate quantiles in one pass."""
+
+    def __init__(self, values: Optional[Iterable[float]] = None, reservoir_size=4096, seed=None):
+        self.count = 0
+        self.sum = 0  # stays an int for int input, like sum()
+        self.min = math.inf
+        self.max = -math.inf
+        self._mean = 0.0
+        self._m2 = 0.0  # sum of squared distances from the mean (Welford)
+        self.reservoir_size = reservoir_size
+        self._reservoir = []
+        self._rng = random.Random(seed)
+        if values is not None:
+            self.update(values)
+
+    # --------------------------------------------------------------------------
+    # Feeding values
+    # --------------------------------------------------------------------------
+    def add(self, x):
+        """Add one value."""
+        self.count += 1
+        self.sum += x
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        delta = x - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (x - self._mean)
+
+        # Reservoir sampling (Algorithm R): keep each value with prob k/count
+        if len(self._reservoir) < self.reservoir_size:
+            self._reservoir.append(x)
+        else:
+            j = self._rng.randrange(self.count)
+            if j < self.reservoir_size:
+                self._reservoir[j] = x
+
+    def update(self, values: Iterable[float]):
+        """Add every value from an iterable (consumed once, so generators are fine)."""
+        add = self.add  # local lookup is faster in the hot loop
+        for x in values:
+            add(x)
+        return self
+
+    # --------------------------------------------------------------------------
+    # Merging (per-chunk / per-worker results)
+    # --------------------------------------------------------------------------
+    def merge(self, other: "RunningStats"):
+        """Fold another accumulator into this one, as if its values were added here."""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.sum = other.count, other.sum
+            self.min, self.max = other.min, other.max
+            self._mean, self._m2 = other._mean, other._m2
+            self._reservoir = list(other._reservoir)
+            return self
+
+        n_a, n_b = self.count, other.count
+        n = n_a + n_b
+        delta = other._mean - self._mean
+        self._mean += delta * n_b / n
+        self._m2 += other._m2 + delta * delta * n_a * n_b / n
+
+        self._reservoir = self._merge_reservoirs(self._reservoir, n_a, other._reservoir, n_b)
+        self.count = n
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def _merge_reservoirs(self, a, n_a, b, n_b):
+        k = self.reservoir_size
+        if len(a) + len(b) <= k:
+            return a + b
+        # Each slot comes from stream A with probability n_a / (n_a + n_b)
+        a, b = a[:], b[:]
+        self._rng.shuffle(a)
+        self._rng.shuffle(b)
+        from_a = sum(1 for _ in range(k) if self._rng.random() * (n_a + n_b) < n_a)
+        from_a = min(max(from_a, k - len(b)), len(a))
+        return a[:from_a] + b[:k - from_a]
+
+    def __iadd__(self, other):
+        return self.merge(other)
+
+    def __add__(self, other):
+        return self.copy().merge(other)
+
+    def copy(self):
+        clone = RunningStats(reservoir_size=self.reservoir_size)
+        clone.merge(self)
+        clone._rng.setstate(self._rng.getstate())
+        return clone
+
+    # --------------------------------------------------------------------------
+    # Results
+    # --------------------------------------------------------------------------
+    @property
+    def mean(self):
+        return self._mean if self.count else math.nan
+
+    @property
+    def variance(self):
+        """Sample variance (n - 1 denominator), like statistics.variance()."""
+        return self._m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def pvariance(self):
+        """Population variance (n denominator), like statistics.pvariance()."""
+        return self._m2 / self.count if self.count else math.nan
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance) if self.count > 1 else math.nan
+
+    def quantile(self, q):
+        """
+        Approximate q-quantile (0 <= q <= 1) from the reservoir, with linear
+        interpolation. Exact while count <= reservoir_size.
+        """
+        if not 0 <= q <= 1:
+            raise ValueError(f"q must be between 0 and 1, got {q}")
+        if not self._reservoir:
+            return math.nan
+        if q == 0:
+            return self.min
+        if q == 1:
+            return self.max
+        data = sorted(self._reservoir)
+        pos = q * (len(data) - 1)
+        lo = math.floor(pos)
+        hi = min(lo + 1, len(data) - 1)
+        return data[lo] + (data[hi] - data[lo]) * (pos - lo)
+
+    def quantiles(self, qs=(0.25, 0.5, 0.75)):
+        return {q: self.quantile(q) for q in qs}
+
+    @property
+    def median(self):
+        return self.quantile(0.5)
+
+    def as_dict(self):
+        return {"count": self.count, "sum": self.sum, "min": self.min, "max": self.max,
+                "mean": self.mean, "variance": self.variance, "stdev": self.stdev,
+                "p50": self.quantile(0.5), "p99": self.quantile(0.99)}
+
+    def __repr__(self):
+        return (f"RunningStats(count={self.count}, mean={self.mean:.6g}, "
+                f"stdev={self.stdev:.6g}, min={self.min}, max={self.max})")
+
+
+if __name__ == "__main__":
+    import statistics
+
+    print("--- 1. One pass instead of max() + min() + reduce() ---")
+    numbers = [14, 20, 5, 6, 26, 10]
+    stats = RunningStats(numbers)
+    print(f"max: {stats.max}, min: {stats.min}, sum: {stats.sum}, mean: {stats.mean:.2f}")
+    print(f"variance: {stats.variance:.2f} (statistics module: {statistics.variance(numbers):.2f})")
+
+    print("\n--- 2. Works on generators (the data is never stored) ---")
+    gen_stats = RunningStats(x * 2 for x in numbers)
+    print(f"Sum of doubled numbers: {gen_stats.sum}")
+
+    print("\n--- 3. Merging per-chunk accumulators ---")
+    rng = random.Random(42)
+    data = [rng.gauss(100, 15) for _ in range(200_000)]
+    chunks = [RunningStats(data[i:i + 50_000], seed=i) for i in range(0, len(data), 50_000)]
+    merged = RunningStats()
+    for chunk in chunks:
+        merged += chunk
+    print(f"Merged: {merged}")
+    print(f"Exact stdev: {statistics.stdev(data):.6g}")
+    print(f"Approx median: {merged.median:.3f}, exact: {statistics.median(data):.3f}")
@@ -0,0 +1,310 @@
+"""
+Guide: Streaming Sensor Pipeline (The GRAND FINALE, at file scale)
+The finale in comprehensions.py splits "type:value:unit" readings, validates
+the value with isdigit(), casts it to float and counts the types with a
+Counter. That works on an in-memory list. This module runs the exact same
+rules over files of any size: the file is read in large binary chunks, records
+that straddle two chunks are stitched back together, and memory stays bounded
+by the chunk size plus one aggregate per sensor type.
+
+For multi-core machines, process_file_parallel() splits one file into
+newline-aligned byte ranges, parses each range in a ProcessPoolExecutor worker
+and merges the partial reports. The result is identical to process_file().
+"""
+
+import collections
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Optional
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024  # 8 MiB per read()
+MIN_SHARD_SIZE = 16 * 1024 * 1024     # smaller shards are not worth a process
+
+
+# ==============================================================================
+# 1. EXACT, ORDER-INDEPENDENT SUMS
+# ==============================================================================
+# A plain running float sum depends on the order of the additions. We keep the
+# sum as a list of non-overlapping partials (Shewchuk's algorithm, the same idea
+# math.fsum uses internally), so the total is exact no matter how the stream
+# was chunked or split, and math.fsum(partials) rounds it once at the end.
+
+def _add_to_partials(partials, values):
+    """Add every float in `values` to the exact partials list (in place)."""
+    for x in values:
+        i = 0
+        for y in partials:
+            if abs(x) < abs(y):
+                x, y = y, x
+            hi = x + y
+            lo = y - (hi - x)
+            if lo:
+                partials[i] = lo
+                i += 1
+            x = hi
+        partials[i:] = [x]
+
+
+class TypeAggregate:
+    """Count, exact sum, min and max for the readings of one sensor type."""
+    __slots__ = ("count", "_partials", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self._partials = []
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add_many(self, values):
+        """Fold a batch of floats into the aggregate."""
+        if not values:
+            return
+        self.count += len(values)
+        _add_to_partials(self._partials, values)
+        self.min = min(self.min, min(values))
+        self.max = max(self.max, max(values))
+
+    def merge(self, other):
+        """Fold another aggregate into this one (used to combine chunks/shards)."""
+        self.count += other.count
+        _add_to_partials(self._partials, other._partials)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def sum(self):
+        return math.fsum(self._partials)
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else math.nan
+
+    def as_dict(self):
+        return {"count": self.count, "sum": self.sum, "min": self.min,
+                "max": self.max, "mean": self.mean}
+
+    def __eq__(self, other):
+        if not isinstance(other, TypeAggregate):
+            return NotImplemented
+        return self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        return (f"TypeAggregate(count={self.count}, sum={self.sum}, "
+                f"min={self.min}, max={self.max})")
+
+
+# ==============================================================================
+# 2. THE REPORT (what the finale's Counter grows into)
+# ==============================================================================
+
+class PipelineReport:
+    """Per-type counts (a Counter, like the finale) plus numeric aggregates."""
+
+    def __init__(self):
+        self.counts = collections.Counter()
+        self.aggregates: Dict[str, TypeAggregate] = {}
+        self.skipped = 0  # malformed records or non-numeric values
+
+    def merge(self, other):
+        """Combine two reports. Merging is exact, so order does not matter."""
+        self.counts.update(other.counts)
+        for name, agg in other.aggregates.items():
+            mine = self.aggregates.get(name)
+            if mine is None:
+                mine = self.aggregates[name] = TypeAggregate()
+            mine.merge(agg)
+        self.skipped += other.skipped
+        return self
+
+    def as_dict(self):
+        return {
+            "counts": dict(sorted(self.counts.items())),
+            "aggregates": {k: self.aggregates[k].as_dict() for k in sorted(self.aggregates)},
+            "skipped": self.skipped,
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, PipelineReport):
+            return NotImplemented
+        return self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        return f"PipelineReport(counts={dict(self.counts)}, skipped={self.skipped})"
+
+
+# ==============================================================================
+# 3. PARSING (same rules as the generator in comprehensions.py)
+# ==============================================================================
+# r.split(":") must give exactly 3 parts, and parts[1].replace('.', '', 1)
+# must be all digits. The bytes version of isdigit() only accepts ASCII digits,
+# which is exactly what float() can parse.
+
+def _parse_lines(lines: Iterable[bytes], report: PipelineReport, names: dict):
+    """Parse complete lines into `report`. `names` caches bytes -> str type names."""
+    batches = {}
+    skipped = 0
+    for line in lines:
+        if len(parts := line.rstrip(b"\r").split(b":")) == 3 \
+                and parts[1].replace(b".", b"", 1).isdigit():
+            key = parts[0]
+            batch = batches.get(key)
+            if batch is None:
+                batch = batches[key] = []
+            batch.append(float(parts[1]))
+        elif line.strip():
+            skipped += 1  # blank lines are not records, so they are not "skipped"
+
+    for key, values in batches.items():
+        name = names.get(key)
+        if name is None:
+            name = names[key] = key.decode("utf-8", "replace")
+        agg = report.aggregates.get(name)
+        if agg is None:
+            agg = report.aggregates[name] = TypeAggregate()
+        agg.add_many(values)
+        report.counts[name] += len(values)
+    report.skipped += skipped
+
+
+def iter_chunks(f, chunk_size=DEFAULT_CHUNK_SIZE, limit: Optional[int] = None):
+    """
+    Yield blocks of complete lines from a binary file object.
+    The partial record at the end of each read() is carried over and glued to
+    the front of the next block, so no record is ever split. If `limit` is
+    given, at most that many bytes are read.
+    """
+    carry = b""
+    remaining = limit
+    while True:
+        size = chunk_size if remaining is None else min(chunk_size, remaining)
+        block = f.read(size) if size > 0 else b""
+        if not block:
+            break
+        if remaining is not None:
+            remaining -= len(block)
+        cut = block.rfind(b"\n")
+        if cut == -1:
+            carry += block  # a single record longer than chunk_size
+            continue
+        yield carry + block[:cut]
+        carry = block[cut + 1:]
+    if carry:
+        yield carry
+
+
+# ==============================================================================
+# 4. PUBLIC API
+# ==============================================================================
+
+def process_lines(readings: Iterable[str]) -> PipelineReport:
+    """Run the pipeline over in-memory strings (e.g. raw_readings in the finale)."""
+    report = PipelineReport()
+    _parse_lines((r.encode("utf-8") for r in readings), report, {})
+    return report
+
+
+def process_stream(f, chunk_size=DEFAULT_CHUNK_SIZE, limit=None, report=None) -> PipelineReport:
+    """Run the pipeline over an open binary file object in one pass."""
+    report = report if report is not None else PipelineReport()
+    names = {}
+    for block in iter_chunks(f, chunk_size, limit):
+        _parse_lines(block.split(b"\n"), report, names)
+    return report
+
+
+def process_file(path, chunk_size=DEFAULT_CHUNK_SIZE) -> PipelineReport:
+    """Run the pipeline over a file on disk with bounded memory."""
+    # buffering=0: our chunks are already large, a second buffer only adds a copy
+    with open(path, "rb", buffering=0) as f:
+        return process_stream(f, chunk_size)
+
+
+# ==============================================================================
+# 5. MULTI-PROCESS SHARDED EXECUTION
+# ==============================================================================
+# Determinism: every field of the report is merged with an order-independent,
+# exact operation (integer counts, exact partial sums, min, max). So however the
+# file is cut into shards, and in whatever order they finish, the merged report
+# equals the single-process one.
+
+def shard_ranges(path, shards):
+    """
+    Split a file into at most `shards` (start, end) byte ranges.
+    Every boundary sits just after a newline, so no record crosses two ranges.
+    """
+    size = os.path.getsize(path)
+    shards = max(1, min(shards, size))
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, shards):
+            pos = max(size * i // shards, bounds[-1])
+            if pos >= size:
+                break
+            f.seek(pos)
+            f.readline()  # move to the start of the next complete record
+            boundary = f.tell()
+            if boundary > bounds[-1] and boundary < size:
+                bounds.append(boundary)
+    bounds.append(size)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+
+def process_range(path, start, end, chunk_size=DEFAULT_CHUNK_SIZE) -> PipelineReport:
+    """Run the pipeline over bytes [start, end) of a file (the worker task)."""
+    with open(path, "rb", buffering=0) as f:
+        f.seek(start)
+        return process_stream(f, chunk_size, limit=end - start)
+
+
+def process_file_parallel(path, workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                          min_shard_size=MIN_SHARD_SIZE) -> PipelineReport:
+    """
+    Run the pipeline over one file on several cores.
+    Falls back to the single-process path when the file is too small to give
+    every worker at least `min_shard_size` bytes.
+    """
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(path)
+    shards = min(workers, max(1, size // max(1, min_shard_size)))
+    if shards <= 1:
+        return process_file(path, chunk_size)
+
+    ranges = shard_ranges(path, shards)
+    report = PipelineReport()
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        futures = [pool.submit(process_range, path, start, end, chunk_size)
+                   for start, end in ranges]
+        for future in futures:  # merge in file order (not required, but tidy)
+            report.merge(future.result())
+    return report
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    print("--- 1. Same input as the GRAND FINALE ---")
+    raw_readings = [
+        "temp:25.5:C", "temp:error:C", "humidity:45:H",
+        "temp:30.2:C", "pressure:1012:P", "humidity:error:H"
+    ]
+    report = process_lines(raw_readings)
+    print(f"Counts: {dict(report.counts)}")
+    print(f"temp aggregate: {report.aggregates['temp']}")
+
+    print("\n--- 2. Chunked file processing (tiny chunks to force split records) ---")
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as tmp:
+        tmp.write("\n".join(raw_readings * 1000) + "\n")
+    try:
+        small = process_file(tmp.name, chunk_size=7)
+        large = process_file(tmp.name)
+        print(f"Counts: {dict(large.counts)}, skipped: {large.skipped}")
+        print(f"Chunk size does not change the result: {small == large}")
+
+        print("\n--- 3. Sharded across processes ---")
+        print(f"Shards: {shard_ranges(tmp.name, 4)}")
+        sharded = process_file_parallel(tmp.name, workers=4, min_shard_size=1)
+        print(f"Identical to the single-process report: {sharded == large}")
+    finally:
+        os.remove(tmp.name)
@@ -0,0 +1,296 @@
+"""
+Guide: Shared-Memory Ring Buffer (a deque between processes)
+comprehensions.py uses collections.deque as a queue inside one process. Between
+processes, multiprocessing.Queue pickles every item, writes it to a pipe and
+copies it again on the other side. RingBuffer instead puts a circular byte
+buffer in multiprocessing.shared_memory: the producer copies bytes in, the
+consumer copies bytes out, and nothing is pickled.
+
+- Single producer, single consumer (SPSC). The producer only ever writes the
+  `head` counter and the consumer only the `tail` counter, so no lock is needed.
+- Records are byte strings: fixed-size (record_size=N) or length-prefixed.
+- push/pop block (with an optional timeout) or return immediately.
+- push_many/pop_many move a whole batch and publish the counters once.
+
+Memory layout (little-endian):
+    [0:64)    header: magic, capacity, record_size, closed flag
+    [64:72)   head  - total bytes ever written (producer-owned cache line)
+    [128:136) tail  - total bytes ever read    (consumer-owned cache line)
+    [192:...) data  - capacity bytes, capacity is a power of two
+
+NOTE: correctness relies on aligned 8-byte stores not being torn or reordered,
+which holds for CPython on x86-64 (and in practice on ARM64, where the GIL's
+memory barriers separate the data copy from the counter update).
+"""
+
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Iterable, List, Optional
+
+_MAGIC = 0x52494E47  # "RING"
+_HEADER = struct.Struct("<IIQQQ")  # magic, reserved, capacity, record_size, closed
+_COUNTER = struct.Struct("<Q")
+_LENGTH = struct.Struct("<I")
+_HEAD_OFFSET, _TAIL_OFFSET, _DATA_OFFSET = 64, 128, 192
+
+_SPIN_SLEEPS = (0, 0, 0, 1e-6, 1e-5, 1e-4, 1e-3)  # backoff while waiting
+
+
+class RingBuffer:
+    """Bounded SPSC byte-record queue in shared memory."""
+
+    def __init__(self, capacity=1 << 20, record_size=0, *, name=None, _attach=False):
+        if _attach:
+            self._shm = _open_existing(name)
+            magic, _, capacity, record_size, _ = _HEADER.unpack_from(self._shm.buf, 0)
+            if magic != _MAGIC:
+                self._shm.close()
+                raise ValueError(f"shared memory {name!r} is not a RingBuffer")
+            self._owner = False
+        else:
+            if capacity < 64 or capacity & (capacity - 1):
+                raise ValueError("capacity must be a power of two >= 64")
+            if record_size and record_size > capacity:
+                raise ValueError("record_size cannot exceed capacity")
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=_DATA_OFFSET + capacity)
+            _HEADER.pack_into(self._shm.buf, 0, _MAGIC, 0, capacity, record_size, 0)
+            _COUNTER.pack_into(self._shm.buf, _HEAD_OFFSET, 0)
+            _COUNTER.pack_into(self._shm.buf, _TAIL_OFFSET, 0)
+            self._owner = True
+        self.capacity = capacity
+        self.record_size = record_size
+        self._mask = capacity - 1
+        self._buf = self._shm.buf
+        self._data = self._buf[_DATA_OFFSET:_DATA_OFFSET + capacity]
+
+    @classmethod
+    def attach(cls, name):
+        """Open a ring created by another process (pass ring.name to the child)."""
+        return cls(name=name, _attach=True)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    # --------------------------------------------------------------------------
+    # Shared counters
+    # --------------------------------------------------------------------------
+    def _head(self):
+        return _COUNTER.unpack_from(self._buf, _HEAD_OFFSET)[0]
+
+    def _tail(self):
+        return _COUNTER.unpack_from(self._buf, _TAIL_OFFSET)[0]
+
+    @property
+    def closed(self):
+        return bool(_HEADER.unpack_from(self._buf, 0)[4])
+
+    def __len__(self):
+        """Bytes currently queued (records for fixed-size rings: divide by record_size)."""
+        return self._head() - self._tail()
+
+    # --------------------------------------------------------------------------
+    # Raw copies with wrap-around
+    # --------------------------------------------------------------------------
+    def _write(self, pos, data):
+        start = pos & self._mask
+        first = min(len(data), self.capacity - start)
+        self._data[start:start + first] = data[:first]
+        if first < len(data):
+            self._data[:len(data) - first] = data[first:]
+
+    def _read(self, pos, size):
+        start = pos & self._mask
+        end = start + size
+        if end <= self.capacity:
+            return bytes(self._data[start:end])
+        return bytes(self._data[start:]) + bytes(self._data[:end - self.capacity])
+
+    def _frame_size(self, record):
+        if self.record_size:
+            if len(record) != self.record_size:
+                raise ValueError(f"records must be exactly {self.record_size} bytes, got {len(record)}")
+            return self.record_size
+        size = _LENGTH.size + len(record)
+        if size > self.capacity:
+            raise ValueError(f"record of {len(record)} bytes cannot fit in a {self.capacity}-byte ring")
+        return size
+
+    # --------------------------------------------------------------------------
+    # Producer side
+    # --------------------------------------------------------------------------
+    def _wait(self, ready, block, timeout):
+        """Spin with backoff until ready() is true. Returns False on timeout / non-blocking."""
+        if ready():
+            return True
+        if not block:
+            return False
+        deadline = None if timeout is None else time.monotonic() + timeout
+        spins = 0
+        while not ready():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            pause = _SPIN_SLEEPS[min(spins, len(_SPIN_SLEEPS) - 1)]
+            if pause:
+                time.sleep(pause)
+            spins += 1
+        return True
+
+    def push(self, record, block=True, timeout=None) -> bool:
+        """Append one record. Returns False if it did not fit (non-blocking or timeout)."""
+        return self.push_many([record], block, timeout) == 1
+
+    def push_many(self, records: Iterable, block=True, timeout=None) -> int:
+        """
+        Append records in order, publishing `head` once per batch of records that
+        fit. Blocks for more space as needed; returns how many were pushed. If a
+        record is invalid, the ones before it are published, then ValueError is raised.
+        """
+        head = self._head()
+        pushed = 0
+        try:
+            for record in records:
+                size = self._frame_size(record)
+                if self.capacity - (head - self._tail()) < size:
+                    _COUNTER.pack_into(self._buf, _HEAD_OFFSET, head)  # let the consumer drain
+                    if not self._wait(lambda: self.capacity - (head - self._tail()) >= size, block, timeout):
+                        return pushed
+                if self.record_size:
+                    self._write(head, record)
+                else:
+                    self._write(head, _LENGTH.pack(len(record)))
+                    self._write(head + _LENGTH.size, record)
+                head += size
+                pushed += 1
+        finally:
+            # publish after the data; on an error, the records before it are still delivered
+            _COUNTER.pack_into(self._buf, _HEAD_OFFSET, head)
+        return pushed
+
+    def close_writer(self):
+        """Mark the stream finished; the consumer gets EOFError once it is drained."""
+        magic, reserved, capacity, record_size, _ = _HEADER.unpack_from(self._buf, 0)
+        _HEADER.pack_into(self._buf, 0, magic, reserved, capacity, record_size, 1)
+
+    # --------------------------------------------------------------------------
+    # Consumer side
+    # --------------------------------------------------------------------------
+    def pop(self, block=True, timeout=None) -> Optional[bytes]:
+        """
+        Remove and return the oldest record. Returns None if nothing arrived
+        (non-blocking or timeout); raises EOFError when the writer closed and
+        the ring is empty.
+        """
+        batch = self.pop_many(1, block, timeout)
+        return batch[0] if batch else None
+
+    def pop_many(self, max_records=1024, block=True, timeout=None) -> List[bytes]:
+        """Remove up to max_records available records; waits only for the first one."""
+        tail = self._tail()
+        if not self._wait(lambda: self._head() != tail or self.closed, block, timeout):
+            return []
+        head = self._head()
+        if head == tail:
+            if self.closed and self._head() == tail:
+                raise EOFError("ring buffer closed by the writer")
+            return []
+        out = []
+        while tail != head and len(out) < max_records:
+            if self.record_size:
+                size = self.record_size
+                out.append(self._read(tail, size))
+            else:
+                (length,) = _LENGTH.unpack(self._read(tail, _LENGTH.size))
+                out.append(self._read(tail + _LENGTH.size, length))
+                size = _LENGTH.size + length
+            tail += size
+        _COUNTER.pack_into(self._buf, _TAIL_OFFSET, tail)  # publish after the copies
+        return out
+
+    def __iter__(self):
+        """Blocking iteration until the writer closes the ring."""
+        while True:
+            try:
+                yield from self.pop_many()
+            except EOFError:
+                return
+
+    # --------------------------------------------------------------------------
+    # Lifetime
+    # --------------------------------------------------------------------------
+    def close(self):
+        """Detach from the shared memory; the creating process also unlinks it."""
+        if self._shm is None:
+            return
+        self._data.release()
+        self._data = self._buf = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"RingBuffer(name={self.name!r}, capacity={self.capacity}, record_size={self.record_size})"
+
+
+def _open_existing(name):
+    try:  # Python 3.13+: do not let this process's resource tracker unlink it
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+# Module-level so it can be the target of a spawned process
+def _produce(name, count, payload_size, batch):
+    ring = RingBuffer.attach(name)
+    payload = b"x" * payload_size
+    for start in range(0, count, batch):
+        ring.push_many([payload] * min(batch, count - start))
+    ring.close_writer()
+    ring.close()
+
+
+def _produce_queue(queue, count, payload_size):
+    payload = b"x" * payload_size
+    for _ in range(count):
+        queue.put(payload)
+    queue.put(None)
+
+
+if __name__ == "__main__":
+    import multiprocessing as mp
+    from collections import deque
+
+    print("--- 1. Same idea as the deque example ---")
+    queue = deque([1, 2, 3])
+    with RingBuffer(capacity=1024) as ring:
+        ring.push_many(str(x).encode() for x in queue)
+        print(f"Popped: {[int(r) for r in ring.pop_many()]}")
+
+    print("\n--- 2. Cross-process handoff: RingBuffer vs multiprocessing.Queue ---")
+    count, size = 200_000, 100
+    with RingBuffer(capacity=1 << 22) as ring:
+        start = time.perf_counter()
+        producer = mp.Process(target=_produce, args=(ring.name, count, size, 256))
+        producer.start()
+        received = sum(1 for _ in ring)
+        producer.join()
+        t_ring = time.perf_counter() - start
+    print(f"RingBuffer: {received:,} records in {t_ring:.2f}s")
+
+    q = mp.Queue()
+    start = time.perf_counter()
+    producer = mp.Process(target=_produce_queue, args=(q, count, size))
+    producer.start()
+    received = 0
+    while q.get() is not None:
+        received += 1
+    producer.join()
+    print(f"mp.Queue:   {received:,} records in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,320 @@
+"""
+Guide: Low-Overhead Tracing (debug_log for production)
+debug_log in metaprogramming.py prints every call's arguments and result. That
+is fine for a demo and unusable on a hot function, and turning it off means
+removing the decorator. @trace records instead of printing:
+
+- Disabled (tracer.disable()): the wrapper checks one flag and calls through.
+- Enabled: every call is counted; sampled calls (all of them, 1-in-N with
+  sample=N, or a fraction with rate=0.01) are timed with perf_counter_ns.
+- Each sampled call goes into a log-bucketed latency histogram (8 buckets per
+  power of two, so percentiles are within ~6%) and into a bounded ring buffer
+  of recent events. Nothing is printed until you ask:
+
+    @trace(sample=100)
+    def add(a, b): ...
+
+    TRACER.report()          # calls, errors, p50 / p99 / max per function
+    TRACER.events(last=20)   # the most recent sampled calls
+
+A disabled wrapper still costs one extra Python call. Set TRACING=0 in the
+environment before the import to compile tracing out: @trace then returns the
+function itself, with zero overhead (like asserts under python -O).
+
+Counters are plain integer updates, with no lock. Under heavy thread contention
+an occasional increment can be lost, which is the usual trade-off for
+always-on statistics.
+"""
+
+import functools
+import inspect
+import itertools
+import json
+import math
+import os
+import random
+import time
+from collections import deque, namedtuple
+from typing import Dict, Optional
+
+_SUB_BITS = 3                      # 8 sub-buckets per power of two
+_SUB = 1 << _SUB_BITS
+_LINEAR = 2 * _SUB                 # values below 16 ns get exact buckets
+_BUCKETS = _LINEAR + _SUB * 64
+
+Event = namedtuple("Event", ["time_ns", "name", "duration_ns", "error", "args", "result"])
+
+
+def _bucket(ns):
+    if ns < _LINEAR:
+        return ns if ns > 0 else 0
+    bits = ns.bit_length()
+    return _LINEAR + (bits - _SUB_BITS - 2) * _SUB + ((ns >> (bits - _SUB_BITS - 1)) & (_SUB - 1))
+
+
+def _bucket_bounds(index):
+    """[low, high) nanoseconds covered by a histogram bucket."""
+    if index < _LINEAR:
+        return index, index + 1
+    k = index - _LINEAR
+    shift = k // _SUB + 1
+    low = (_SUB + k % _SUB) << shift
+    return low, low + (1 << shift)
+
+
+def _format_ns(ns):
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if ns >= scale:
+            return f"{ns / scale:.3g} {unit}"
+    return f"{ns:.0f} ns"
+
+
+class FunctionStats:
+    """Counters and latency histogram for one traced function."""
+    __slots__ = ("name", "calls", "sampled", "errors", "total_ns", "max_ns",
+                 "histogram", "sample", "rate", "countdown")
+
+    def __init__(self, name, sample=1, rate=None):
+        self.name = name
+        self.histogram = [0] * _BUCKETS
+        self.set_sampling(sample, rate)
+        self.reset()
+
+    def set_sampling(self, sample=1, rate=None):
+        if rate is not None and not 0 < rate <= 1:
+            raise ValueError("rate must be in (0, 1]")
+        if sample < 1:
+            raise ValueError("sample must be >= 1")
+        self.sample, self.rate = sample, rate
+        self.countdown = self._next_countdown()
+
+    def _next_countdown(self):
+        """Calls until the next sample. A rate becomes a geometric skip length,
+        so both modes share the same cheap countdown on the hot path."""
+        if self.rate is None or self.rate >= 1:
+            return self.sample if self.rate is None else 1
+        return 1 + int(math.log(1.0 - random.random()) / math.log(1.0 - self.rate))
+
+    def reset(self):
+        self.calls = self.sampled = self.errors = self.total_ns = self.max_ns = 0
+        self.histogram[:] = [0] * _BUCKETS
+
+    def record(self, ns):
+        self.sampled += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        self.histogram[_bucket(ns)] += 1
+
+    def percentile(self, q):
+        """Latency (ns) at percentile q (0-100), from the histogram bucket midpoint."""
+        if not self.sampled:
+            return None
+        target = max(1, math.ceil(self.sampled * q / 100))
+        seen = 0
+        for index, count in enumerate(self.histogram):
+            seen += count
+            if seen >= target:
+                low, high = _bucket_bounds(index)
+                return min((low + high) / 2, self.max_ns)
+        return self.max_ns
+
+    @property
+    def mean_ns(self):
+        return self.total_ns / self.sampled if self.sampled else None
+
+    def as_dict(self):
+        return {
+            "calls": self.calls, "sampled": self.sampled, "errors": self.errors,
+            "mean_ns": self.mean_ns, "p50_ns": self.percentile(50),
+            "p90_ns": self.percentile(90), "p99_ns": self.percentile(99), "max_ns": self.max_ns,
+            "histogram": {f"{_bucket_bounds(i)[0]}": c for i, c in enumerate(self.histogram) if c},
+        }
+
+    def __repr__(self):
+        return f"FunctionStats({self.name}, calls={self.calls}, sampled={self.sampled})"
+
+
+class Tracer:
+    """Owns the on/off switch, per-function stats and the event ring buffer."""
+
+    def __init__(self, buffer_size=10_000, enabled=True, compiled_out=False):
+        self.enabled = enabled
+        self.compiled_out = compiled_out  # decorate nothing at all
+        self.functions: Dict[str, FunctionStats] = {}
+        self._events = deque(maxlen=buffer_size)
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    # --------------------------------------------------------------------------
+    # Decorating
+    # --------------------------------------------------------------------------
+    def trace(self, func=None, *, sample=1, rate=None, capture=False, name=None):
+        """
+        Decorator. sample=N times one call in N; rate=p times a fraction p of
+        calls. capture=True keeps args/result in the ring buffer (the objects
+        are kept alive until they are evicted).
+        """
+        if func is None:
+            return functools.partial(self.trace, sample=sample, rate=rate, capture=capture, name=name)
+        if self.compiled_out:
+            return func
+        label = name or f"{func.__module__}.{func.__qualname__}"
+        if label in self.functions:
+            if name is not None:
+                raise ValueError(f"a traced function is already named {name!r}")
+            # lambdas, or closures from one factory, share a qualname: keep them apart
+            label = next(f"{label}#{n}" for n in itertools.count(2) if f"{label}#{n}" not in self.functions)
+        stats = self.functions[label] = FunctionStats(label, sample, rate)
+        events = self._events
+        perf_ns, wall_ns = time.perf_counter_ns, time.time_ns
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return await func(*args, **kwargs)
+                stats.calls += 1
+                stats.countdown -= 1
+                if stats.countdown > 0:
+                    return await func(*args, **kwargs)
+                stats.countdown = stats._next_countdown()
+                error = result = None
+                start = perf_ns()
+                try:
+                    result = await func(*args, **kwargs)
+                    return result
+                except BaseException as e:
+                    stats.errors += 1
+                    error = type(e).__name__
+                    raise
+                finally:
+                    elapsed = perf_ns() - start
+                    stats.record(elapsed)
+                    events.append(Event(wall_ns(), label, elapsed, error,
+                                        (args, kwargs) if capture else None, result if capture else None))
+            async_wrapper.stats = stats
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return func(*args, **kwargs)
+            stats.calls += 1
+            stats.countdown -= 1
+            if stats.countdown > 0:
+                return func(*args, **kwargs)
+            stats.countdown = stats._next_countdown()
+            error = result = None
+            start = perf_ns()
+            try:
+                result = func(*args, **kwargs)
+                return result
+            except BaseException as e:
+                stats.errors += 1
+                error = type(e).__name__
+                raise
+            finally:
+                elapsed = perf_ns() - start
+                stats.record(elapsed)
+                events.append(Event(wall_ns(), label, elapsed, error,
+                                    (args, kwargs) if capture else None, result if capture else None))
+        wrapper.stats = stats
+        return wrapper
+
+    def set_sampling(self, name, sample=1, rate=None):
+        """Change a function's sampling at runtime, without redecorating."""
+        self.functions[name].set_sampling(sample, rate)
+
+    # --------------------------------------------------------------------------
+    # Reading the data
+    # --------------------------------------------------------------------------
+    def events(self, last=None, name=None):
+        """Recent sampled calls, oldest first."""
+        events = list(self._events)
+        if name is not None:
+            events = [e for e in events if e.name == name]
+        return events[-last:] if last else events
+
+    def stats(self, name: Optional[str] = None):
+        if name is not None:
+            return self.functions[name].as_dict()
+        return {n: s.as_dict() for n, s in self.functions.items()}
+
+    def report(self):
+        lines = [f"{'function':<40}{'calls':>12}{'sampled':>10}{'errors':>8}"
+                 f"{'p50':>10}{'p99':>10}{'max':>10}"]
+        for name, s in sorted(self.functions.items(), key=lambda item: -item[1].calls):
+            if not s.calls:
+                continue
+            p50, p99 = s.percentile(50), s.percentile(99)
+            lines.append(f"{name[-40:]:<40}{s.calls:>12,}{s.sampled:>10,}{s.errors:>8,}"
+                         f"{_format_ns(p50) if p50 is not None else '-':>10}"
+                         f"{_format_ns(p99) if p99 is not None else '-':>10}"
+                         f"{_format_ns(s.max_ns):>10}")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """Write stats (with histograms) and the event buffer as JSON."""
+        with open(path, "w") as f:
+            json.dump({"functions": self.stats(),
+                       "events": [{**e._asdict(), "args": None, "result": None} for e in self._events]},
+                      f, indent=2)
+
+    def reset(self):
+        for stats in self.functions.values():
+            stats.reset()
+        self._events.clear()
+
+
+TRACER = Tracer(compiled_out=os.environ.get("TRACING", "1") == "0")
+trace = TRACER.trace
+
+
+if __name__ == "__main__":
+    import timeit
+
+    print("--- 1. debug_log's add(), traced instead of printed ---")
+
+    @trace(capture=True)
+    def add(a, b):
+        return a + b
+
+    add(5, 10)
+    print(f"Last event: {TRACER.events(last=1)[0]}")
+
+    print("\n--- 2. Overhead per call ---")
+
+    def plain(x):
+        return x
+
+    sampled = trace(sample=100, name="sampled")(plain)
+    every = trace(name="every call")(plain)
+    n = 1_000_000
+    base = min(timeit.repeat(lambda: plain(1), number=n, repeat=3))
+    for label, func, enabled in [("disabled", every, False), ("1-in-100", sampled, True),
+                                 ("every call", every, True)]:
+        TRACER.enabled = enabled
+        t = min(timeit.repeat(lambda: func(1), number=n, repeat=3))
+        print(f"{label:<12} +{(t - base) / n * 1e9:6.0f} ns per call")
+    TRACER.enable()
+
+    print("\n--- 3. Percentiles from the histogram ---")
+
+    @trace(rate=0.5)
+    def handle(request):
+        time.sleep(0.002 if request % 50 == 0 else 0.0001)  # 2% slow requests
+        if request % 97 == 0:
+            raise ValueError("bad request")
+        return request
+
+    for r in range(1, 1001):
+        try:
+            handle(r)
+        except ValueError:
+            pass
+    print(TRACER.report())
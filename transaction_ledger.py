@@ -0,0 +1,345 @@
+"""
+Guide: Transaction Ledger (millions of Transactions without Transaction objects)
+dataclasses_guide.py handles one Transaction(amount, description, timestamp) at
+a time. A Ledger stores the same data column-wise in a RecordStore
+(columnar_records.py), in the form that aggregates fastest:
+
+- amount      -> int64 cents           ("1250.50" -> 125050, exact, no float drift)
+- timestamp   -> int64 epoch microseconds
+- description -> int32 code into a dictionary ("Cloud Hosting" is stored once)
+
+Bulk loaders read CSV or JSON lines in chunks straight into the columns. Totals
+by description and by tumbling or sliding time windows run over whole columns
+(NumPy when installed, plain loops otherwise). Amounts stay integer cents until
+display_amount() formats them for output.
+"""
+
+import array
+import csv
+import itertools
+import json
+import math
+import sys
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Iterable, List, Tuple
+
+from columnar_records import RecordStore
+from dataclasses_guide import Transaction
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; aggregates fall back to loops
+    np = None
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_US = 1_000_000
+
+
+# ==============================================================================
+# 1. CONVERSIONS
+# ==============================================================================
+
+def parse_cents(text) -> int:
+    """'1,250.50' / '-4.5' / '$3' -> integer cents, without going through float."""
+    s = str(text).strip().replace(",", "").replace("$", "")
+    negative = s.startswith("-")
+    whole, _, frac = s.lstrip("+-").partition(".")
+    if len(frac) > 2:  # more precision than cents: round half up, like display_amount
+        cents = int(Decimal(s.lstrip("+-")).quantize(Decimal("0.01"), ROUND_HALF_UP) * 100)
+    else:
+        cents = int(whole or 0) * 100 + int(frac.ljust(2, "0"))
+    return -cents if negative else cents
+
+
+def to_cents(amount) -> int:
+    """Float amounts (as in Transaction.amount) -> cents."""
+    return parse_cents(amount) if isinstance(amount, str) else round(amount * 100)
+
+
+def to_micros(value) -> int:
+    """datetime (naive datetimes are treated as UTC), ISO string or epoch seconds -> epoch µs."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            value = float(value)
+    if isinstance(value, datetime):
+        delta = value - (_EPOCH_UTC if value.tzinfo else _EPOCH)
+        return (delta.days * 86_400 + delta.seconds) * _US + delta.microseconds
+    return round(value * _US)
+
+
+def from_micros(us) -> datetime:
+    return _EPOCH + timedelta(microseconds=us)
+
+
+def display_amount(cents) -> str:
+    """Same format as Transaction.display_amount(), from integer cents."""
+    whole, frac = divmod(abs(round(cents)), 100)
+    return f"{'-' if cents < 0 else ''}${whole:,}.{frac:02d}"
+
+
+def _micros(width):
+    return round(width.total_seconds() * _US) if isinstance(width, timedelta) else round(width * _US)
+
+
+class Totals(namedtuple("Totals", ["count", "cents"])):
+    """Count and total (in cents) for one group."""
+    __slots__ = ()
+
+    @property
+    def average_cents(self):
+        return self.cents / self.count if self.count else 0.0
+
+    def format(self):
+        return f"{self.count:>10,}  {display_amount(self.cents):>18}  avg {display_amount(self.average_cents):>12}"
+
+
+# ==============================================================================
+# 2. THE LEDGER
+# ==============================================================================
+
+class Ledger:
+    """Column store of transactions with a description dictionary."""
+
+    def __init__(self):
+        self.store = RecordStore("Transaction", {"cents": "q", "time_us": "q", "code": "i"})
+        self.descriptions: List[str] = []       # code -> description
+        self._codes: Dict[str, int] = {}         # description -> code
+
+    def __len__(self):
+        return len(self.store)
+
+    def code_for(self, description) -> int:
+        code = self._codes.get(description)
+        if code is None:
+            code = self._codes[description] = len(self.descriptions)
+            self.descriptions.append(description)
+        return code
+
+    # --------------------------------------------------------------------------
+    # Loading
+    # --------------------------------------------------------------------------
+    def _extend(self, cents, times, codes):
+        self.store.extend_columns(cents=array.array("q", cents), time_us=array.array("q", times),
+                                  code=array.array("i", codes))
+
+    def _load_rows(self, rows: Iterable[Tuple], chunk_size):
+        """
+        rows yield (amount_text_or_number, description, timestamp) tuples.
+        All or nothing: if any row fails, the chunks already appended are
+        removed again and the ledger is left as it was.
+        """
+        code_for, loaded = self.code_for, 0
+        start_rows, start_descriptions = len(self), len(self.descriptions)
+        rows = iter(rows)
+        try:
+            while True:
+                chunk = list(itertools.islice(rows, chunk_size))
+                if not chunk:
+                    return loaded
+                amounts, descriptions, stamps = zip(*chunk)
+                self._extend(list(map(to_cents, amounts)), list(map(to_micros, stamps)),
+                             list(map(code_for, descriptions)))
+                loaded += len(chunk)
+        except BaseException:
+            columns = self.store._columns
+            for name, column in columns.items():
+                try:
+                    del column[start_rows:]
+                except BufferError:  # a column() view is alive: swap in a truncated copy instead
+                    columns[name] = column[:start_rows]
+            for description in self.descriptions[start_descriptions:]:
+                del self._codes[description]
+            del self.descriptions[start_descriptions:]
+            raise
+
+    def load_csv(self, path, columns=("amount", "description", "timestamp"), chunk_size=100_000, **csv_options):
+        """
+        Append rows from a CSV file with a header row. `columns` names the
+        amount, description and timestamp columns. Returns the rows loaded.
+        """
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f, **csv_options)
+            header = next(reader)
+            picks = [header.index(name) for name in columns]
+            reader = filter(None, reader)  # blank lines (e.g. a trailing one) come back as []
+            if picks == [0, 1, 2] and len(header) == 3:
+                rows = map(tuple, reader)
+            else:
+                rows = ((row[picks[0]], row[picks[1]], row[picks[2]]) for row in reader)
+            return self._load_rows(rows, chunk_size)
+
+    def load_jsonl(self, path, columns=("amount", "description", "timestamp"), chunk_size=100_000):
+        """Append rows from a JSON-lines file (one object per line)."""
+        a, d, t = columns
+        with open(path, "rb") as f:
+            objects = map(json.loads, filter(bytes.strip, f))
+            return self._load_rows(((o[a], o[d], o[t]) for o in objects), chunk_size)
+
+    def extend(self, transactions: Iterable):
+        """Append Transaction objects (dataclasses_guide or pure_python_guide)."""
+        return self._load_rows(((t.amount, t.description, t.timestamp) for t in transactions), 100_000)
+
+    def append(self, amount, description, timestamp):
+        self._extend([to_cents(amount)], [to_micros(timestamp)], [self.code_for(description)])
+
+    # --------------------------------------------------------------------------
+    # Single rows (render time only)
+    # --------------------------------------------------------------------------
+    def row(self, i):
+        """(cents, description, datetime) for row i."""
+        cols = self.store._columns
+        return cols["cents"][i], self.descriptions[cols["code"][i]], from_micros(cols["time_us"][i])
+
+    def transaction(self, i):
+        """Materialize row i as a dataclasses_guide.Transaction."""
+        cents, description, when = self.row(i)
+        return Transaction(amount=cents / 100, description=description, timestamp=when)
+
+    # --------------------------------------------------------------------------
+    # Aggregation
+    # --------------------------------------------------------------------------
+    def _selected(self, description):
+        """(cents, time_us) columns, restricted to one description if given."""
+        cents, times = self.store.column("cents"), self.store.column("time_us")
+        if description is None:
+            return cents, times
+        code = self._codes.get(description, -1)
+        if np is not None and isinstance(cents, np.ndarray):
+            keep = self.store.column("code") == code
+            return cents[keep], times[keep]
+        picks = [i for i, c in enumerate(self.store.column("code")) if c == code]
+        return [cents[i] for i in picks], [times[i] for i in picks]
+
+    def totals(self, description=None) -> Totals:
+        cents, _ = self._selected(description)
+        return Totals(len(cents), int(cents.sum()) if np is not None and isinstance(cents, np.ndarray) else sum(cents))
+
+    def by_description(self) -> Dict[str, Totals]:
+        """Totals per description, largest total first."""
+        counts, sums = _group_sums(self.store.column("code"), self.store.column("cents"), len(self.descriptions))
+        result = {self.descriptions[c]: Totals(counts[c], sums[c]) for c in range(len(self.descriptions)) if counts[c]}
+        return dict(sorted(result.items(), key=lambda item: item[1].cents, reverse=True))
+
+    def by_window(self, width, step=None, origin=None, description=None,
+                  include_empty=False) -> List[Tuple[datetime, Totals]]:
+        """
+        Totals per time window. width/step are timedeltas or seconds. step=None
+        (or step == width) gives tumbling windows; a smaller step gives sliding
+        windows [start, start + width) every `step`. Windows are aligned to
+        `origin` (a datetime, default the epoch, so 1-hour windows start on the hour).
+
+        The rows are bucketed once at gcd(width, step) resolution; each sliding
+        window is then a sum over consecutive buckets, using prefix sums.
+        """
+        width_us = _micros(width)
+        step_us = _micros(step) if step is not None else width_us
+        if width_us <= 0 or step_us <= 0:
+            raise ValueError("width and step must be positive")
+        origin_us = to_micros(origin) if origin is not None else 0
+        cents, times = self._selected(description)
+        if not len(times):
+            return []
+
+        bucket_us = math.gcd(width_us, step_us)
+        per_window, per_step = width_us // bucket_us, step_us // bucket_us
+        if np is not None and isinstance(times, np.ndarray):
+            ids = (times - origin_us) // bucket_us
+            first = _first_window(int(ids.min()), per_window, per_step)
+            counts, sums = _group_sums(ids - first, cents, int(ids.max()) - first + 1)
+        else:
+            ids = [(t - origin_us) // bucket_us for t in times]
+            first = _first_window(min(ids), per_window, per_step)
+            counts, sums = _group_sums([i - first for i in ids], cents, max(ids) - first + 1)
+
+        count_prefix = [0, *itertools.accumulate(counts)]
+        sum_prefix = [0, *itertools.accumulate(sums)]
+        windows = []
+        for start in range(0, len(counts), per_step):
+            end = min(start + per_window, len(counts))
+            n = count_prefix[end] - count_prefix[start]
+            if n or include_empty:
+                when = from_micros(origin_us + (first + start) * bucket_us)
+                windows.append((when, Totals(n, sum_prefix[end] - sum_prefix[start])))
+        return windows
+
+    @property
+    def nbytes(self):
+        """Typed columns plus the description strings (each with its object header)."""
+        return self.store.nbytes + sum(map(sys.getsizeof, self.descriptions))
+
+    def __repr__(self):
+        return f"Ledger(rows={len(self):,}, descriptions={len(self.descriptions):,})"
+
+
+def _first_window(first_bucket, per_window, per_step):
+    """Start bucket of the earliest window (a multiple of per_step) covering first_bucket."""
+    return ((first_bucket - per_window) // per_step + 1) * per_step
+
+
+def _group_sums(ids, cents, groups):
+    """(counts, sums) per group id 0..groups-1, exact in integer cents."""
+    if np is not None and isinstance(ids, np.ndarray):
+        ids = ids.astype(np.intp, copy=False)
+        counts = np.bincount(ids, minlength=groups)
+        # bincount(weights=) would sum in float64 and round totals past 2**53;
+        # add.at accumulates in int64, exact for any realistic ledger
+        sums = np.zeros(groups, dtype=np.int64)
+        np.add.at(sums, ids, np.asarray(cents, dtype=np.int64))
+        return counts.tolist(), sums.tolist()
+    counts, sums = [0] * groups, [0] * groups
+    for i, c in zip(ids, cents):
+        counts[i] += 1
+        sums[i] += c
+    return counts, sums
+
+
+if __name__ == "__main__":
+    import os
+    import random
+    import tempfile
+    import time
+
+
+    print("--- 1. The guide's Transaction, stored as columns ---")
+    ledger = Ledger()
+    ledger.extend([Transaction(amount=1250.50, description="Cloud Hosting"),
+                   Transaction(amount=4.5, description="Coffee")])
+    print(f"{ledger}, first row: {ledger.row(0)[:2]} -> {ledger.transaction(0).display_amount()}")
+
+    print("\n--- 2. Bulk CSV load (1,000,000 rows) ---")
+    rng = random.Random(7)
+    names = ["Cloud Hosting", "Coffee", "Rent", "Salary", "Groceries", "Books"]
+    start_time = datetime(2024, 1, 1)
+    path = os.path.join(tempfile.mkdtemp(), "ledger.csv")
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["amount", "description", "timestamp"])
+        for i in range(1_000_000):
+            w.writerow([f"{rng.randint(-50_000, 500_000) / 100:.2f}", rng.choice(names),
+                        (start_time + timedelta(seconds=i * 0.6)).isoformat()])
+    ledger = Ledger()
+    t0 = time.perf_counter()
+    ledger.load_csv(path)
+    print(f"Loaded {len(ledger):,} rows in {time.perf_counter() - t0:.2f}s, "
+          f"{ledger.nbytes / 1e6:.0f} MB of columns")
+
+    print("\n--- 3. Totals by description ---")
+    t0 = time.perf_counter()
+    groups = ledger.by_description()
+    elapsed = time.perf_counter() - t0
+    for name, totals in groups.items():
+        print(f"  {name:<15}{totals.format()}")
+    print(f"  ({elapsed * 1000:.0f} ms, NumPy: {'yes' if np else 'no'})")
+
+    print("\n--- 4. Daily tumbling windows and a 6h window sliding every hour ---")
+    for when, totals in ledger.by_window(timedelta(days=1)):
+        print(f"  {when:%Y-%m-%d}{totals.format()}")
+    sliding = ledger.by_window(timedelta(hours=6), step=timedelta(hours=1), description="Coffee")
+    print(f"  Coffee: {len(sliding)} sliding windows, busiest: "
+          f"{max(sliding, key=lambda w: w[1].count)[0]:%Y-%m-%d %H:%M}")
+    os.remove(path)
@@ -0,0 +1,325 @@
+"""
+Guide: Batch Validation for User Records
+dataclasses_guide.User.__post_init__ and pure_python_guide.User.__init__ check
+each email on its own and print a warning for every bad one. Importing millions
+of users that way spends most of its time in print(). This module validates
+whole columns first and builds the instances afterwards:
+
+    users, report = build_users({"id": ids, "username": names, "email": emails})
+    print(report.summary())          # nothing is printed per row
+
+- validate_columns(): precompiled regexes run over each column in a single C-level
+  pass (map(pattern.fullmatch, column)); only failing values are inspected
+  again to name the reason. Batch-only checks (duplicate ids) come for free.
+  By default only the guide's own rule ("@" in email) is applied;
+  STRICT_CHECKS adds a real email pattern and username rules.
+- ValidationReport: the failures as (row, field, reason, value) records.
+- build_users(): keeps (the default), skips or rejects bad rows. It can also bypass
+  __post_init__ / __init__ validation, since the batch already checked everything.
+"""
+
+import gc
+import itertools
+import re
+from collections import Counter, namedtuple
+from dataclasses import MISSING, fields, is_dataclass
+from typing import Iterable, List, Mapping, Sequence
+
+import pure_python_guide
+from dataclasses_guide import User
+
+GUIDE_EMAIL_RE = re.compile(r"(?s).*@.*")  # the guide's own rule: "@" in email
+EMAIL_RE = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+USERNAME_RE = re.compile(r"[A-Za-z0-9_.-]{3,32}")
+
+Failure = namedtuple("Failure", ["row", "field", "reason", "value"])
+
+
+class ValidationError(ValueError):
+    """Raised by build_users(invalid="raise"); carries the full report."""
+
+    def __init__(self, report):
+        super().__init__(report.summary())
+        self.report = report
+
+
+class ValidationReport:
+    """All failures of one batch, in row order."""
+
+    def __init__(self, rows, failures: List[Failure]):
+        self.rows = rows
+        self.failures = sorted(failures, key=lambda f: (f.row, f.field))  # values may not be comparable
+
+    @property
+    def ok(self):
+        return not self.failures
+
+    @property
+    def bad_rows(self):
+        return sorted({f.row for f in self.failures})
+
+    def by_reason(self):
+        return Counter((f.field, f.reason) for f in self.failures)
+
+    def __iter__(self):
+        return iter(self.failures)
+
+    def __len__(self):
+        return len(self.failures)
+
+    def summary(self, examples=3):
+        if self.ok:
+            return f"{self.rows:,} rows, all valid"
+        lines = [f"{self.rows:,} rows, {len(self.bad_rows):,} invalid ({len(self.failures):,} failures)"]
+        for (field, reason), count in self.by_reason().most_common():
+            sample = [f.row for f in self.failures if f.field == field and f.reason == reason][:examples]
+            lines.append(f"  {field}: {reason} x{count:,} (rows {', '.join(map(str, sample))}...)")
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"ValidationReport(rows={self.rows}, failures={len(self.failures)})"
+
+
+# ==============================================================================
+# 1. COLUMN CHECKS
+# ==============================================================================
+# A check is (compiled pattern, explain). The pattern runs over the whole
+# column; explain(value) is only called for the values that failed it.
+
+def _explain_email(value):
+    if not isinstance(value, str):
+        return "not a string"
+    if "@" not in value:
+        return "missing '@'"  # the rule User.__post_init__ warns about
+    return "invalid email format"
+
+
+def _explain_username(value):
+    if not isinstance(value, str):
+        return "not a string"
+    if not value:
+        return "empty"
+    if not 3 <= len(value) <= 32:
+        return "length must be 3-32"
+    return "invalid characters"
+
+
+# The default only applies the rule User.__post_init__ already has, so the batch
+# path accepts exactly what User(...) accepts. STRICT_CHECKS is opt-in.
+CHECKS = {
+    "email": (GUIDE_EMAIL_RE, _explain_email),
+}
+
+STRICT_CHECKS = {
+    "email": (EMAIL_RE, _explain_email),
+    "username": (USERNAME_RE, _explain_username),
+}
+
+
+def _failing_rows(pattern, column):
+    try:
+        return [i for i, match in enumerate(map(pattern.fullmatch, column)) if match is None]
+    except TypeError:  # a non-string somewhere: check value by value
+        return [i for i, v in enumerate(column) if not isinstance(v, str) or not pattern.fullmatch(v)]
+
+
+def validate_columns(columns: Mapping[str, Sequence], checks=None, unique=("id",)) -> ValidationReport:
+    """
+    Check every column that has a check (default: CHECKS) and report values
+    repeated in the `unique` columns. Columns must all have the same length.
+    """
+    checks = CHECKS if checks is None else checks
+    lengths = {len(col) for col in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"columns have different lengths: {sorted(lengths)}")
+    rows = lengths.pop() if lengths else 0
+
+    failures = []
+    for name, (pattern, explain) in checks.items():
+        if name in columns:
+            column = columns[name]
+            failures += [Failure(i, name, explain(column[i]), column[i]) for i in _failing_rows(pattern, column)]
+    for name in unique:
+        if name in columns:
+            first = {}
+            for i, value in enumerate(columns[name]):
+                j = first.setdefault(value, i)
+                if j != i:
+                    failures.append(Failure(i, name, f"duplicate of row {j}", value))
+    return ValidationReport(rows, failures)
+
+
+# ==============================================================================
+# 2. CONSTRUCTION WITHOUT PER-INSTANCE VALIDATION
+# ==============================================================================
+
+_FACTORY = object()  # default marker for default_factory fields
+_UNCHECKED = {}
+
+
+def _manual_user(id, username, email, is_active=True, tags=None):
+    """pure_python_guide.User, built without its __init__ check."""
+    user = object.__new__(pure_python_guide.User)
+    user._id, user._username, user._email, user._is_active = id, username, email, is_active
+    user._tags = tags if tags is not None else []
+    return user
+
+
+_UNCHECKED[pure_python_guide.User] = _manual_user
+
+
+def unchecked_factory(cls):
+    """
+    A constructor with the same parameters as cls that does not run
+    __post_init__. For dataclasses it is generated and cached (fields are set
+    with object.__setattr__, so frozen and slots classes work); other classes
+    must be registered in _UNCHECKED.
+    """
+    if cls in _UNCHECKED:
+        return _UNCHECKED[cls]
+    if not is_dataclass(cls):
+        raise TypeError(f"no unchecked constructor for {cls.__name__}; pass a dataclass")
+    namespace = {"_cls": cls, "_new": object.__new__, "_set": object.__setattr__, "_FACTORY": _FACTORY}
+    params, body, values = [], ["    o = _new(_cls)"], {}
+    for f in fields(cls):
+        if not f.init:
+            # set like the generated __init__ does: the default, or a fresh factory value
+            if f.default is not MISSING:
+                namespace[f"_default_{f.name}"] = f.default
+                values[f.name] = f"_default_{f.name}"
+            elif f.default_factory is not MISSING:
+                namespace[f"_factory_{f.name}"] = f.default_factory
+                values[f.name] = f"_factory_{f.name}()"
+            continue
+        values[f.name] = f.name
+        if f.default is not MISSING:
+            namespace[f"_default_{f.name}"] = f.default
+            params.append(f"{f.name}=_default_{f.name}")
+        elif f.default_factory is not MISSING:
+            namespace[f"_factory_{f.name}"] = f.default_factory
+            params.append(f"{f.name}=_FACTORY")
+            body.append(f"    if {f.name} is _FACTORY: {f.name} = _factory_{f.name}()")
+        else:
+            params.append(f.name)
+    # one setattr per field keeps the instance's inline values (no materialised __dict__)
+    body += [f"    _set(o, {name!r}, {value})" for name, value in values.items()]
+    source = f"def make({', '.join(params)}):\n" + "\n".join(body) + "\n    return o"
+    exec(source, namespace)
+    _UNCHECKED[cls] = namespace["make"]
+    return namespace["make"]
+
+
+def _defaults(cls):
+    """Per-field value to repeat for a missing column (only dataclasses know theirs)."""
+    if not is_dataclass(cls):
+        return {}
+    return {f.name: f.default if f.default is not MISSING else _FACTORY
+            for f in fields(cls) if f.default is not MISSING or f.default_factory is not MISSING}
+
+
+def build_users(columns: Mapping[str, Sequence], cls=User, invalid="keep", validate_instances=False,
+                checks=None, unique=("id",)):
+    """
+    Validate the columns, then create cls instances. Returns (instances, report).
+
+    invalid: "keep" (default) builds every row, like User(...) does, and only
+             reports; "skip" drops invalid rows; "raise" raises ValidationError
+             before anything is built.
+    validate_instances: False builds through unchecked_factory(cls), True calls
+             cls(...) normally (so __post_init__ runs and prints again).
+    """
+    if invalid not in ("skip", "keep", "raise"):
+        raise ValueError("invalid must be 'skip', 'keep' or 'raise'")
+    report = validate_columns(columns, checks, unique)
+    if invalid == "raise" and not report.ok:
+        raise ValidationError(report)
+
+    names = list(columns)
+    selected = [columns[name] for name in names]
+    if invalid == "skip" and not report.ok:
+        bad = set(report.bad_rows)
+        keep = [i not in bad for i in range(report.rows)]
+        selected = [list(itertools.compress(col, keep)) for col in selected]
+
+    if validate_instances:
+        instances = _without_gc(lambda: [cls(**dict(zip(names, values))) for values in zip(*selected)])
+    else:
+        make = unchecked_factory(cls)
+        params = [f.name for f in fields(cls) if f.init] if is_dataclass(cls) else names
+        defaults = _defaults(cls)
+        by_name = dict(zip(names, selected))
+        unknown = set(names) - set(params)
+        if unknown:
+            raise TypeError(f"{cls.__name__} has no field(s) {', '.join(sorted(unknown))}")
+        args = []
+        for name in params:
+            if name in by_name:
+                args.append(by_name[name])
+            elif name in defaults:
+                args.append(itertools.repeat(defaults[name]))
+            else:
+                raise TypeError(f"missing column {name!r} for {cls.__name__}")
+        # trailing all-default columns can simply be left out of the call
+        while args and isinstance(args[-1], itertools.repeat):
+            args.pop()
+        instances = _without_gc(lambda: list(map(make, *args)))
+    return instances, report
+
+
+def _without_gc(build):
+    """
+    Creating millions of container objects triggers repeated full collections
+    that find nothing to free; pausing the collector halves the build time.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return build()
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def build_users_from_rows(rows: Iterable[Mapping], **options):
+    """Same as build_users() for row dicts (e.g. csv.DictReader), transposed first."""
+    rows = list(rows)
+    names = list(rows[0]) if rows else []
+    return build_users({name: [row[name] for row in rows] for name in names}, **options)
+
+
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import time
+
+    print("--- 1. The guide's warning, collected instead of printed ---")
+    sample = {
+        "id": [1, 2, 3, 3],
+        "username": ["arthur", "ford", "x", "zaphod"],
+        "email": ["arthur@example.com", "ford.example.com", "x@example", "zaphod@example.com"],
+    }
+    users, report = build_users(sample)
+    print(report.summary())
+    print(f"Built (invalid rows kept, as User(...) would): {len(users)} users")
+    print(f"With STRICT_CHECKS:\n{validate_columns(sample, STRICT_CHECKS).summary()}")
+
+    print("\n--- 2. 500,000 users, 1% bad emails ---")
+    n = 500_000
+    columns = {
+        "id": list(range(n)),
+        "username": [f"user{i}" for i in range(n)],
+        "email": [f"user{i}example.com" if i % 100 == 0 else f"user{i}@example.com" for i in range(n)],
+    }
+    for label, options in [("checked instances", {"validate_instances": True, "invalid": "skip"}),
+                           ("unchecked", {"invalid": "keep"})]:
+        start = time.perf_counter()
+        users, report = build_users(columns, **options)
+        print(f"build_users, {label:<17}: {time.perf_counter() - start:.2f}s, "
+              f"{len(users):,} users, {len(report):,} failures reported")
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) as captured:
+        one_by_one = [User(i, u, e) for i, u, e in zip(columns["id"], columns["username"], columns["email"])]
+    print(f"User(...) per row:  {time.perf_counter() - start:.2f}s, "
+          f"{captured.getvalue().count(chr(10)):,} warnings printed (to a buffer)")
+
+    print(f"Same records: {users == one_by_one}")